@@ -0,0 +1,419 @@
+"""
+Key-value caches shared by API components.
+
+A backend is chosen with a URL:
+
+    memory://              In-process LRU, private to each worker
+    sqlite:///path/to.db   SQLite file shared by the workers on one host
+    redis://host:6379/0    Any server speaking the Redis protocol, shared across hosts
+
+Values must be JSON serializable; the shared backends store them encoded
+with the shared JSON backend. Cache failures are logged and treated as
+misses, so a cache outage never fails a request.
+"""
+import asyncio
+import socket
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlparse
+
+from .config import settings
+from .json_backend import json_backend
+from . import logger
+
+class CacheBackend:
+    """
+    Base class of cache backends.
+
+    Subclasses implement _get, _set, _delete and _clear; the public methods
+    add the namespace prefix and turn backend errors into misses.
+    """
+    # Whether other worker processes see the same entries
+    shared = False
+    # Whether calls do I/O, so async callers should run them in a thread
+    blocking = False
+
+    def __init__(self, namespace: str = ""):
+        self.namespace = namespace
+        self._prefix = f"{namespace}:" if namespace else ""
+
+    def _get(self, key: str) -> Any:
+        raise NotImplementedError
+
+    def _set(self, key: str, value: Any, ttl: Optional[float]) -> None:
+        raise NotImplementedError
+
+    def _delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def _clear(self) -> None:
+        raise NotImplementedError
+
+    def get(self, key: str) -> Any:
+        """Return the cached value, or None on a miss."""
+        try:
+            return self._get(self._prefix + key)
+        except Exception as e:
+            logger.warning(f"Cache lookup failed: {str(e)}", data={"backend": type(self).__name__, "namespace": self.namespace})
+            return None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Store a value.
+
+        Args:
+            key: The key, unique within the namespace
+            value: A JSON-serializable value
+            ttl: Seconds the entry stays valid, None or 0 for no expiry
+        """
+        try:
+            self._set(self._prefix + key, value, ttl or None)
+        except Exception as e:
+            logger.warning(f"Cache store failed: {str(e)}", data={"backend": type(self).__name__, "namespace": self.namespace})
+
+    def delete(self, key: str) -> None:
+        """Remove an entry if present."""
+        try:
+            self._delete(self._prefix + key)
+        except Exception as e:
+            logger.warning(f"Cache delete failed: {str(e)}", data={"backend": type(self).__name__, "namespace": self.namespace})
+
+    def clear(self) -> None:
+        """Remove every entry in the namespace."""
+        try:
+            self._clear()
+        except Exception as e:
+            logger.warning(f"Cache clear failed: {str(e)}", data={"backend": type(self).__name__, "namespace": self.namespace})
+
+    async def aget(self, key: str) -> Any:
+        """Async get that only leaves the event loop for backends doing I/O."""
+        if self.blocking:
+            return await asyncio.to_thread(self.get, key)
+        return self.get(key)
+
+    async def aset(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Async set that only leaves the event loop for backends doing I/O."""
+        if self.blocking:
+            await asyncio.to_thread(self.set, key, value, ttl)
+        else:
+            self.set(key, value, ttl)
+
+    def close(self) -> None:
+        """Release connections held by the backend."""
+
+class MemoryCache(CacheBackend):
+    """In-process LRU cache with per-entry expiry."""
+    def __init__(self, max_size: int = 1024, namespace: str = "", clock: Callable[[], float] = time.time):
+        super().__init__(namespace)
+        self.max_size = max_size
+        self._clock = clock
+        self._entries: "OrderedDict[str, Tuple[Optional[float], Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and self._clock() >= expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def _set(self, key: str, value: Any, ttl: Optional[float]) -> None:
+        if self.max_size <= 0:
+            return
+        expires_at = self._clock() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def _delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def _clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class SQLiteCache(CacheBackend):
+    """
+    Cache in a SQLite file, shared by every process that opens the same path.
+
+    The file uses write-ahead logging so readers never wait for a writer.
+    Each thread keeps its own connection, as SQLite connections cannot be
+    shared between threads. Expired rows are removed on read and swept
+    periodically on write.
+    """
+    shared = True
+    blocking = True
+
+    # Writes between sweeps of expired rows
+    SWEEP_INTERVAL = 1000
+
+    def __init__(self, path: str, namespace: str = "", timeout: float = 5.0, clock: Callable[[], float] = time.time):
+        super().__init__(namespace)
+        self.path = path
+        self.timeout = timeout
+        self._clock = clock
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache_entries (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL)"
+            )
+            self._local.connection = connection
+            with self._lock:
+                self._connections.append(connection)
+        return connection
+
+    def _get(self, key: str) -> Any:
+        connection = self._connection()
+        row = connection.execute("SELECT value, expires_at FROM cache_entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at is not None and self._clock() >= expires_at:
+            connection.execute("DELETE FROM cache_entries WHERE key = ? AND expires_at = ?", (key, expires_at))
+            return None
+        return json_backend.loads(value)
+
+    def _set(self, key: str, value: Any, ttl: Optional[float]) -> None:
+        now = self._clock()
+        connection = self._connection()
+        connection.execute(
+            "INSERT OR REPLACE INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, json_backend.dumps_bytes(value), now + ttl if ttl else None)
+        )
+        with self._lock:
+            self._writes += 1
+            sweep = self._writes % self.SWEEP_INTERVAL == 0
+        if sweep:
+            connection.execute("DELETE FROM cache_entries WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+
+    def _delete(self, key: str) -> None:
+        self._connection().execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+
+    def _clear(self) -> None:
+        if self._prefix:
+            self._connection().execute("DELETE FROM cache_entries WHERE substr(key, 1, ?) = ?", (len(self._prefix), self._prefix))
+        else:
+            self._connection().execute("DELETE FROM cache_entries")
+
+    def close(self) -> None:
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            connection.close()
+        self._local = threading.local()
+
+class RedisError(Exception):
+    """Raised when a Redis server replies with an error."""
+
+class RedisCache(CacheBackend):
+    """
+    Cache on a server speaking the Redis protocol (RESP2).
+
+    Implements the handful of commands the cache needs over a plain socket,
+    so no client library is required. Each thread keeps its own connection;
+    a broken connection is reopened once before the call fails.
+    """
+    shared = True
+    blocking = True
+
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 6379,
+        db: int = 0,
+        password: Optional[str] = None,
+        namespace: str = "",
+        key_prefix: str = "graphflow:",
+        timeout: float = 2.0,
+    ):
+        super().__init__(namespace)
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.timeout = timeout
+        self._prefix = key_prefix + self._prefix
+        self._local = threading.local()
+        self._connections: List[socket.socket] = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _encode(args: Tuple[Any, ...]) -> bytes:
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        return b"".join(parts)
+
+    @classmethod
+    def _read_reply(cls, reader) -> Any:
+        line = reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise ConnectionError("Connection closed by the Redis server")
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body.decode("utf-8")
+        if kind == b"-":
+            raise RedisError(body.decode("utf-8"))
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            length = int(body)
+            if length < 0:
+                return None
+            data = reader.read(length + 2)
+            if len(data) != length + 2:
+                raise ConnectionError("Connection closed by the Redis server")
+            return data[:-2]
+        if kind == b"*":
+            length = int(body)
+            if length < 0:
+                return None
+            return [cls._read_reply(reader) for _ in range(length)]
+        raise RedisError(f"Unexpected reply from the Redis server: {line!r}")
+
+    def _open(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        reader = sock.makefile("rb")
+        connection = (sock, reader)
+        try:
+            if self.password:
+                self._send(connection, ("AUTH", self.password))
+            if self.db:
+                self._send(connection, ("SELECT", self.db))
+        except Exception:
+            sock.close()
+            raise
+        with self._lock:
+            self._connections.append(sock)
+        return connection
+
+    def _send(self, connection, args: Tuple[Any, ...]) -> Any:
+        sock, reader = connection
+        sock.sendall(self._encode(args))
+        return self._read_reply(reader)
+
+    def _drop_connection(self) -> None:
+        connection = getattr(self._local, "connection", None)
+        self._local.connection = None
+        if connection is not None:
+            with self._lock:
+                if connection[0] in self._connections:
+                    self._connections.remove(connection[0])
+            connection[0].close()
+
+    def execute(self, *args: Any) -> Any:
+        """Send a command and return the decoded reply."""
+        for attempt in range(2):
+            connection = getattr(self._local, "connection", None)
+            try:
+                if connection is None:
+                    connection = self._local.connection = self._open()
+                return self._send(connection, args)
+            except (ConnectionError, OSError):
+                self._drop_connection()
+                if attempt:
+                    raise
+
+    def _get(self, key: str) -> Any:
+        data = self.execute("GET", key)
+        return None if data is None else json_backend.loads(data)
+
+    def _set(self, key: str, value: Any, ttl: Optional[float]) -> None:
+        data = json_backend.dumps_bytes(value)
+        if ttl:
+            self.execute("SET", key, data, "PX", max(1, int(ttl * 1000)))
+        else:
+            self.execute("SET", key, data)
+
+    def _delete(self, key: str) -> None:
+        self.execute("DEL", key)
+
+    def _clear(self) -> None:
+        # SCAN keeps the server responsive, unlike KEYS, and FLUSHDB would
+        # remove data that is not ours
+        cursor = "0"
+        while True:
+            cursor, keys = self.execute("SCAN", cursor, "MATCH", f"{self._prefix}*", "COUNT", 500)
+            cursor = cursor.decode("utf-8") if isinstance(cursor, bytes) else cursor
+            if keys:
+                self.execute("DEL", *keys)
+            if cursor == "0":
+                break
+
+    def close(self) -> None:
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for sock in connections:
+            sock.close()
+        self._local = threading.local()
+
+BACKENDS = ("memory", "sqlite", "redis")
+
+def create_cache(url: str, namespace: str = "", max_size: int = 1024) -> CacheBackend:
+    """
+    Create a cache backend from a URL.
+
+    Args:
+        url: memory://, sqlite:///path/to/cache.db or redis://[:password@]host[:port][/db]
+        namespace: Prefix separating this component's keys from others in a shared backend
+        max_size: Entry limit of the in-process LRU, unless the URL sets max_size
+
+    Returns:
+        The cache backend
+
+    Raises:
+        ValueError: If the URL scheme is not supported
+    """
+    parsed = urlparse(url)
+    options = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+
+    if parsed.scheme == "memory":
+        return MemoryCache(max_size=int(options.get("max_size", max_size)), namespace=namespace)
+    if parsed.scheme == "sqlite":
+        path = unquote(parsed.path)
+        # sqlite:///relative.db has a path of /relative.db, sqlite:////abs.db of //abs.db
+        path = path[1:] if path.startswith("/") else path
+        if not path:
+            raise ValueError("SQLite cache URL needs a file path, e.g. sqlite:///./graphflow-cache.db")
+        return SQLiteCache(path, namespace=namespace, timeout=float(options.get("timeout", 5.0)))
+    if parsed.scheme == "redis":
+        db = parsed.path.lstrip("/")
+        return RedisCache(
+            host=parsed.hostname or "localhost",
+            port=parsed.port or 6379,
+            db=int(db) if db else 0,
+            password=unquote(parsed.password) if parsed.password else None,
+            namespace=namespace,
+            key_prefix=options.get("prefix", "graphflow:"),
+            timeout=float(options.get("timeout", 2.0)),
+        )
+    raise ValueError(f"Unsupported cache URL '{url}', expected one of {', '.join(f'{name}://' for name in BACKENDS)}")
+
+# Runtime graph definitions and finished run status, shared by workers when
+# CACHE_URL points at a shared backend
+graph_definition_cache = create_cache(settings.CACHE_URL, namespace="graph", max_size=settings.GRAPH_CACHE_MAX_SIZE)
+run_status_cache = create_cache(settings.CACHE_URL, namespace="run", max_size=settings.RUN_STATUS_CACHE_MAX_SIZE)
@@ -0,0 +1,259 @@
+"""
+LangGraph checkpoint storage in the application database.
+
+Checkpointed graphs save their state after every step, so a run that
+fails part way through can be resumed from the last completed node
+instead of starting over. Each run uses its own thread, named after the
+run ID.
+"""
+import asyncio
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+    writes_sort_key,
+)
+
+from .database import SessionLocal
+from .models import GraphCheckpoint, GraphCheckpointWrite
+from . import logger
+
+def run_thread_id(run_id: int) -> str:
+    """Return the checkpoint thread of a run."""
+    return f"run-{run_id}"
+
+def run_config(run_id: int) -> Dict[str, Any]:
+    """Return the LangGraph config that runs a checkpointed graph as the given run."""
+    return {"configurable": {"thread_id": run_thread_id(run_id)}}
+
+class DatabaseCheckpointSaver(BaseCheckpointSaver):
+    """
+    Checkpoint saver backed by the graph_checkpoints tables.
+
+    Checkpoints are stored whole, channel values included, one row per
+    step. Database calls are blocking, so the async methods run them in a
+    worker thread to keep the event loop free while a step is saved.
+    """
+    def __init__(self, session_factory: Callable = SessionLocal, serde=None):
+        super().__init__(serde=serde)
+        self.session_factory = session_factory
+
+    def _parent_config(self, thread_id: str, checkpoint_ns: str, parent_checkpoint_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        if not parent_checkpoint_id:
+            return None
+        return {"configurable": {
+            "thread_id": thread_id,
+            "checkpoint_ns": checkpoint_ns,
+            "checkpoint_id": parent_checkpoint_id,
+        }}
+
+    def _to_tuple(self, db, row: GraphCheckpoint) -> CheckpointTuple:
+        writes = db.query(GraphCheckpointWrite).filter(
+            GraphCheckpointWrite.thread_id == row.thread_id,
+            GraphCheckpointWrite.checkpoint_ns == row.checkpoint_ns,
+            GraphCheckpointWrite.checkpoint_id == row.checkpoint_id
+        ).all()
+        writes.sort(key=lambda write: writes_sort_key(write.task_path, write.task_id, write.idx))
+        return CheckpointTuple(
+            config={"configurable": {
+                "thread_id": row.thread_id,
+                "checkpoint_ns": row.checkpoint_ns,
+                "checkpoint_id": row.checkpoint_id,
+            }},
+            checkpoint=self.serde.loads_typed((row.checkpoint_type, row.checkpoint)),
+            metadata=self.serde.loads_typed((row.metadata_type, row.checkpoint_metadata)),
+            parent_config=self._parent_config(row.thread_id, row.checkpoint_ns, row.parent_checkpoint_id),
+            pending_writes=[
+                (write.task_id, write.channel, self.serde.loads_typed((write.value_type, write.value)))
+                for write in writes
+            ],
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """Return the checkpoint named in the config, or the thread's latest one."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+
+        db = self.session_factory()
+        try:
+            query = db.query(GraphCheckpoint).filter(
+                GraphCheckpoint.thread_id == thread_id,
+                GraphCheckpoint.checkpoint_ns == checkpoint_ns
+            )
+            if checkpoint_id:
+                query = query.filter(GraphCheckpoint.checkpoint_id == checkpoint_id)
+            row = query.order_by(GraphCheckpoint.checkpoint_id.desc()).first()
+            if row is None:
+                return None
+            return self._to_tuple(db, row)
+        finally:
+            db.close()
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        """List checkpoints, newest first."""
+        db = self.session_factory()
+        try:
+            query = db.query(GraphCheckpoint)
+            if config:
+                query = query.filter(GraphCheckpoint.thread_id == config["configurable"]["thread_id"])
+                checkpoint_ns = config["configurable"].get("checkpoint_ns")
+                if checkpoint_ns is not None:
+                    query = query.filter(GraphCheckpoint.checkpoint_ns == checkpoint_ns)
+                checkpoint_id = get_checkpoint_id(config)
+                if checkpoint_id:
+                    query = query.filter(GraphCheckpoint.checkpoint_id == checkpoint_id)
+            before_id = get_checkpoint_id(before) if before else None
+            if before_id:
+                query = query.filter(GraphCheckpoint.checkpoint_id < before_id)
+
+            tuples: List[CheckpointTuple] = []
+            for row in query.order_by(GraphCheckpoint.thread_id, GraphCheckpoint.checkpoint_id.desc()):
+                if limit is not None and len(tuples) >= limit:
+                    break
+                checkpoint_tuple = self._to_tuple(db, row)
+                # Metadata is stored serialized, so the filter is applied here
+                if filter and not all(checkpoint_tuple.metadata.get(key) == value for key, value in filter.items()):
+                    continue
+                tuples.append(checkpoint_tuple)
+        finally:
+            db.close()
+        yield from tuples
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """Save a checkpoint and return the config pointing at it."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_type, checkpoint_data = self.serde.dumps_typed(checkpoint)
+        metadata_type, metadata_data = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+
+        db = self.session_factory()
+        try:
+            db.merge(GraphCheckpoint(
+                thread_id=thread_id,
+                checkpoint_ns=checkpoint_ns,
+                checkpoint_id=checkpoint["id"],
+                parent_checkpoint_id=config["configurable"].get("checkpoint_id"),
+                checkpoint_type=checkpoint_type,
+                checkpoint=checkpoint_data,
+                metadata_type=metadata_type,
+                checkpoint_metadata=metadata_data
+            ))
+            db.commit()
+        finally:
+            db.close()
+
+        return {"configurable": {
+            "thread_id": thread_id,
+            "checkpoint_ns": checkpoint_ns,
+            "checkpoint_id": checkpoint["id"],
+        }}
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """Save the writes of a task that finished after the given checkpoint."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+
+        db = self.session_factory()
+        try:
+            for index, (channel, value) in enumerate(writes):
+                idx = WRITES_IDX_MAP.get(channel, index)
+                key = (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+                # Regular writes are saved once; special channels are overwritten
+                if idx >= 0 and db.get(GraphCheckpointWrite, key) is not None:
+                    continue
+                value_type, value_data = self.serde.dumps_typed(value)
+                db.merge(GraphCheckpointWrite(
+                    thread_id=thread_id,
+                    checkpoint_ns=checkpoint_ns,
+                    checkpoint_id=checkpoint_id,
+                    task_id=task_id,
+                    idx=idx,
+                    channel=channel,
+                    value_type=value_type,
+                    value=value_data,
+                    task_path=task_path
+                ))
+            db.commit()
+        finally:
+            db.close()
+
+    def delete_thread(self, thread_id: str) -> None:
+        """Delete every checkpoint and write of a thread."""
+        db = self.session_factory()
+        try:
+            db.query(GraphCheckpointWrite).filter(GraphCheckpointWrite.thread_id == thread_id).delete(synchronize_session=False)
+            deleted = db.query(GraphCheckpoint).filter(GraphCheckpoint.thread_id == thread_id).delete(synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+        if deleted and logger.is_enabled("debug"):
+            logger.debug("Deleted checkpoints", data={"thread_id": thread_id, "checkpoints": deleted})
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        tuples = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for checkpoint_tuple in tuples:
+            yield checkpoint_tuple
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+# Shared saver used by checkpointed graphs
+checkpointer = DatabaseCheckpointSaver()
@@ -0,0 +1,147 @@
+import threading
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+import httpx
+from langchain_openai import ChatOpenAI
+
+from .config import settings
+from . import logger
+
+try:
+    from langchain_community.tools.tavily_search import TavilySearchResults
+except ImportError:  # Search tools are optional
+    TavilySearchResults = None
+
+class ClientRegistry:
+    """
+    Registry of LLM and tool clients shared by every node and graph.
+
+    Each distinct client configuration is created once. All OpenAI chat models
+    share one sync and one async HTTP client, so keep-alive connections are
+    pooled across nodes instead of each client opening its own pool.
+    """
+    def __init__(self, max_connections: int = 100, max_keepalive_connections: int = 20, keepalive_expiry: float = 30.0):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._clients: Dict[Tuple[Hashable, ...], Any] = {}
+        self._http_client: Optional[httpx.Client] = None
+        self._async_http_client: Optional[httpx.AsyncClient] = None
+        self._lock = threading.Lock()
+
+    @property
+    def http_client(self) -> httpx.Client:
+        """The shared sync HTTP client, created on first use."""
+        with self._lock:
+            if self._http_client is None:
+                self._http_client = httpx.Client(limits=self.limits)
+            return self._http_client
+
+    @property
+    def async_http_client(self) -> httpx.AsyncClient:
+        """The shared async HTTP client, created on first use."""
+        with self._lock:
+            if self._async_http_client is None:
+                self._async_http_client = httpx.AsyncClient(limits=self.limits)
+            return self._async_http_client
+
+    def _get_or_create(self, key: Tuple[Hashable, ...], factory) -> Any:
+        with self._lock:
+            client = self._clients.get(key)
+        if client is not None:
+            return client
+
+        client = factory()
+        with self._lock:
+            # Another thread may have created the same client in the meantime
+            return self._clients.setdefault(key, client)
+
+    def get_chat_model(self, model_name: str, temperature: float) -> ChatOpenAI:
+        """
+        Get the shared chat model for a model name and temperature.
+
+        Args:
+            model_name: The OpenAI model name
+            temperature: The sampling temperature
+
+        Returns:
+            A ChatOpenAI instance using the pooled HTTP clients
+        """
+        key = ("openai", model_name, temperature)
+
+        def factory():
+            logger.debug("Creating chat model client", data={
+                "model_name": model_name,
+                "temperature": temperature
+            })
+            return ChatOpenAI(
+                model_name=model_name,
+                temperature=temperature,
+                http_client=self.http_client,
+                http_async_client=self.async_http_client,
+            )
+
+        return self._get_or_create(key, factory)
+
+    def get_search_tool(self, max_results: int):
+        """
+        Get the shared Tavily search tool for a result limit.
+
+        Args:
+            max_results: Maximum number of search results to return
+
+        Returns:
+            A TavilySearchResults instance
+        """
+        if TavilySearchResults is None:
+            raise ImportError("langchain-community is required for search tool nodes")
+
+        key = ("tavily", max_results)
+
+        def factory():
+            logger.debug("Creating search tool client", data={"max_results": max_results})
+            return TavilySearchResults(max_results=max_results)
+
+        return self._get_or_create(key, factory)
+
+    def clear(self) -> None:
+        """Forget all cached clients without closing the HTTP pools."""
+        with self._lock:
+            self._clients.clear()
+
+    def close(self) -> None:
+        """Close the shared sync HTTP client and forget all cached clients."""
+        with self._lock:
+            self._clients.clear()
+            if self._http_client is not None:
+                self._http_client.close()
+                self._http_client = None
+
+    async def aclose(self) -> None:
+        """Close both shared HTTP clients and forget all cached clients."""
+        with self._lock:
+            async_http_client = self._async_http_client
+            self._async_http_client = None
+        if async_http_client is not None:
+            await async_http_client.aclose()
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+# Shared registry used by the graph builder
+client_registry = ClientRegistry(
+    max_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+    max_keepalive_connections=settings.LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    keepalive_expiry=settings.LLM_HTTP_KEEPALIVE_EXPIRY,
+)
+
+def get_chat_model(model_name: str, temperature: float) -> ChatOpenAI:
+    """Get the shared chat model from the default registry."""
+    return client_registry.get_chat_model(model_name, temperature)
+
+def get_search_tool(max_results: int):
+    """Get the shared search tool from the default registry."""
+    return client_registry.get_search_tool(max_results)
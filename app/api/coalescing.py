@@ -0,0 +1,112 @@
+"""
+Coalescing of identical concurrent graph runs.
+
+Runs are keyed by graph, definition hash and canonical input. While a run
+is in flight, identical requests wait for it and receive its response
+instead of executing the graph again, so a burst of identical requests
+costs one set of LLM and tool calls. Optionally the response is also kept
+for a few seconds after the run completes.
+"""
+import asyncio
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from .cache import CacheBackend, create_cache
+from .config import settings
+from . import metrics
+from . import logger
+
+RUNS_COALESCED = metrics.registry.counter(
+    "graphflow_runs_coalesced_total", "Run requests answered by another identical run", ("source",)
+)
+
+def run_key(graph_id: int, definition_hash: str, input_data: Dict[str, Any]) -> str:
+    """
+    Return the coalescing key of a run.
+
+    Args:
+        graph_id: The ID of the graph
+        definition_hash: Hash of the definition being run
+        input_data: The run input; key order does not matter
+
+    Returns:
+        A hex digest identifying identical runs
+    """
+    canonical = json.dumps(
+        [graph_id, definition_hash, input_data],
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+class RunCoalescer:
+    """
+    Single-flight execution of identical runs, with an optional result cache.
+
+    The first request for a key starts the run in its own task; later
+    requests for the same key await that task. The task is shielded, so
+    a waiter that goes away does not cancel the run for the others.
+    Failures are shared like results and never cached.
+    """
+    def __init__(self, result_ttl: float = 0, result_cache: Optional[CacheBackend] = None):
+        self.result_ttl = result_ttl
+        self.result_cache = result_cache
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self._inflight_hits = RUNS_COALESCED.labels("in_flight")
+        self._cache_hits = RUNS_COALESCED.labels("result_cache")
+
+    @property
+    def in_flight(self) -> int:
+        """Number of distinct runs executing."""
+        return len(self._in_flight)
+
+    async def run(self, key: str, execute: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Execute a run, or join the identical run already in flight.
+
+        Args:
+            key: The key from run_key
+            execute: Coroutine function running the graph and returning a
+                JSON-serializable response
+
+        Returns:
+            The response and whether it came from another request's run
+        """
+        use_cache = self.result_ttl > 0 and self.result_cache is not None
+        if use_cache:
+            cached = await self.result_cache.aget(key)
+            if cached is not None:
+                self._cache_hits.inc()
+                return cached, True
+
+        task = self._in_flight.get(key)
+        if task is not None and task.get_loop() is asyncio.get_running_loop():
+            self._inflight_hits.inc()
+            if logger.is_enabled("debug"):
+                logger.debug("Joining identical run in flight", data={"key": key})
+            return await asyncio.shield(task), True
+
+        task = asyncio.ensure_future(execute())
+        self._in_flight[key] = task
+        task.add_done_callback(lambda done: self._finished(key, done))
+        response = await asyncio.shield(task)
+        if use_cache:
+            await self.result_cache.aset(key, response, ttl=self.result_ttl)
+        return response, False
+
+    def _finished(self, key: str, task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Retrieve the outcome so a run nobody awaits anymore is not reported as unhandled
+        if not task.cancelled():
+            task.exception()
+
+# Shared coalescer used by the run endpoint
+run_coalescer = RunCoalescer(
+    result_ttl=settings.RUN_RESULT_CACHE_TTL_SECONDS,
+    result_cache=create_cache(settings.CACHE_URL, namespace="run-result", max_size=settings.RUN_RESULT_CACHE_MAX_SIZE),
+)
+
+metrics.registry.callback("graphflow_runs_in_flight", "Distinct coalesced runs executing", "gauge", lambda: run_coalescer.in_flight)
@@ -2,7 +2,7 @@ import os
 import logging
 from pydantic import Field
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Dict, Optional
 from pydantic import field_validator
 
 logger = logging.getLogger("graphflow-api")
@@ -17,6 +17,34 @@ class Settings(BaseSettings):
         default="sqlite:///./graphflow.db", 
         description="Database connection string"
     )
+    DATABASE_POOL_SIZE: int = Field(
+        default=10,
+        description="Connections kept open in the database pool"
+    )
+    DATABASE_MAX_OVERFLOW: int = Field(
+        default=20,
+        description="Extra connections opened beyond the pool size under load"
+    )
+    DATABASE_POOL_TIMEOUT: float = Field(
+        default=30.0,
+        description="Seconds to wait for a free pooled connection before failing"
+    )
+    DATABASE_POOL_RECYCLE: int = Field(
+        default=1800,
+        description="Seconds after which pooled connections are replaced (-1 disables)"
+    )
+    DATABASE_POOL_PRE_PING: bool = Field(
+        default=True,
+        description="Check connections for liveness before handing them out"
+    )
+    DATABASE_ASYNC_ENABLED: bool = Field(
+        default=False,
+        description="Create an async engine for handlers using get_async_db (needs aiosqlite or asyncpg)"
+    )
+    DATABASE_ASYNC_URL: Optional[str] = Field(
+        default=None,
+        description="Async database connection string, derived from DATABASE_URL when not set"
+    )
     
     # API settings
     API_PREFIX: str = Field(default="/api", description="API route prefix")
@@ -44,7 +72,237 @@ class Settings(BaseSettings):
         default=None, 
         description="OpenAI API key for LangGraph"
     )
-    
+
+    # Compiled graph cache settings
+    GRAPH_CACHE_MAX_SIZE: int = Field(
+        default=128,
+        description="Maximum number of compiled graphs kept in memory"
+    )
+    GRAPH_CACHE_TTL_SECONDS: int = Field(
+        default=3600,
+        description="Seconds before a cached compiled graph is rebuilt (0 disables expiry)"
+    )
+
+    # LLM client connection pool settings
+    LLM_HTTP_MAX_CONNECTIONS: int = Field(
+        default=100,
+        description="Maximum concurrent HTTP connections shared by all LLM clients"
+    )
+    LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS: int = Field(
+        default=20,
+        description="Maximum idle keep-alive connections kept in the shared pool"
+    )
+    LLM_HTTP_KEEPALIVE_EXPIRY: float = Field(
+        default=30.0,
+        description="Seconds an idle keep-alive connection is kept open"
+    )
+
+    # Graph listing settings
+    GRAPH_LIST_DEFAULT_LIMIT: int = Field(
+        default=100,
+        description="Number of graphs returned per page when a cursor is given without a limit; with neither, all graphs are returned"
+    )
+    GRAPH_LIST_MAX_LIMIT: int = Field(
+        default=1000,
+        description="Maximum number of graphs returned per page"
+    )
+
+    # Execution history settings
+    EXECUTION_LIST_DEFAULT_LIMIT: int = Field(
+        default=50,
+        description="Executions returned per page when no limit is given"
+    )
+    EXECUTION_LIST_MAX_LIMIT: int = Field(
+        default=500,
+        description="Upper bound for the executions page size"
+    )
+    EXECUTION_RETENTION_DAYS: int = Field(
+        default=0,
+        description="Remove executions older than this many days (0 keeps them forever)"
+    )
+    EXECUTION_RETENTION_MAX_PER_GRAPH: int = Field(
+        default=0,
+        description="Keep at most this many recent executions per graph (0 means no limit)"
+    )
+    EXECUTION_RETENTION_ARCHIVE: bool = Field(
+        default=False,
+        description="Copy removed executions to the archive table instead of only deleting them"
+    )
+    EXECUTION_RETENTION_BATCH_SIZE: int = Field(
+        default=500,
+        description="Executions removed per transaction by the retention job"
+    )
+    EXECUTION_RETENTION_INTERVAL_SECONDS: int = Field(
+        default=3600,
+        description="Seconds between retention job runs"
+    )
+
+    # Background run queue settings
+    RUN_QUEUE_CONCURRENCY: int = Field(
+        default=4,
+        description="Number of background runs executed concurrently"
+    )
+    RUN_QUEUE_MAX_PENDING: int = Field(
+        default=100,
+        description="Maximum queued background runs before submissions are rejected with 429"
+    )
+    RUN_RECONCILE_ON_STARTUP: bool = Field(
+        default=True,
+        description="Mark runs left queued or running by a previous server as interrupted on startup"
+    )
+
+    # Batch run settings
+    BATCH_MAX_CONCURRENCY: int = Field(
+        default=8,
+        description="Default and upper bound for concurrent runs within one batch request"
+    )
+    BATCH_MAX_ITEMS: int = Field(
+        default=1000,
+        description="Maximum number of inputs accepted by one batch request"
+    )
+
+    # LLM response cache settings
+    LLM_CACHE_MAX_SIZE: int = Field(
+        default=1024,
+        description="Maximum number of LLM responses kept in the in-process cache"
+    )
+    LLM_CACHE_TTL_SECONDS: int = Field(
+        default=86400,
+        description="Default seconds a cached LLM response stays valid (0 disables expiry)"
+    )
+    LLM_CACHE_PERSISTENT: bool = Field(
+        default=True,
+        description="Also store cached LLM responses in the database"
+    )
+
+    # LLM rate limit settings
+    LLM_RATE_LIMIT_ENABLED: bool = Field(
+        default=True,
+        description="Queue LLM calls so each model stays within its rate and concurrency limits"
+    )
+    LLM_REQUESTS_PER_MINUTE: int = Field(
+        default=0,
+        description="Default requests per minute allowed per model (0 for no limit)"
+    )
+    LLM_TOKENS_PER_MINUTE: int = Field(
+        default=0,
+        description="Default prompt and completion tokens per minute allowed per model (0 for no limit)"
+    )
+    LLM_MAX_CONCURRENCY: int = Field(
+        default=32,
+        description="Default concurrent calls allowed per model (0 for no limit)"
+    )
+    LLM_RATE_LIMITS: Dict[str, Dict[str, float]] = Field(
+        default={},
+        description='Per-model overrides as JSON, e.g. {"gpt-4": {"requests_per_minute": 500, "tokens_per_minute": 30000, "max_concurrency": 8}}'
+    )
+
+    # Node execution policy settings
+    NODE_TIMEOUT_SECONDS: float = Field(
+        default=120.0,
+        description="Default seconds an LLM or tool node attempt may take (0 disables)"
+    )
+    NODE_RETRIES: int = Field(
+        default=0,
+        description="Default retries of an LLM or tool node after a transient failure"
+    )
+    NODE_RETRY_BACKOFF_SECONDS: float = Field(
+        default=0.5,
+        description="Base delay before a node retry, doubled for each retry and jittered"
+    )
+    NODE_RETRY_MAX_BACKOFF_SECONDS: float = Field(
+        default=10.0,
+        description="Upper bound of the delay before a node retry"
+    )
+    CIRCUIT_BREAKER_ENABLED: bool = Field(
+        default=True,
+        description="Fail LLM and tool nodes fast while their provider keeps failing"
+    )
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD: int = Field(
+        default=5,
+        description="Consecutive transient failures that open a provider's circuit"
+    )
+    CIRCUIT_BREAKER_RESET_SECONDS: float = Field(
+        default=30.0,
+        description="Seconds an open circuit waits before letting a trial call through"
+    )
+    NODE_TIMEOUT_WORKERS: int = Field(
+        default=64,
+        description="Threads running sync node and provider calls that have a timeout; timed out calls hold theirs until they return"
+    )
+
+    # Logging settings
+    LOG_FILE: str = Field(
+        default="api.log",
+        description="File receiving plain-text logs, written on a background thread (empty disables it)"
+    )
+
+    # Metrics settings
+    METRICS_ENABLED: bool = Field(
+        default=True,
+        description="Instrument graph nodes and routers and expose /metrics"
+    )
+    METRICS_MAX_SERIES: int = Field(
+        default=1000,
+        description="Label sets per metric before user-defined label values (graph, node, model, tool) are reported as 'other'"
+    )
+
+    # Execution trace settings
+    EXECUTION_TRACE_ENABLED: bool = Field(
+        default=True,
+        description="Record node spans and routing decisions for each run"
+    )
+    EXECUTION_TRACE_PAYLOAD_SIZES: bool = Field(
+        default=False,
+        description="Record the serialized size of each node's input and output state in traces"
+    )
+
+    # Shared cache settings
+    CACHE_URL: str = Field(
+        default="memory://",
+        description="Cache for graph definitions, run status and LLM responses: memory://, sqlite:///path/to/cache.db or redis://host:6379/0; memory:// is replaced by a temporary SQLite file when the server starts several workers"
+    )
+    CACHE_TTL_SECONDS: int = Field(
+        default=300,
+        description="Seconds graph definitions and finished run status stay cached"
+    )
+    RUN_STATUS_CACHE_MAX_SIZE: int = Field(
+        default=1024,
+        description="Finished runs kept by the in-process cache"
+    )
+
+    # Run coalescing settings
+    RUN_COALESCING_ENABLED: bool = Field(
+        default=True,
+        description="Let identical concurrent run requests share one execution"
+    )
+    RUN_RESULT_CACHE_TTL_SECONDS: float = Field(
+        default=0,
+        description="Seconds a run response is reused for identical requests after it completes (0 disables)"
+    )
+    RUN_RESULT_CACHE_MAX_SIZE: int = Field(
+        default=256,
+        description="Run responses kept by the in-process result cache"
+    )
+
+    # Server settings
+    SERVER_WORKERS: int = Field(
+        default=1,
+        description="Worker processes started by python -m app.api.server"
+    )
+
+    # Checkpoint settings
+    CHECKPOINT_ENABLED: bool = Field(
+        default=False,
+        description="Persist run state after every node so failed runs can be resumed; adds a run record and a checkpoint write per node to every run"
+    )
+
+    # JSON serialization settings
+    JSON_BACKEND: str = Field(
+        default="auto",
+        description="JSON library for responses, logs and stored payloads: auto, orjson or stdlib"
+    )
+
     @field_validator("CORS_ORIGINS")
     def parse_cors_origins(cls, v):
         if v == "*":
@@ -65,7 +323,7 @@ class Settings(BaseSettings):
     
     model_config = {
         "env_file": ".env",
-        "env_file_encoding": "utf-8",
+        "env_file_encoding": "utf-8-sig",
         "case_sensitive": True
     }
 
@@ -1,18 +1,68 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from typing import Any, Dict
 import logging
 
 from .config import settings
+from . import json_backend
 
 logger = logging.getLogger("graphflow-api")
 
+# Async drivers used when DATABASE_ASYNC_URL is derived from DATABASE_URL
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+}
+
+def engine_options(database_url: str) -> Dict[str, Any]:
+    """
+    Build create_engine keyword arguments from the pool settings.
+
+    In-memory SQLite keeps a single connection per thread, so the
+    queue pool settings do not apply to it.
+
+    Args:
+        database_url: The database connection string
+
+    Returns:
+        Keyword arguments for create_engine or create_async_engine
+    """
+    url = make_url(database_url)
+    options: Dict[str, Any] = {
+        "pool_pre_ping": settings.DATABASE_POOL_PRE_PING,
+        "json_serializer": json_backend.dumps,
+        "json_deserializer": json_backend.loads,
+    }
+
+    if url.get_backend_name() == "sqlite":
+        if url.database in (None, "", ":memory:"):
+            return options
+    options.update({
+        "pool_size": settings.DATABASE_POOL_SIZE,
+        "max_overflow": settings.DATABASE_MAX_OVERFLOW,
+        "pool_timeout": settings.DATABASE_POOL_TIMEOUT,
+        "pool_recycle": settings.DATABASE_POOL_RECYCLE,
+    })
+    return options
+
+def async_database_url(database_url: str) -> str:
+    """Swap the driver of a sync connection string for its async counterpart."""
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver known for database backend '{backend}'")
+    return str(url.set(drivername=ASYNC_DRIVERS[backend]))
+
 # Create database engine
 try:
     logger.info(f"Connecting to database at {settings.DATABASE_URL.split('@')[-1] if '@' in settings.DATABASE_URL else settings.DATABASE_URL}")
     engine = create_engine(
         settings.DATABASE_URL,
-        connect_args={"check_same_thread": False} if settings.DATABASE_URL.startswith("sqlite") else {}
+        connect_args={"check_same_thread": False} if settings.DATABASE_URL.startswith("sqlite") else {},
+        **engine_options(settings.DATABASE_URL)
     )
     logger.info("Database connection established")
 except Exception as e:
@@ -22,6 +72,22 @@ except Exception as e:
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Optional async engine and session factory
+async_engine = None
+AsyncSessionLocal = None
+
+if settings.DATABASE_ASYNC_ENABLED:
+    try:
+        from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+        async_url = settings.DATABASE_ASYNC_URL or async_database_url(settings.DATABASE_URL)
+        async_engine = create_async_engine(async_url, **engine_options(async_url))
+        AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+        logger.info("Async database engine created")
+    except Exception as e:
+        # The sync engine keeps working, only get_async_db is unavailable
+        logger.error(f"Failed to create async database engine: {str(e)}")
+
 # Create base class for models
 Base = declarative_base()
 
@@ -31,4 +97,17 @@ def get_db():
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+# Dependency to get an async database session
+async def get_async_db():
+    if AsyncSessionLocal is None:
+        raise RuntimeError("Async database engine is not configured, set DATABASE_ASYNC_ENABLED")
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def dispose_engines() -> None:
+    """Close every pooled connection, called on shutdown."""
+    if async_engine is not None:
+        await async_engine.dispose()
+    engine.dispose()
@@ -0,0 +1,263 @@
+"""
+Restricted expression language for routing conditions.
+
+Expressions use a small subset of Python syntax and are evaluated against the
+graph state without ever calling eval:
+
+    "search" if "http" in state["query"].lower() else "answer"
+    state["score"] >= 0.8 and state.get("approved", False)
+
+Supported syntax:
+    - Literals: strings, numbers, booleans, None, and lists/tuples of these
+    - State lookup: state["key"], nested lookups and state.get("key", default)
+    - Comparisons: ==, !=, <, <=, >, >=, in, not in, is None, is not None
+    - Boolean logic: and, or, not, and conditional expressions (a if cond else b)
+    - Arithmetic: +, -, *, / and unary minus; * only multiplies numbers
+    - String methods: lower, upper, strip, startswith, endswith, split, count
+    - Functions: len, str, int, float, bool
+
+Expressions are parsed and validated once and compiled into a tree of
+closures, so evaluation does no parsing or name lookups.
+"""
+import ast
+import operator
+from functools import lru_cache
+from typing import Any, Callable, Dict
+
+Evaluator = Callable[[Dict[str, Any]], Any]
+
+class ExpressionError(ValueError):
+    """Raised when a routing expression uses unsupported or invalid syntax."""
+
+MAX_EXPRESSION_LENGTH = 1000
+
+_COMPARISON_OPERATORS = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.In: lambda left, right: left in right,
+    ast.NotIn: lambda left, right: left not in right,
+    ast.Is: operator.is_,
+    ast.IsNot: operator.is_not,
+}
+
+_BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+}
+
+# Methods whose result is at most as large as their inputs, so a stored
+# condition cannot allocate unbounded memory during a run
+_STRING_METHODS = {"lower", "upper", "strip", "startswith", "endswith", "split", "count"}
+
+# Operand types that * would repeat instead of multiply
+_SEQUENCE_TYPES = (str, list, tuple, dict, bytes)
+
+_FUNCTIONS = {
+    "len": len,
+    "str": str,
+    "int": int,
+    "float": float,
+    "bool": bool,
+}
+
+def _error(node: ast.AST, message: str) -> ExpressionError:
+    column = getattr(node, "col_offset", None)
+    if column is not None:
+        message = f"{message} (at column {column + 1})"
+    return ExpressionError(message)
+
+def _compile_node(node: ast.AST) -> Evaluator:
+    if isinstance(node, ast.Constant):
+        if not isinstance(node.value, (str, int, float, bool, type(None))):
+            raise _error(node, f"Unsupported literal {node.value!r}")
+        value = node.value
+        return lambda state: value
+
+    if isinstance(node, (ast.List, ast.Tuple)):
+        items = [_compile_node(item) for item in node.elts]
+        if all(isinstance(item, ast.Constant) for item in node.elts):
+            # Constant collections are built once
+            value = tuple(item.value for item in node.elts)
+            return lambda state: value
+        return lambda state: tuple(item(state) for item in items)
+
+    if isinstance(node, ast.Name):
+        if node.id != "state":
+            raise _error(node, f"Unknown name '{node.id}', only 'state' is available")
+        return lambda state: state
+
+    if isinstance(node, ast.Subscript):
+        if isinstance(node.slice, ast.Slice):
+            raise _error(node, "Slices are not supported")
+        target = _compile_node(node.value)
+        if isinstance(node.slice, ast.Constant):
+            key = node.slice.value
+            if not isinstance(key, (str, int)):
+                raise _error(node, "Lookup keys must be strings or integers")
+            return lambda state: target(state)[key]
+        key_evaluator = _compile_node(node.slice)
+        return lambda state: target(state)[key_evaluator(state)]
+
+    if isinstance(node, ast.Compare):
+        operands = [_compile_node(node.left)] + [_compile_node(comparator) for comparator in node.comparators]
+        operators = []
+        for op in node.ops:
+            if type(op) not in _COMPARISON_OPERATORS:
+                raise _error(node, f"Unsupported comparison {type(op).__name__}")
+            operators.append(_COMPARISON_OPERATORS[type(op)])
+
+        if len(operators) == 1:
+            left, right = operands
+            compare = operators[0]
+            return lambda state: compare(left(state), right(state))
+
+        def chained_compare(state):
+            left = operands[0](state)
+            for compare, operand in zip(operators, operands[1:]):
+                right = operand(state)
+                if not compare(left, right):
+                    return False
+                left = right
+            return True
+
+        return chained_compare
+
+    if isinstance(node, ast.BoolOp):
+        values = [_compile_node(value) for value in node.values]
+        if isinstance(node.op, ast.And):
+            def and_op(state):
+                result = True
+                for value in values:
+                    result = value(state)
+                    if not result:
+                        return result
+                return result
+            return and_op
+
+        def or_op(state):
+            result = False
+            for value in values:
+                result = value(state)
+                if result:
+                    return result
+            return result
+        return or_op
+
+    if isinstance(node, ast.UnaryOp):
+        operand = _compile_node(node.operand)
+        if isinstance(node.op, ast.Not):
+            return lambda state: not operand(state)
+        if isinstance(node.op, ast.USub):
+            return lambda state: -operand(state)
+        raise _error(node, f"Unsupported operator {type(node.op).__name__}")
+
+    if isinstance(node, ast.BinOp):
+        if type(node.op) not in _BINARY_OPERATORS:
+            raise _error(node, f"Unsupported operator {type(node.op).__name__}")
+        left = _compile_node(node.left)
+        right = _compile_node(node.right)
+        binary = _BINARY_OPERATORS[type(node.op)]
+        
+        if isinstance(node.op, ast.Mult):
+            # Repeating a sequence, e.g. "a" * 10**9, could exhaust memory
+            for operand in (node.left, node.right):
+                if isinstance(operand, (ast.List, ast.Tuple)) or (
+                    isinstance(operand, ast.Constant) and isinstance(operand.value, str)
+                ):
+                    raise _error(node, "'*' only multiplies numbers")
+            
+            def multiply(state):
+                left_value = left(state)
+                right_value = right(state)
+                if isinstance(left_value, _SEQUENCE_TYPES) or isinstance(right_value, _SEQUENCE_TYPES):
+                    raise ExpressionError("'*' only multiplies numbers")
+                return left_value * right_value
+            
+            return multiply
+        
+        return lambda state: binary(left(state), right(state))
+
+    if isinstance(node, ast.IfExp):
+        test = _compile_node(node.test)
+        body = _compile_node(node.body)
+        orelse = _compile_node(node.orelse)
+        return lambda state: body(state) if test(state) else orelse(state)
+
+    if isinstance(node, ast.Call):
+        if node.keywords:
+            raise _error(node, "Keyword arguments are not supported")
+        args = [_compile_node(arg) for arg in node.args]
+
+        if isinstance(node.func, ast.Name):
+            function = _FUNCTIONS.get(node.func.id)
+            if function is None:
+                raise _error(node, f"Unknown function '{node.func.id}'")
+            if len(args) != 1:
+                raise _error(node, f"'{node.func.id}' takes exactly one argument")
+            arg = args[0]
+            return lambda state: function(arg(state))
+
+        if isinstance(node.func, ast.Attribute):
+            method_name = node.func.attr
+            target = _compile_node(node.func.value)
+
+            if method_name == "get":
+                if len(args) not in (1, 2):
+                    raise _error(node, "'get' takes a key and an optional default")
+                key = args[0]
+                default = args[1] if len(args) == 2 else (lambda state: None)
+                return lambda state: target(state).get(key(state), default(state))
+
+            if method_name not in _STRING_METHODS:
+                raise _error(node, f"Unsupported method '{method_name}'")
+
+            def string_method(state):
+                value = target(state)
+                if not isinstance(value, str):
+                    raise TypeError(f"'{method_name}' requires a string, got {type(value).__name__}")
+                return getattr(value, method_name)(*[arg(state) for arg in args])
+
+            return string_method
+
+        raise _error(node, "Only named functions and string methods can be called")
+
+    if isinstance(node, ast.Attribute):
+        raise _error(node, f"Attribute access '.{node.attr}' is not supported")
+
+    raise _error(node, f"Unsupported syntax {type(node).__name__}")
+
+@lru_cache(maxsize=1024)
+def compile_expression(source: str) -> Evaluator:
+    """
+    Parse, validate and compile a routing expression.
+
+    Compiled evaluators are cached by source text, so rebuilding a graph
+    with the same expressions does not parse them again.
+
+    Args:
+        source: The expression source
+
+    Returns:
+        A function that evaluates the expression against a state dict
+
+    Raises:
+        ExpressionError: If the expression is empty, too long, not valid
+            syntax or uses anything outside the supported subset
+    """
+    if not isinstance(source, str) or not source.strip():
+        raise ExpressionError("Expression must be a non-empty string")
+    if len(source) > MAX_EXPRESSION_LENGTH:
+        raise ExpressionError(f"Expression is longer than {MAX_EXPRESSION_LENGTH} characters")
+
+    try:
+        tree = ast.parse(source.strip(), mode="eval")
+    except SyntaxError as e:
+        raise ExpressionError(f"Invalid expression syntax: {e.msg}")
+
+    return _compile_node(tree.body)
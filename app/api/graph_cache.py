@@ -0,0 +1,230 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .config import settings
+from . import logger
+
+def hash_definition(definition: Optional[Dict[str, Any]]) -> str:
+    """
+    Compute a stable content hash for a graph definition.
+
+    Args:
+        definition: The graph definition as stored on the graph
+
+    Returns:
+        A hex digest that only changes when the definition content changes
+    """
+    canonical = json.dumps(definition or {}, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+class NodeFunctionCache:
+    """
+    Node and router functions from a graph's recent builds, keyed by content hash.
+
+    Rebuilding a graph after an edit creates functions only for the nodes
+    and conditional edges whose configuration changed and reuses the rest.
+    Functions not used by either of the last two builds are dropped, so
+    alternating between two versions of a graph stays cheap while old
+    versions do not accumulate.
+    """
+    def __init__(self):
+        self._entries: Dict[str, Tuple[int, Callable]] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.reused = 0
+        self.created = 0
+
+    def start_build(self) -> int:
+        """Begin a build and return its generation."""
+        with self._lock:
+            self._generation += 1
+            return self._generation
+
+    def get_or_create(self, content: Any, factory: Callable[[], Callable], generation: int) -> Callable:
+        """
+        Return the function built from identical content, creating it on a miss.
+
+        Args:
+            content: Everything the function depends on, e.g. node ID, type and config
+            factory: Function that creates the node or router function
+            generation: The generation returned by start_build
+
+        Returns:
+            The cached or newly created function
+        """
+        key = hash_definition(content)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries[key] = (max(entry[0], generation), entry[1])
+                self.reused += 1
+                return entry[1]
+
+        function = factory()
+        with self._lock:
+            self._entries[key] = (generation, function)
+            self.created += 1
+        return function
+
+    def finish_build(self, generation: int) -> None:
+        """Drop functions that neither this build nor the one before it used."""
+        with self._lock:
+            stale = [key for key, (used, _) in self._entries.items() if used < generation - 1]
+            for key in stale:
+                del self._entries[key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class CompiledGraphCache:
+    """
+    Process-wide LRU cache of compiled graphs with TTL expiry.
+
+    Entries are keyed by (graph_id, definition hash), so a changed definition
+    never returns a stale graph even before the old entry is invalidated.
+
+    Each graph also keeps a NodeFunctionCache that outlives invalidation,
+    so the rebuild after an edit reuses every unchanged node. It is dropped
+    with the graph's last compiled entry on eviction, or on request.
+    """
+    def __init__(self, max_size: int = 128, ttl_seconds: float = 3600, clock: Callable[[], float] = time.monotonic):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: "OrderedDict[Tuple[int, str], Tuple[float, Any]]" = OrderedDict()
+        self._node_functions: Dict[int, NodeFunctionCache] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, graph_id: int, definition_hash: str) -> Optional[Any]:
+        """Return the cached compiled graph, or None if missing or expired."""
+        key = (graph_id, definition_hash)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            stored_at, compiled_graph = entry
+            if self.ttl_seconds and self._clock() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self._drop_unused_node_functions(graph_id)
+                self.evictions += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return compiled_graph
+
+    def put(self, graph_id: int, definition_hash: str, compiled_graph: Any) -> None:
+        """Store a compiled graph, evicting the least recently used entries if full."""
+        if self.max_size <= 0:
+            return
+
+        key = (graph_id, definition_hash)
+        with self._lock:
+            self._entries[key] = (self._clock(), compiled_graph)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                (evicted_graph_id, _), _ = self._entries.popitem(last=False)
+                self._drop_unused_node_functions(evicted_graph_id)
+                self.evictions += 1
+
+    def _drop_unused_node_functions(self, graph_id: int) -> None:
+        # Called with the lock held, once a graph has no compiled entries left
+        if not any(key[0] == graph_id for key in self._entries):
+            self._node_functions.pop(graph_id, None)
+
+    def node_functions(self, graph_id: int) -> NodeFunctionCache:
+        """Return the reusable node functions of a graph, creating the cache on first use."""
+        with self._lock:
+            cache = self._node_functions.get(graph_id)
+            if cache is None:
+                cache = self._node_functions[graph_id] = NodeFunctionCache()
+            return cache
+
+    def get_or_build(self, graph_id: int, definition: Dict[str, Any], builder: Callable[[Dict[str, Any]], Any], variant: str = "") -> Any:
+        """
+        Return the compiled graph for a definition, building and caching it on a miss.
+
+        Args:
+            graph_id: The ID of the stored graph
+            definition: The graph definition
+            builder: Function that compiles a definition into a runnable graph
+            variant: Name of the builder, for graphs compiled more than one way
+
+        Returns:
+            The compiled graph
+        """
+        definition_hash = hash_definition(definition)
+        if variant:
+            definition_hash = f"{definition_hash}:{variant}"
+        compiled_graph = self.get(graph_id, definition_hash)
+        if compiled_graph is not None:
+            logger.debug("Compiled graph cache hit", data={"graph_id": graph_id})
+            return compiled_graph
+
+        logger.debug("Compiled graph cache miss", data={"graph_id": graph_id})
+
+        # Build outside the lock so a slow build does not block other graphs
+        compiled_graph = builder(definition)
+        self.put(graph_id, definition_hash, compiled_graph)
+        return compiled_graph
+
+    def invalidate(self, graph_id: int, node_functions: bool = False) -> int:
+        """
+        Drop every cached entry for a graph.
+
+        Args:
+            graph_id: The ID of the graph
+            node_functions: Also drop the reusable node functions, for deleted graphs
+
+        Returns:
+            The number of entries removed
+        """
+        with self._lock:
+            keys = [key for key in self._entries if key[0] == graph_id]
+            for key in keys:
+                del self._entries[key]
+            if node_functions:
+                self._node_functions.pop(graph_id, None)
+
+        if keys:
+            logger.debug("Invalidated compiled graph cache", data={"graph_id": graph_id, "entries": len(keys)})
+        return len(keys)
+
+    def clear(self) -> None:
+        """Remove all entries and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._node_functions.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Return cache counters for monitoring."""
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+# Shared cache used by the API
+graph_cache = CompiledGraphCache(
+    max_size=settings.GRAPH_CACHE_MAX_SIZE,
+    ttl_seconds=settings.GRAPH_CACHE_TTL_SECONDS,
+)
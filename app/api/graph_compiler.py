@@ -0,0 +1,344 @@
+from typing import Any, Dict, List, Set
+
+from .expressions import compile_expression, ExpressionError
+from .reducers import JOIN_REDUCERS
+from . import logger
+
+# Version of the compiled representation stored on graphs
+IR_VERSION = 1
+
+# Node types the builder knows how to create
+NODE_TYPES = {"llm", "tool", "human", "transform", "join"}
+
+START = "START"
+END = "END"
+
+class GraphValidationError(ValueError):
+    """Raised when a graph definition cannot be compiled."""
+    def __init__(self, errors: List[str]):
+        self.errors = errors
+        super().__init__("; ".join(errors))
+
+def _normalize_nodes(definition: Dict[str, Any], errors: List[str]) -> List[Dict[str, Any]]:
+    nodes = definition.get("nodes")
+    if not isinstance(nodes, list) or not nodes:
+        errors.append("Definition must contain a non-empty 'nodes' list")
+        return []
+
+    normalized = []
+    seen: Set[str] = set()
+    for index, node in enumerate(nodes):
+        if not isinstance(node, dict):
+            errors.append(f"Node {index} must be an object")
+            continue
+
+        node_id = node.get("id")
+        node_type = node.get("type")
+        config = node.get("config") or {}
+
+        if not isinstance(node_id, str) or not node_id:
+            errors.append(f"Node {index} is missing an 'id'")
+            continue
+        if node_id in (START, END):
+            errors.append(f"Node ID '{node_id}' is reserved")
+            continue
+        if node_id in seen:
+            errors.append(f"Duplicate node ID '{node_id}'")
+            continue
+        seen.add(node_id)
+
+        # JSON lists and objects are unhashable, so check the type before any lookup
+        if not isinstance(node_type, str) or node_type not in NODE_TYPES:
+            errors.append(f"Node '{node_id}' has unknown type '{node_type}'")
+        if not isinstance(config, dict):
+            errors.append(f"Node '{node_id}' config must be an object")
+            config = {}
+
+        if node_type == "join":
+            _validate_join_config(node_id, config, errors)
+        _validate_policy_config(node_id, config, errors)
+
+        normalized.append({"id": node_id, "type": node_type, "config": config})
+
+    return normalized
+
+def _validate_policy_config(node_id: str, config: Dict[str, Any], errors: List[str]) -> None:
+    for key in ("timeout", "retry_backoff", "retry_max_backoff"):
+        value = config.get(key)
+        if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0):
+            errors.append(f"Node '{node_id}' '{key}' must be a non-negative number")
+    retries = config.get("retries")
+    if retries is not None and (isinstance(retries, bool) or not isinstance(retries, int) or retries < 0):
+        errors.append(f"Node '{node_id}' 'retries' must be a non-negative integer")
+    if "circuit_breaker" in config and not isinstance(config["circuit_breaker"], bool):
+        errors.append(f"Node '{node_id}' 'circuit_breaker' must be true or false")
+
+def _validate_join_config(node_id: str, config: Dict[str, Any], errors: List[str]) -> None:
+    wait_for = config.get("wait_for", [])
+    if not isinstance(wait_for, list):
+        errors.append(f"Join node '{node_id}' 'wait_for' must be a list")
+
+    reducers = config.get("reducers", {})
+    if not isinstance(reducers, dict):
+        errors.append(f"Join node '{node_id}' 'reducers' must be an object")
+        return
+
+    for output_key, reducer_config in reducers.items():
+        if not isinstance(reducer_config, dict):
+            errors.append(f"Join node '{node_id}' reducer '{output_key}' must be an object")
+            continue
+        reducer_type = reducer_config.get("type", "list")
+        if not isinstance(reducer_type, str) or reducer_type not in JOIN_REDUCERS:
+            errors.append(f"Join node '{node_id}' reducer '{output_key}' has unknown type '{reducer_type}'")
+        if not isinstance(reducer_config.get("input_keys", []), list):
+            errors.append(f"Join node '{node_id}' reducer '{output_key}' 'input_keys' must be a list")
+
+def _normalize_edges(definition: Dict[str, Any], node_ids: Set[str], errors: List[str]) -> List[Dict[str, Any]]:
+    edges = definition.get("edges")
+    if not isinstance(edges, list):
+        errors.append("Definition must contain an 'edges' list")
+        return []
+
+    sources = node_ids | {START}
+    targets = node_ids | {END}
+
+    normalized = []
+    for index, edge in enumerate(edges):
+        if not isinstance(edge, dict):
+            errors.append(f"Edge {index} must be an object")
+            continue
+
+        source = edge.get("source")
+        target = edge.get("target")
+        edge_type = edge.get("type", "default")
+        label = f"Edge {index} ({source} -> {target if edge_type != 'parallel' else edge.get('targets')})"
+
+        if not isinstance(source, str) or source not in sources:
+            errors.append(f"{label}: unknown source '{source}'")
+            continue
+
+        if edge_type == "conditional":
+            condition = edge.get("condition")
+            destinations = edge.get("destinations")
+            if not isinstance(condition, dict) or not condition:
+                errors.append(f"{label}: conditional edge is missing a 'condition'")
+                continue
+            if not isinstance(destinations, list) or not destinations:
+                errors.append(f"{label}: conditional edge is missing 'destinations'")
+                continue
+
+            unknown = [
+                destination for destination in destinations
+                if not isinstance(destination, str) or destination not in targets
+            ]
+            if unknown:
+                errors.append(f"{label}: unknown destinations {unknown}")
+                continue
+
+            if condition.get("type") == "function":
+                function = condition.get("function", "")
+                if not isinstance(function, str):
+                    errors.append(f"{label}: condition 'function' must be a string")
+                    continue
+                try:
+                    compile_expression(function)
+                except ExpressionError as e:
+                    errors.append(f"{label}: {str(e)}")
+                    continue
+
+            normalized.append({
+                "source": source,
+                "target": target,
+                "type": "conditional",
+                "condition": condition,
+                "destinations": destinations
+            })
+        elif edge_type == "parallel":
+            parallel_targets = edge.get("targets")
+            if not isinstance(parallel_targets, list) or not parallel_targets:
+                errors.append(f"{label}: parallel edge is missing 'targets'")
+                continue
+
+            unknown = [
+                parallel_target for parallel_target in parallel_targets
+                if not isinstance(parallel_target, str) or parallel_target not in targets
+            ]
+            if unknown:
+                errors.append(f"{label}: unknown targets {unknown}")
+                continue
+
+            normalized.append({"source": source, "type": "parallel", "targets": parallel_targets})
+        else:
+            if not isinstance(target, str) or target not in targets:
+                errors.append(f"{label}: unknown target '{target}'")
+                continue
+            normalized.append({"source": source, "target": target, "type": "default"})
+
+    return normalized
+
+def _successors(nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]]) -> Dict[str, List[str]]:
+    successors: Dict[str, List[str]] = {}
+    for edge in edges:
+        if edge["type"] == "conditional":
+            targets = edge["destinations"]
+        elif edge["type"] == "parallel":
+            targets = edge["targets"]
+        else:
+            targets = [edge["target"]]
+        successors.setdefault(edge["source"], []).extend(targets)
+
+    # Branches listed in a join's wait_for lead into the join
+    for node in nodes:
+        if node["type"] == "join":
+            for source in node["config"].get("wait_for", []):
+                successors.setdefault(source, []).append(node["id"])
+    return successors
+
+def _reachable(start: str, successors: Dict[str, List[str]]) -> Set[str]:
+    seen = {start}
+    stack = [start]
+    while stack:
+        for successor in successors.get(stack.pop(), []):
+            if successor not in seen:
+                seen.add(successor)
+                stack.append(successor)
+    return seen
+
+def _strongly_connected_components(node_ids: List[str], successors: Dict[str, List[str]]) -> List[List[str]]:
+    """Tarjan's algorithm, iterative. Components are returned in reverse topological order."""
+    index_of: Dict[str, int] = {}
+    lowlink: Dict[str, int] = {}
+    on_stack: Set[str] = set()
+    stack: List[str] = []
+    components: List[List[str]] = []
+    counter = 0
+
+    for root in node_ids:
+        if root in index_of:
+            continue
+        work = [(root, 0)]
+        while work:
+            node, child_index = work.pop()
+            if child_index == 0:
+                index_of[node] = lowlink[node] = counter
+                counter += 1
+                stack.append(node)
+                on_stack.add(node)
+
+            children = [child for child in successors.get(node, []) if child not in (START, END)]
+            for position in range(child_index, len(children)):
+                child = children[position]
+                if child not in index_of:
+                    work.append((node, position + 1))
+                    work.append((child, 0))
+                    break
+                if child in on_stack:
+                    lowlink[node] = min(lowlink[node], index_of[child])
+            else:
+                if lowlink[node] == index_of[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+
+    return components
+
+def compile_definition(definition: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Validate a graph definition and compile it into a normalized representation.
+
+    The result keeps the "nodes", "edges" and "state_type" keys of a
+    definition, with defaults filled in, so the builder can consume it
+    directly. It adds a topological analysis of the graph:
+        - "order": node IDs in topological order of their strongly
+          connected components
+        - "cycles": groups of nodes that form loops
+        - "entry_points": nodes reached directly from START
+
+    Args:
+        definition: The raw graph definition
+
+    Returns:
+        The compiled representation
+
+    Raises:
+        GraphValidationError: With every problem found in the definition
+    """
+    if not isinstance(definition, dict):
+        raise GraphValidationError(["Definition must be an object"])
+
+    errors: List[str] = []
+    nodes = _normalize_nodes(definition, errors)
+    node_ids = [node["id"] for node in nodes]
+    edges = _normalize_edges(definition, set(node_ids), errors)
+
+    if errors:
+        raise GraphValidationError(errors)
+
+    for node in nodes:
+        if node["type"] == "join":
+            unknown = [
+                source for source in node["config"].get("wait_for", [])
+                if not isinstance(source, str) or source not in node_ids
+            ]
+            if unknown:
+                errors.append(f"Join node '{node['id']}' waits for unknown nodes {unknown}")
+
+    if errors:
+        raise GraphValidationError(errors)
+
+    successors = _successors(nodes, edges)
+    entry_points = [node_id for node_id in successors.get(START, []) if node_id != END]
+    if START not in successors:
+        errors.append("Graph has no edge from START")
+
+    reachable = _reachable(START, successors)
+    unreachable = [node_id for node_id in node_ids if node_id not in reachable]
+    if unreachable:
+        errors.append(f"Nodes are unreachable from START: {unreachable}")
+
+    # Nodes without outgoing edges finish the run, just like an edge to END
+    terminals = {END} | {node_id for node_id in node_ids if not successors.get(node_id)}
+    predecessors: Dict[str, List[str]] = {}
+    for source, targets in successors.items():
+        for target in targets:
+            predecessors.setdefault(target, []).append(source)
+    can_finish: Set[str] = set()
+    for terminal in terminals:
+        can_finish |= _reachable(terminal, predecessors)
+    trapped = [node_id for node_id in node_ids if node_id in reachable and node_id not in can_finish]
+    if trapped:
+        errors.append(f"Nodes are in a cycle with no exit: {trapped}")
+
+    if errors:
+        raise GraphValidationError(errors)
+
+    components = _strongly_connected_components(node_ids, successors)
+    order = [node_id for component in reversed(components) for node_id in reversed(component)]
+    cycles = [
+        sorted(component) for component in reversed(components)
+        if len(component) > 1 or component[0] in successors.get(component[0], [])
+    ]
+
+    logger.debug("Compiled graph definition", data={
+        "node_count": len(nodes),
+        "edge_count": len(edges),
+        "cycle_count": len(cycles)
+    })
+
+    return {
+        "version": IR_VERSION,
+        "state_type": definition.get("state_type", "dict"),
+        "nodes": nodes,
+        "edges": edges,
+        "entry_points": entry_points,
+        "order": order,
+        "cycles": cycles
+    }
@@ -0,0 +1,81 @@
+import json
+from datetime import date, datetime
+from typing import Any, Optional
+
+from fastapi.responses import JSONResponse
+
+from .config import settings
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+BACKENDS = ("auto", "orjson", "stdlib")
+
+def _default(value: Any) -> Any:
+    """Fallback for values the encoder does not know, matching the old default=str behaviour."""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    return str(value)
+
+class JSONBackend:
+    """
+    Pluggable JSON encoder and decoder.
+
+    Uses orjson when it is installed and selected, and the standard library
+    otherwise. Values orjson rejects, such as integers wider than 64 bits,
+    are retried with the standard library so switching backends never
+    makes a payload unserializable.
+    """
+    def __init__(self, backend: str = "auto"):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown JSON backend '{backend}', expected one of {', '.join(BACKENDS)}")
+        if backend == "orjson" and orjson is None:
+            raise ValueError("JSON backend 'orjson' is selected but orjson is not installed")
+        self.use_orjson = orjson is not None and backend != "stdlib"
+        self.name = "orjson" if self.use_orjson else "stdlib"
+
+    def dumps_bytes(self, value: Any) -> bytes:
+        """Serialize a value to UTF-8 encoded JSON."""
+        if self.use_orjson:
+            try:
+                return orjson.dumps(value, default=_default, option=orjson.OPT_NON_STR_KEYS)
+            except TypeError:
+                pass
+        return json.dumps(value, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def dumps(self, value: Any) -> str:
+        """Serialize a value to a JSON string."""
+        return self.dumps_bytes(value).decode("utf-8")
+
+    def loads(self, data: Optional[Any]) -> Any:
+        """Parse JSON from str or bytes. None is returned unchanged."""
+        if data is None:
+            return None
+        if self.use_orjson:
+            return orjson.loads(data)
+        return json.loads(data)
+
+# Shared backend used for responses, logs and stored payloads
+json_backend = JSONBackend(settings.JSON_BACKEND)
+
+def dumps(value: Any) -> str:
+    """Serialize a value to a JSON string with the shared backend."""
+    return json_backend.dumps(value)
+
+def loads(data: Any) -> Any:
+    """Parse JSON with the shared backend."""
+    return json_backend.loads(data)
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered with the shared backend.
+
+    Returning one from a handler also skips response model validation, which
+    is what handlers serving rows we wrote ourselves want.
+    """
+    def render(self, content: Any) -> bytes:
+        return json_backend.dumps_bytes(content)
@@ -1,23 +1,48 @@
-from typing import Dict, List, Any, Optional, Callable, Union
+from typing import Dict, List, Any, Optional, Callable, Union, AsyncIterator, Annotated
 from langgraph.graph import StateGraph, START, END
-from langchain_openai import ChatOpenAI
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langchain_core.prompts import ChatPromptTemplate
+import functools
 import json
+import time
 
+from .client_registry import get_chat_model, get_search_tool
+from .expressions import compile_expression, ExpressionError
+from .reducers import JOIN_REDUCERS, MISSING, merge_state
+from .llm_cache import llm_cache, make_cache_key
+from .metrics import GRAPH_BUILD_DURATION, LLM_REQUESTS, instrument_node, instrument_router, record_llm_usage
+from .tracing import trace_node, trace_router
+from .rate_limiter import llm_rate_limiter, estimate_tokens
+from .resilience import apply_node_policy, call_policy
+from .graph_cache import NodeFunctionCache
 from . import logger
 
-def build_langgraph_from_definition(definition: Dict[str, Any]) -> StateGraph:
+def build_langgraph_from_definition(
+    definition: Dict[str, Any],
+    use_async: bool = False,
+    checkpointer: Optional[BaseCheckpointSaver] = None,
+    node_functions: Optional[NodeFunctionCache] = None,
+    graph_id: Optional[int] = None
+) -> StateGraph:
     """
     Build a LangGraph StateGraph from a graph definition.
     
     Args:
         definition: A dictionary containing the graph definition
+        use_async: Build coroutine nodes for I/O-bound node types. The
+            resulting graph must be run with arun_graph.
+        checkpointer: Save the state after every step with this saver. The
+            resulting graph must be run with a thread_id.
+        node_functions: Reuse node and router functions from earlier builds
+            of the same graph, creating only those whose config changed
+        graph_id: The stored graph being built, used to label its node metrics
         
     Returns:
         A compiled LangGraph StateGraph
     """
     try:
         logger.info("Building LangGraph from definition")
+        build_start = time.perf_counter()
         
         # Extract graph components from definition
         nodes = definition.get("nodes", [])
@@ -30,9 +55,30 @@ def build_langgraph_from_definition(definition: Dict[str, Any]) -> StateGraph:
             "state_type": state_type
         })
         
+        # Parallel branches write to the state in the same step, so their
+        # updates must be merged instead of replacing the state
+        has_parallel_branches = any(edge.get("type") == "parallel" for edge in edges) or \
+            any(node.get("type") == "join" for node in nodes)
+        if has_parallel_branches:
+            state_type = Annotated[dict, merge_state]
+        
         # Create a new StateGraph
         graph = StateGraph(state_type)
         
+        generation = node_functions.start_build() if node_functions is not None else 0
+        reused_before = node_functions.reused if node_functions is not None else 0
+        
+        def reuse(content, factory):
+            if node_functions is None:
+                return factory()
+            return node_functions.get_or_create(content, factory, generation)
+        
+        # Join nodes wait for all of their incoming branches at once
+        join_sources = {
+            node["id"]: list(node.get("config", {}).get("wait_for", []))
+            for node in nodes if node.get("type") == "join"
+        }
+        
         # Add nodes to the graph
         for node in nodes:
             node_id = node["id"]
@@ -44,8 +90,28 @@ def build_langgraph_from_definition(definition: Dict[str, Any]) -> StateGraph:
                 "node_type": node_type
             })
             
-            # Create the node function based on node type
-            node_function = create_node_function(node_type, node_config)
+            # Create the node function based on node type, with its retry
+            # policy (LLM and tool nodes time and break each provider call
+            # themselves), timed and counted per node and
+            # traced per run, unless an earlier build made it already
+            node_function = reuse(
+                {"node": node_id, "type": node_type, "config": node_config, "async": use_async},
+                lambda: instrument_node(
+                    trace_node(
+                        apply_node_policy(
+                            create_node_function(node_type, node_config, use_async=use_async),
+                            node_id,
+                            node_type,
+                            node_config
+                        ),
+                        node_id,
+                        node_type
+                    ),
+                    node_id,
+                    node_type,
+                    graph_id
+                )
+            )
             
             # Add the node to the graph
             graph.add_node(node_id, node_function)
@@ -53,7 +119,7 @@ def build_langgraph_from_definition(definition: Dict[str, Any]) -> StateGraph:
         # Add edges to the graph
         for edge in edges:
             source = edge["source"]
-            target = edge["target"]
+            target = edge.get("target")
             edge_type = edge.get("type", "default")
             
             if source == "START":
@@ -62,6 +128,12 @@ def build_langgraph_from_definition(definition: Dict[str, Any]) -> StateGraph:
             if target == "END":
                 target = END
             
+            if edge_type == "default" and target in join_sources:
+                # Fan-in edges are added together once all branches are known
+                if source not in join_sources[target]:
+                    join_sources[target].append(source)
+                continue
+            
             logger.debug(f"Adding edge to graph", data={
                 "source": source if source != START else "START",
                 "target": target if target != END else "END",
@@ -73,18 +145,42 @@ def build_langgraph_from_definition(definition: Dict[str, Any]) -> StateGraph:
                 condition = edge.get("condition", {})
                 destinations = edge.get("destinations", [])
                 
-                # Create the router function
-                router = create_router_function(condition, destinations)
+                # Create the router function, unless an earlier build made it already
+                router = reuse(
+                    {"router": edge["source"], "condition": condition, "destinations": destinations},
+                    lambda: instrument_router(
+                        trace_router(create_router_function(condition, destinations), edge["source"]),
+                        edge["source"],
+                        graph_id
+                    )
+                )
                 
                 # Add conditional edges
                 graph.add_conditional_edges(source, router, destinations)
+            elif edge_type == "parallel":
+                # Fan out: every target runs concurrently in the next step
+                for parallel_target in edge.get("targets", []):
+                    graph.add_edge(source, END if parallel_target == "END" else parallel_target)
             else:
                 # Add a regular edge
                 graph.add_edge(source, target)
         
+        # Fan in: each join node runs once, after all of its branches finish
+        for join_id, sources in join_sources.items():
+            if sources:
+                graph.add_edge(sources, join_id)
+        
+        if node_functions is not None:
+            node_functions.finish_build(generation)
+            logger.debug("Reused node functions from earlier builds", data={
+                "reused": node_functions.reused - reused_before,
+                "node_count": len(nodes)
+            })
+        
         # Compile the graph
         logger.info("Compiling LangGraph")
-        compiled_graph = graph.compile()
+        compiled_graph = graph.compile(checkpointer=checkpointer)
+        GRAPH_BUILD_DURATION.observe(time.perf_counter() - build_start)
         
         return compiled_graph
     
@@ -92,13 +188,20 @@ def build_langgraph_from_definition(definition: Dict[str, Any]) -> StateGraph:
         logger.error(f"Error building LangGraph: {str(e)}")
         raise ValueError(f"Failed to build LangGraph: {str(e)}")
 
-def create_node_function(node_type: str, config: Dict[str, Any]) -> Callable:
+def total_tokens(message) -> Optional[int]:
+    """Return the prompt and completion tokens reported on an LLM response, if any."""
+    usage = getattr(message, "usage_metadata", None)
+    return usage.get("total_tokens") if usage else None
+
+def create_node_function(node_type: str, config: Dict[str, Any], use_async: bool = False) -> Callable:
     """
     Create a node function based on the node type and configuration.
     
     Args:
         node_type: The type of node to create
         config: Configuration for the node
+        use_async: Return a coroutine function for LLM and tool nodes so they
+            can await their client instead of blocking a worker thread
         
     Returns:
         A callable function that can be used as a node in the graph
@@ -115,46 +218,148 @@ def create_node_function(node_type: str, config: Dict[str, Any]) -> Callable:
             "temperature": temperature
         })
         
-        llm = ChatOpenAI(model_name=model_name, temperature=temperature)
+        # Clients are shared across nodes and graphs with the same configuration
+        llm = get_chat_model(model_name, temperature)
+        
+        # Optional response cache keyed by model, temperature and rendered prompt
+        cache_enabled = config.get("cache", False)
+        cache_ttl = config.get("cache_ttl")
+        if cache_enabled and temperature != 0:
+            logger.warning(f"LLM response cache enabled on a non-deterministic node", data={
+                "model_name": model_name,
+                "temperature": temperature
+            })
+        
+        # Request counters by cache outcome, resolved once per node
+        requests_uncached = LLM_REQUESTS.labels(model_name, "disabled")
+        requests_hit = LLM_REQUESTS.labels(model_name, "hit")
+        requests_miss = LLM_REQUESTS.labels(model_name, "miss")
+        
+        # Process-wide rate and concurrency limits of the model, None when unlimited
+        limiter = llm_rate_limiter.for_model(model_name)
+        
+        # Timeout and circuit breaker of the provider call itself, applied
+        # once the limiter has admitted the call so queueing is not timed
+        policy = call_policy(node_type, config)
+        invoke = llm.invoke if policy is None else functools.partial(policy.call, llm.invoke)
+        ainvoke = llm.ainvoke if policy is None else functools.partial(policy.acall, llm.ainvoke)
+        
+        def call_llm(prompt_value):
+            if limiter is None:
+                message = invoke(prompt_value)
+            else:
+                with limiter.limit(estimate_tokens(prompt_value)) as permit:
+                    message = invoke(prompt_value)
+                    permit.settle(total_tokens(message))
+            record_llm_usage(model_name, message)
+            return message.content
+        
+        async def acall_llm(prompt_value):
+            if limiter is None:
+                message = await ainvoke(prompt_value)
+            else:
+                async with limiter.alimit(estimate_tokens(prompt_value)) as permit:
+                    message = await ainvoke(prompt_value)
+                    permit.settle(total_tokens(message))
+            record_llm_usage(model_name, message)
+            return message.content
+        
+        def invoke_llm(prompt_value):
+            if not cache_enabled:
+                requests_uncached.inc()
+                return call_llm(prompt_value)
+            
+            cache_key = make_cache_key(model_name, temperature, prompt_value)
+            content = llm_cache.get(cache_key)
+            if content is not None:
+                requests_hit.inc()
+                return content
+            requests_miss.inc()
+            content = call_llm(prompt_value)
+            llm_cache.set(cache_key, model_name, content, cache_ttl)
+            return content
+        
+        async def ainvoke_llm(prompt_value):
+            if not cache_enabled:
+                requests_uncached.inc()
+                return await acall_llm(prompt_value)
+            
+            cache_key = make_cache_key(model_name, temperature, prompt_value)
+            content = await llm_cache.aget(cache_key)
+            if content is not None:
+                requests_hit.inc()
+                return content
+            requests_miss.inc()
+            content = await acall_llm(prompt_value)
+            await llm_cache.aset(cache_key, model_name, content, cache_ttl)
+            return content
         
         # If there's a prompt template, use it
         if "prompt_template" in config:
             prompt = ChatPromptTemplate.from_template(config["prompt_template"])
-            chain = prompt | llm
             
-            def llm_node(state):
+            def render_prompt(state):
                 # Extract inputs for the prompt from the state
                 inputs = {}
                 for key in config.get("input_keys", []):
                     if key in state:
                         inputs[key] = state[key]
                 
-                logger.debug(f"Running LLM node with prompt template", data={
-                    "inputs": list(inputs.keys())
-                })
+                if logger.is_enabled("debug"):
+                    logger.debug(f"Running LLM node with prompt template", data={
+                        "inputs": list(inputs.keys())
+                    })
+                return prompt.invoke(inputs)
+            
+            if use_async:
+                async def llm_node(state):
+                    # Call the model without blocking the event loop
+                    content = await ainvoke_llm(render_prompt(state))
+                    output_key = config.get("output_key", "output")
+                    return {output_key: content}
                 
-                # Run the chain
-                result = chain.invoke(inputs)
+                return llm_node
+            
+            def llm_node(state):
+                # Call the model with the rendered prompt
+                content = invoke_llm(render_prompt(state))
                 
                 # Update the state with the result
                 output_key = config.get("output_key", "output")
-                return {output_key: result.content}
+                return {output_key: content}
             
             return llm_node
         else:
             # Simple LLM node without a prompt template
+            if use_async:
+                async def llm_node(state):
+                    input_key = config.get("input_key", "input")
+                    output_key = config.get("output_key", "output")
+                    
+                    if logger.is_enabled("debug"):
+                        logger.debug(f"Running simple LLM node", data={
+                            "input_key": input_key,
+                            "output_key": output_key
+                        })
+                    
+                    if input_key in state:
+                        return {output_key: await ainvoke_llm(state[input_key])}
+                    return {}
+                
+                return llm_node
+            
             def llm_node(state):
                 input_key = config.get("input_key", "input")
                 output_key = config.get("output_key", "output")
                 
-                logger.debug(f"Running simple LLM node", data={
-                    "input_key": input_key,
-                    "output_key": output_key
-                })
+                if logger.is_enabled("debug"):
+                    logger.debug(f"Running simple LLM node", data={
+                        "input_key": input_key,
+                        "output_key": output_key
+                    })
                 
                 if input_key in state:
-                    result = llm.invoke(state[input_key])
-                    return {output_key: result.content}
+                    return {output_key: invoke_llm(state[input_key])}
                 return {}
             
             return llm_node
@@ -166,21 +371,41 @@ def create_node_function(node_type: str, config: Dict[str, Any]) -> Callable:
         logger.debug(f"Creating tool node", data={"tool_type": tool_type})
         
         if tool_type == "search":
-            from langchain_community.tools.tavily_search import TavilySearchResults
+            search_tool = get_search_tool(config.get("max_results", 3))
+            policy = call_policy(node_type, config)
+            invoke = search_tool.invoke if policy is None else functools.partial(policy.call, search_tool.invoke)
+            ainvoke = search_tool.ainvoke if policy is None else functools.partial(policy.acall, search_tool.ainvoke)
             
-            search_tool = TavilySearchResults(max_results=config.get("max_results", 3))
+            if use_async:
+                async def search_node(state):
+                    input_key = config.get("input_key", "query")
+                    output_key = config.get("output_key", "search_results")
+                    
+                    if logger.is_enabled("debug"):
+                        logger.debug(f"Running search tool node", data={
+                            "input_key": input_key,
+                            "output_key": output_key
+                        })
+                    
+                    if input_key in state:
+                        result = await ainvoke(state[input_key])
+                        return {output_key: result}
+                    return {}
+                
+                return search_node
             
             def search_node(state):
                 input_key = config.get("input_key", "query")
                 output_key = config.get("output_key", "search_results")
                 
-                logger.debug(f"Running search tool node", data={
-                    "input_key": input_key,
-                    "output_key": output_key
-                })
+                if logger.is_enabled("debug"):
+                    logger.debug(f"Running search tool node", data={
+                        "input_key": input_key,
+                        "output_key": output_key
+                    })
                 
                 if input_key in state:
-                    result = search_tool.invoke(state[input_key])
+                    result = invoke(state[input_key])
                     return {output_key: result}
                 return {}
             
@@ -201,10 +426,11 @@ def create_node_function(node_type: str, config: Dict[str, Any]) -> Callable:
             input_key = config.get("input_key", "human_input")
             output_key = config.get("output_key", "human_response")
             
-            logger.debug(f"Running human node", data={
-                "input_key": input_key,
-                "output_key": output_key
-            })
+            if logger.is_enabled("debug"):
+                logger.debug(f"Running human node", data={
+                    "input_key": input_key,
+                    "output_key": output_key
+                })
             
             # In a real app, this would wait for user input
             # For now, just pass through any existing input
@@ -225,10 +451,11 @@ def create_node_function(node_type: str, config: Dict[str, Any]) -> Callable:
                 input_key = config.get("input_key", "input")
                 output_key = config.get("output_key", "output")
                 
-                logger.debug(f"Running extract_json transform node", data={
-                    "input_key": input_key,
-                    "output_key": output_key
-                })
+                if logger.is_enabled("debug"):
+                    logger.debug(f"Running extract_json transform node", data={
+                        "input_key": input_key,
+                        "output_key": output_key
+                    })
                 
                 if input_key in state:
                     try:
@@ -258,10 +485,11 @@ def create_node_function(node_type: str, config: Dict[str, Any]) -> Callable:
             input_key = config.get("input_key", "input")
             output_key = config.get("output_key", "output")
             
-            logger.debug(f"Running pass-through transform node", data={
-                "input_key": input_key,
-                "output_key": output_key
-            })
+            if logger.is_enabled("debug"):
+                logger.debug(f"Running pass-through transform node", data={
+                    "input_key": input_key,
+                    "output_key": output_key
+                })
             
             if input_key in state:
                 return {output_key: state[input_key]}
@@ -269,6 +497,24 @@ def create_node_function(node_type: str, config: Dict[str, Any]) -> Callable:
         
         return pass_through
     
+    elif node_type == "join":
+        # Create a join node that combines the outputs of parallel branches
+        reducers = config.get("reducers", {})
+        
+        logger.debug(f"Creating join node", data={"reducers": list(reducers.keys())})
+        
+        def join_node(state):
+            # Values are combined in the configured key order, not completion
+            # order, so the result is deterministic
+            result = {}
+            for output_key, reducer_config in reducers.items():
+                reducer = JOIN_REDUCERS[reducer_config.get("type", "list")]
+                values = [state.get(key, MISSING) for key in reducer_config.get("input_keys", [])]
+                result[output_key] = reducer(values, reducer_config)
+            return result
+        
+        return join_node
+    
     # Default empty node
     logger.warning(f"Unknown node type: {node_type}")
     return lambda state: {}
@@ -303,51 +549,51 @@ def create_router_function(condition: Dict[str, Any], destinations: List[str]) -
                 # Convert value to string for comparison
                 str_value = str(value)
                 
-                logger.debug(f"Routing based on key value", data={
-                    "key": key,
-                    "value": str_value
-                })
+                if logger.is_enabled("debug"):
+                    logger.debug(f"Routing based on key value", data={
+                        "key": key,
+                        "value": str_value
+                    })
                 
                 if str_value in value_map:
                     return value_map[str_value]
             
-            logger.debug(f"Using default route", data={"default": default})
+            if logger.is_enabled("debug"):
+                logger.debug(f"Using default route", data={"default": default})
             return default
         
         return key_value_router
     
     elif condition_type == "function":
-        # Route based on a custom function
-        # This is just a placeholder - in a real app, this would be more sophisticated
+        # Route based on a restricted routing expression
         function_code = condition.get("function", "")
         default = condition.get("default", destinations[0] if destinations else None)
         
-        # WARNING: Using eval is dangerous in production!
-        # This is just for demonstration purposes
         try:
-            # Create a function that takes a state and returns a destination
-            router_func = eval(f"lambda state: {function_code}")
-            
-            def function_router(state):
-                try:
-                    logger.debug(f"Routing based on custom function")
-                    result = router_func(state)
-                    
-                    if result in destinations:
-                        logger.debug(f"Custom function route", data={"route": result})
-                        return result
-                    
-                    logger.debug(f"Using default route", data={"default": default})
-                    return default
-                except Exception as e:
-                    logger.error(f"Error in custom routing function: {str(e)}")
-                    return default
-            
-            return function_router
-        except Exception as e:
+            # Compiled expressions are cached, so rebuilding the graph is cheap
+            router_func = compile_expression(function_code)
+        except ExpressionError as e:
             logger.error(f"Failed to create custom routing function: {str(e)}")
-            # If the function is invalid, return a default router
+            # If the expression is invalid, return a default router
             return lambda state: default
+        
+        def function_router(state):
+            try:
+                result = router_func(state)
+                
+                if result in destinations:
+                    if logger.is_enabled("debug"):
+                        logger.debug(f"Custom function route", data={"route": result})
+                    return result
+                
+                if logger.is_enabled("debug"):
+                    logger.debug(f"Using default route", data={"default": default})
+                return default
+            except Exception as e:
+                logger.error(f"Error in custom routing function: {str(e)}")
+                return default
+        
+        return function_router
     
     # Default router that always returns the first destination
     logger.warning(f"Unknown condition type: {condition_type}")
@@ -374,4 +620,100 @@ def run_graph(graph, inputs: Dict[str, Any]) -> Dict[str, Any]:
         return result
     except Exception as e:
         logger.error(f"Error running LangGraph: {str(e)}")
-        raise ValueError(f"Failed to run LangGraph: {str(e)}") 
\ No newline at end of file
+        raise ValueError(f"Failed to run LangGraph: {str(e)}") 
+
+async def arun_graph(graph, inputs: Optional[Dict[str, Any]], thread_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Run a compiled LangGraph with the given inputs on the event loop.
+    
+    Works with graphs built with or without use_async; synchronous nodes
+    are run in a worker thread by LangGraph.
+    
+    Args:
+        graph: A compiled LangGraph
+        inputs: Input values for the graph, or None to resume a
+            checkpointed run from its last saved step
+        thread_id: Checkpoint thread, required for checkpointed graphs
+        
+    Returns:
+        The final state after running the graph
+    """
+    try:
+        logger.info("Running LangGraph asynchronously", data={
+            "inputs": list(inputs.keys()) if inputs else [],
+            "thread_id": thread_id
+        })
+        
+        # Run the graph
+        if thread_id:
+            result = await graph.ainvoke(inputs, {"configurable": {"thread_id": thread_id}})
+        else:
+            result = await graph.ainvoke(inputs)
+        
+        logger.info("LangGraph execution completed successfully")
+        return result
+    except Exception as e:
+        logger.error(f"Error running LangGraph: {str(e)}")
+        raise ValueError(f"Failed to run LangGraph: {str(e)}")
+
+async def arun_graph_batch(graph, inputs_list: List[Dict[str, Any]], max_concurrency: int) -> List[Union[Dict[str, Any], Exception]]:
+    """
+    Run a compiled LangGraph over many inputs concurrently.
+    
+    Args:
+        graph: A compiled LangGraph
+        inputs_list: Input values for each run
+        max_concurrency: Maximum number of runs in flight at once
+        
+    Returns:
+        One entry per input, either the final state or the exception that
+        run raised. A failing input does not abort the rest of the batch.
+    """
+    logger.info("Running LangGraph batch", data={
+        "batch_size": len(inputs_list),
+        "max_concurrency": max_concurrency
+    })
+    
+    results = await graph.abatch(
+        inputs_list,
+        config={"max_concurrency": max_concurrency},
+        return_exceptions=True
+    )
+    
+    failed = sum(1 for result in results if isinstance(result, Exception))
+    logger.info("LangGraph batch completed", data={
+        "batch_size": len(inputs_list),
+        "failed": failed
+    })
+    return results
+
+async def astream_graph(graph, inputs: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Run a compiled LangGraph and yield events as the run progresses.
+    
+    Yields dictionaries with an "event" key:
+        - "token": an LLM token chunk, with the emitting "node" and "content"
+        - "node": a node finished, with its "node" name and state "update"
+        - "end": the run finished, with the final state as "result"
+    
+    Args:
+        graph: A compiled LangGraph
+        inputs: Input values for the graph
+    """
+    logger.info("Streaming LangGraph", data={"inputs": list(inputs.keys())})
+    
+    result = None
+    async for mode, chunk in graph.astream(inputs, stream_mode=["updates", "messages", "values"]):
+        if mode == "messages":
+            message, metadata = chunk
+            content = getattr(message, "content", "")
+            if content:
+                yield {"event": "token", "node": metadata.get("langgraph_node"), "content": content}
+        elif mode == "updates":
+            for node_id, update in chunk.items():
+                yield {"event": "node", "node": node_id, "update": update}
+        elif mode == "values":
+            result = chunk
+    
+    logger.info("LangGraph stream completed successfully")
+    yield {"event": "end", "result": result}
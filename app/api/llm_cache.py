@@ -0,0 +1,203 @@
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .cache import CacheBackend, MemoryCache, create_cache
+from .config import settings
+from .database import SessionLocal
+from .models import LLMCacheEntry
+from . import logger
+
+def prompt_text(prompt: Any) -> str:
+    """Render a prompt value to the exact text used in the cache key."""
+    if isinstance(prompt, str):
+        return prompt
+    if hasattr(prompt, "to_string"):
+        return prompt.to_string()
+    return json.dumps(prompt, sort_keys=True, default=str)
+
+def make_cache_key(model_name: str, temperature: float, prompt: Any) -> str:
+    """
+    Build the cache key for an LLM call.
+
+    Args:
+        model_name: The model name
+        temperature: The sampling temperature
+        prompt: The fully rendered prompt
+
+    Returns:
+        A hex digest identifying the call
+    """
+    payload = json.dumps([model_name, temperature, prompt_text(prompt)], separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class LLMResponseCache:
+    """
+    Two-tier cache of LLM response content.
+
+    Lookups check the cache backend first, an in-process LRU unless
+    CACHE_URL names a shared one, and then, if enabled, the
+    llm_response_cache table. Persistent hits are promoted into the first
+    tier. Failures in either tier are logged and treated as misses, so the
+    cache can never fail a node.
+    """
+    def __init__(
+        self,
+        max_size: int = 1024,
+        default_ttl: float = 86400,
+        persistent: bool = True,
+        session_factory: Callable = SessionLocal,
+        clock: Callable[[], float] = time.time,
+        backend: Optional[CacheBackend] = None,
+    ):
+        self.max_size = max_size
+        self.default_ttl = default_ttl
+        self.persistent = persistent
+        self._session_factory = session_factory
+        self._clock = clock
+        self.backend = backend if backend is not None else MemoryCache(max_size=max_size, clock=clock)
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+
+    def _expires_at(self, ttl: Optional[float]) -> Optional[float]:
+        ttl = self.default_ttl if ttl is None else ttl
+        return self._clock() + ttl if ttl else None
+
+    def _get_memory(self, key: str) -> Optional[str]:
+        content = self.backend.get(key)
+        if content is None:
+            return None
+        with self._lock:
+            self.memory_hits += 1
+        return content
+
+    def _set_memory(self, key: str, content: str, expires_at: Optional[float]) -> None:
+        ttl = None
+        if expires_at is not None:
+            ttl = expires_at - self._clock()
+            if ttl <= 0:
+                return
+        self.backend.set(key, content, ttl)
+
+    def _get_persistent(self, key: str) -> Optional[Tuple[Optional[float], str]]:
+        db = self._session_factory()
+        try:
+            entry = db.query(LLMCacheEntry).filter(LLMCacheEntry.key == key).first()
+            if entry is None:
+                return None
+            if entry.expires_at is not None and entry.expires_at <= datetime.utcfromtimestamp(self._clock()):
+                db.delete(entry)
+                db.commit()
+                return None
+            expires_at = (entry.expires_at - datetime(1970, 1, 1)).total_seconds() if entry.expires_at else None
+            return expires_at, entry.response
+        finally:
+            db.close()
+
+    def _set_persistent(self, key: str, model_name: str, content: str, expires_at: Optional[float]) -> None:
+        db = self._session_factory()
+        try:
+            db.merge(LLMCacheEntry(
+                key=key,
+                model_name=model_name,
+                response=content,
+                created_at=datetime.utcfromtimestamp(self._clock()),
+                expires_at=datetime.utcfromtimestamp(expires_at) if expires_at is not None else None
+            ))
+            db.commit()
+        finally:
+            db.close()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response content, or None on a miss."""
+        content = self._get_memory(key)
+        if content is not None:
+            return content
+
+        if self.persistent:
+            try:
+                entry = self._get_persistent(key)
+            except Exception as e:
+                logger.warning(f"LLM cache lookup failed: {str(e)}")
+                entry = None
+            if entry is not None:
+                expires_at, content = entry
+                self._set_memory(key, content, expires_at)
+                with self._lock:
+                    self.persistent_hits += 1
+                return content
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key: str, model_name: str, content: str, ttl: Optional[float] = None) -> None:
+        """
+        Store response content in every enabled tier.
+
+        Args:
+            key: The cache key from make_cache_key
+            model_name: The model name, stored for inspection
+            content: The response content
+            ttl: Seconds the entry stays valid, defaults to the cache TTL
+        """
+        expires_at = self._expires_at(ttl)
+        self._set_memory(key, content, expires_at)
+
+        if self.persistent:
+            try:
+                self._set_persistent(key, model_name, content, expires_at)
+            except Exception as e:
+                logger.warning(f"LLM cache store failed: {str(e)}")
+
+    async def aget(self, key: str) -> Optional[str]:
+        """Async get that only leaves the event loop for tiers doing I/O."""
+        if self.backend.blocking:
+            return await asyncio.to_thread(self.get, key)
+        content = self._get_memory(key)
+        if content is not None:
+            return content
+        if not self.persistent:
+            with self._lock:
+                self.misses += 1
+            return None
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, model_name: str, content: str, ttl: Optional[float] = None) -> None:
+        """Async set that writes tiers doing I/O in a worker thread."""
+        if self.persistent or self.backend.blocking:
+            await asyncio.to_thread(self.set, key, model_name, content, ttl)
+        else:
+            self.set(key, model_name, content, ttl)
+
+    def clear(self) -> None:
+        """Empty the first tier and reset the counters."""
+        self.backend.clear()
+        with self._lock:
+            self.memory_hits = 0
+            self.persistent_hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Return cache counters for monitoring."""
+        with self._lock:
+            return {
+                "size": len(self.backend) if isinstance(self.backend, MemoryCache) else None,
+                "memory_hits": self.memory_hits,
+                "persistent_hits": self.persistent_hits,
+                "misses": self.misses,
+            }
+
+# Shared cache used by LLM nodes with caching enabled
+llm_cache = LLMResponseCache(
+    max_size=settings.LLM_CACHE_MAX_SIZE,
+    default_ttl=settings.LLM_CACHE_TTL_SECONDS,
+    persistent=settings.LLM_CACHE_PERSISTENT,
+    backend=create_cache(settings.CACHE_URL, namespace="llm", max_size=settings.LLM_CACHE_MAX_SIZE),
+)
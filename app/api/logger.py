@@ -1,9 +1,14 @@
+import atexit
 import logging
-import json
+import logging.handlers
 import os
+import queue
 import sys
+import threading
 from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
+
+from . import json_backend
 
 # Configure logging format
 class JsonFormatter(logging.Formatter):
@@ -15,53 +20,143 @@ class JsonFormatter(logging.Formatter):
         Format the log record as JSON.
         """
         log_object = {
-            "timestamp": datetime.utcnow().isoformat(),
+            # Records are formatted on the listener thread, so use the time they were created
+            "timestamp": datetime.utcfromtimestamp(record.created).isoformat(),
             "level": record.levelname,
             "module": record.module,
             "message": record.getMessage(),
         }
-        
+
         # Add exception info if available
         if record.exc_info:
             log_object["exception"] = self.formatException(record.exc_info)
-        
+
         # Add extra fields
         if hasattr(record, "data") and record.data:
             log_object["data"] = record.data
-        
-        return json.dumps(log_object)
+
+        return json_backend.dumps(log_object)
+
+class BackgroundQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves formatting to the listener thread.
+
+    The stock QueueHandler formats records before enqueueing them, which
+    would keep JSON serialization on the calling thread. Here only the
+    message text is resolved, so the record no longer depends on its
+    arguments.
+    """
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+_listeners: List[logging.handlers.QueueListener] = []
+
+def background_handler(*handlers: logging.Handler) -> logging.Handler:
+    """
+    Create a handler that passes records to the given handlers on a background thread.
+
+    Args:
+        handlers: The handlers that format and write the records
+
+    Returns:
+        A QueueHandler feeding a started QueueListener
+    """
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    _listeners.append(listener)
+
+    handler = BackgroundQueueHandler(log_queue)
+    handler.listener = listener
+    return handler
+
+def stop_background_handler(handler: logging.Handler) -> None:
+    """Flush and stop the listener behind a handler from background_handler."""
+    listener = getattr(handler, "listener", None)
+    if listener in _listeners:
+        _listeners.remove(listener)
+        listener.stop()
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop every listener thread."""
+    while _listeners:
+        _listeners.pop().stop()
+
+atexit.register(shutdown_logging)
+
+_console_handler: Optional[logging.Handler] = None
+_loggers: Dict[str, logging.Logger] = {}
+_loggers_lock = threading.Lock()
+
+def _get_console_handler() -> logging.Handler:
+    global _console_handler
+    if _console_handler is None:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(JsonFormatter())
+        _console_handler = background_handler(handler)
+    return _console_handler
 
 def get_logger(name: str) -> logging.Logger:
     """
     Get a logger instance with the specified name.
-    
+
+    Loggers are configured once and cached, so repeated calls are a
+    dictionary lookup.
+
     Args:
         name: The name of the logger
-        
+
     Returns:
         A configured logger instance
     """
-    logger = logging.getLogger(name)
-    
-    # Set the log level based on environment
-    log_level = os.environ.get("LOG_LEVEL", "INFO").upper()
-    logger.setLevel(getattr(logging, log_level))
-    
-    # Create console handler if not already added
-    if not logger.handlers:
-        handler = logging.StreamHandler(sys.stdout)
-        handler.setFormatter(JsonFormatter())
-        logger.addHandler(handler)
-    
-    return logger
+    logger = _loggers.get(name)
+    if logger is not None:
+        return logger
+
+    with _loggers_lock:
+        if name in _loggers:
+            return _loggers[name]
+
+        logger = logging.getLogger(name)
+
+        # Set the log level based on environment
+        log_level = os.environ.get("LOG_LEVEL", "INFO").upper()
+        logger.setLevel(getattr(logging, log_level))
+
+        # Send records to the shared background console writer
+        if not logger.handlers:
+            logger.addHandler(_get_console_handler())
+
+        _loggers[name] = logger
+        return logger
 
 # Create a default logger for the API
 api_logger = get_logger("api")
 
+def is_enabled(level: str, module: str = "api") -> bool:
+    """
+    Check whether a message at the level would be logged.
+
+    Use it to skip building expensive data payloads:
+
+        if logger.is_enabled("debug"):
+            logger.debug("Node state", data={"keys": list(state.keys())})
+
+    Args:
+        level: The log level name
+        module: The module name
+
+    Returns:
+        True if the message would be emitted
+    """
+    return get_logger(module).isEnabledFor(logging.getLevelName(level.upper()))
+
 def log(level: str, message: str, module: str = "api", data: Optional[Dict[str, Any]] = None) -> None:
     """
     Log a message at the specified level.
-    
+
     Args:
         level: The log level (debug, info, warning, error, critical)
         message: The log message
@@ -69,12 +164,14 @@ def log(level: str, message: str, module: str = "api", data: Optional[Dict[str,
         data: Additional data to include in the log
     """
     logger = get_logger(module)
-    log_method = getattr(logger, level.lower())
-    
+    level_number = logging.getLevelName(level.upper())
+    if not logger.isEnabledFor(level_number):
+        return
+
     # Add extra data to the log record
-    extra = {"data": data} if data else {}
-    
-    log_method(message, extra=extra)
+    extra = {"data": data} if data else None
+
+    logger.log(level_number, message, extra=extra)
 
 def debug(message: str, module: str = "api", data: Optional[Dict[str, Any]] = None) -> None:
     """Log a debug message."""
@@ -94,4 +191,4 @@ def error(message: str, module: str = "api", data: Optional[Dict[str, Any]] = No
 
 def critical(message: str, module: str = "api", data: Optional[Dict[str, Any]] = None) -> None:
     """Log a critical message."""
-    log("critical", message, module, data) 
\ No newline at end of file
+    log("critical", message, module, data)
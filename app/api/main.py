@@ -1,8 +1,9 @@
-from fastapi import FastAPI, Depends, HTTPException, status, Request
+from fastapi import FastAPI, Depends, HTTPException, status, Request, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, PlainTextResponse
+from sqlalchemy import and_, or_
 from sqlalchemy.orm import Session
 from typing import List, Dict, Any, Optional
-import json
 import os
 import logging
 import time
@@ -12,32 +13,67 @@ from contextlib import asynccontextmanager
 
 # Import database and models (to be created)
 from .database import get_db, engine, Base
+from .database import SessionLocal, dispose_engines
 from .models import Graph, GraphNode, GraphEdge, GraphExecution
-from .schemas import GraphCreate, GraphResponse, GraphNodeCreate, GraphEdgeCreate, GraphRun, GraphUpdate
-from .langgraph_builder import build_langgraph_from_definition, run_graph
+from .models import GraphRun as GraphRunRecord
+from .models import ExecutionTrace
+from .schemas import GraphCreate, GraphResponse, GraphNodeCreate, GraphEdgeCreate, GraphRun, GraphUpdate, GraphRunResponse, GraphBatchRun, GraphListItem, GraphExecutionListItem
+from .schemas import ExecutionTraceResponse
+from .langgraph_builder import build_langgraph_from_definition, arun_graph, arun_graph_batch, astream_graph
+from .graph_cache import graph_cache, hash_definition
+from .graph_compiler import compile_definition, GraphValidationError
+from .migrations import run_migrations
+from .client_registry import client_registry
+from .run_queue import run_queue, RunQueueFull, interrupt_runs
+from .retention import retention_job
+from starlette.concurrency import run_in_threadpool
+from .config import settings
+from .json_backend import FastJSONResponse, json_backend
+from .llm_cache import llm_cache
+from . import metrics
+from .tracing import start_trace, expand_trace
+from .rate_limiter import llm_lane
+from .coalescing import run_coalescer, run_key
+from .checkpoints import checkpointer, run_thread_id
+from .cache import graph_definition_cache, run_status_cache
 from . import logger
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("api.log"),
-        logging.StreamHandler()
-    ]
-)
-logger = logging.getLogger("graphflow-api")
+# Configure logging, writing on a background thread so requests never wait on file I/O
+log_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+log_handlers = [logging.StreamHandler()]
+if settings.LOG_FILE:
+    log_handlers.append(logging.FileHandler(settings.LOG_FILE))
+for log_handler in log_handlers:
+    log_handler.setFormatter(log_formatter)
+logging.basicConfig(level=logging.INFO, handlers=[logger.background_handler(*log_handlers)])
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
+run_migrations(engine)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("Starting GraphFlow API")
+    if settings.RUN_RECONCILE_ON_STARTUP:
+        # Nothing runs yet, so queued or running rows were orphaned by a crash
+        await run_in_threadpool(interrupt_runs)
+    run_queue.start()
+    retention_job.start()
     yield
     logger.info("Shutting down GraphFlow API")
+    await retention_job.stop()
+    unfinished = await run_queue.stop()
+    if unfinished:
+        await run_in_threadpool(interrupt_runs, unfinished)
+    await client_registry.aclose()
+    await dispose_engines()
 
-app = FastAPI(title="GraphFlow API", description="API for managing and running LangGraph workflows", lifespan=lifespan)
+app = FastAPI(
+    title="GraphFlow API",
+    description="API for managing and running LangGraph workflows",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
+)
 
 # Add middleware for request logging
 @app.middleware("http")
@@ -51,6 +87,12 @@ async def log_requests(request: Request, call_next):
     process_time = time.time() - start_time
     logger.info(f"Request {request_id} completed: {response.status_code} in {process_time:.3f}s")
     
+    # Label by route template so IDs in the path do not create new series
+    route = request.scope.get("route")
+    metrics.HTTP_REQUEST_DURATION.labels(
+        request.method, route.path if route is not None else "unmatched", response.status_code
+    ).observe(process_time)
+    
     return response
 
 # Configure CORS
@@ -62,6 +104,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Metrics read from component state at scrape time
+metrics.registry.callback("graphflow_graph_cache_hits_total", "Compiled graph cache hits", "counter", lambda: graph_cache.hits)
+metrics.registry.callback("graphflow_graph_cache_misses_total", "Compiled graph cache misses", "counter", lambda: graph_cache.misses)
+metrics.registry.callback("graphflow_graph_cache_evictions_total", "Compiled graph cache evictions", "counter", lambda: graph_cache.evictions)
+metrics.registry.callback("graphflow_graph_cache_size", "Compiled graphs currently cached", "gauge", lambda: len(graph_cache))
+metrics.registry.callback("graphflow_llm_cache_memory_hits_total", "LLM response cache hits in the cache backend", "counter", lambda: llm_cache.memory_hits)
+metrics.registry.callback("graphflow_llm_cache_persistent_hits_total", "LLM response cache hits in the database", "counter", lambda: llm_cache.persistent_hits)
+metrics.registry.callback("graphflow_llm_cache_misses_total", "LLM response cache misses", "counter", lambda: llm_cache.misses)
+metrics.registry.callback("graphflow_run_queue_pending", "Background runs waiting for a worker", "gauge", lambda: run_queue.pending)
+metrics.registry.callback("graphflow_run_queue_active", "Background runs executing", "gauge", lambda: run_queue.active)
+
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    """Expose metrics in the Prometheus text format"""
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return PlainTextResponse(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
 @app.get("/")
 def read_root():
     logger.info("Root endpoint accessed")
@@ -78,17 +138,21 @@ def create_graph(graph: GraphCreate, db: Session = Depends(get_db)):
     """Create a new graph"""
     logger.info(f"Creating new graph: {graph.name}")
     
-    # Convert nodes and edges to JSON strings
-    nodes_json = json.dumps(graph.nodes)
-    edges_json = json.dumps(graph.edges)
+    # Validate and precompile the definition so runs never see an invalid graph
+    try:
+        compiled_definition = compile_definition(graph.definition)
+    except GraphValidationError as e:
+        logger.warning(f"Invalid definition for graph: {graph.name}")
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=e.errors)
     
     # Create a new graph
     db_graph = Graph(
         name=graph.name,
         description=graph.description,
         definition=graph.definition,
-        nodes=nodes_json,
-        edges=edges_json
+        compiled_definition=compiled_definition,
+        nodes=graph.nodes,
+        edges=graph.edges
     )
     
     # Save to database
@@ -110,30 +174,84 @@ def create_graph(graph: GraphCreate, db: Session = Depends(get_db)):
         "updated_at": db_graph.updated_at
     }
     
-    return graph_dict
+    return FastJSONResponse(graph_dict)
 
-@app.get("/api/graphs", response_model=List[GraphResponse])
-def get_graphs(db: Session = Depends(get_db)):
-    """Get all graphs"""
-    logger.info("Fetching all graphs")
-    graphs = db.query(Graph).all()
+# Fields that can be requested from the graph listing
+GRAPH_LIST_FIELDS = ["id", "name", "description", "definition", "nodes", "edges", "created_at", "updated_at"]
+GRAPH_SUMMARY_FIELDS = ["id", "name", "description", "created_at", "updated_at"]
+
+@app.get("/api/graphs", response_model=List[GraphListItem], response_model_exclude_unset=True)
+def get_graphs(
+    limit: Optional[int] = Query(default=None, ge=1, description="Maximum number of graphs to return"),
+    cursor: Optional[int] = Query(default=None, description="Return graphs after this ID, from the X-Next-Cursor header"),
+    name: Optional[str] = Query(default=None, description="Only graphs whose name contains this text"),
+    created_after: Optional[datetime] = Query(default=None),
+    created_before: Optional[datetime] = Query(default=None),
+    updated_after: Optional[datetime] = Query(default=None),
+    updated_before: Optional[datetime] = Query(default=None),
+    fields: Optional[str] = Query(default=None, description="Comma-separated fields to return"),
+    summary: bool = Query(default=False, description="Return only summary fields, skipping the graph contents"),
+    db: Session = Depends(get_db)
+):
+    """Get graphs ordered by ID, a page at a time when a limit or cursor is given"""
+    logger.info("Fetching graphs")
+    
+    if fields:
+        selected_fields = [field.strip() for field in fields.split(",") if field.strip()]
+        unknown = [field for field in selected_fields if field not in GRAPH_LIST_FIELDS]
+        if unknown:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=f"Unknown fields: {unknown}")
+        if "id" not in selected_fields:
+            selected_fields.insert(0, "id")
+    elif summary:
+        selected_fields = GRAPH_SUMMARY_FIELDS
+    else:
+        selected_fields = GRAPH_LIST_FIELDS
+    
+    # Without a limit or cursor every graph is returned, as before pagination
+    paginated = limit is not None or cursor is not None
+    if paginated:
+        limit = min(limit or settings.GRAPH_LIST_DEFAULT_LIMIT, settings.GRAPH_LIST_MAX_LIMIT)
+    
+    # Only load the selected columns so large JSON columns are skipped when not needed
+    query = db.query(*[getattr(Graph, field) for field in selected_fields])
+    if cursor is not None:
+        query = query.filter(Graph.id > cursor)
+    if name:
+        query = query.filter(Graph.name.icontains(name, autoescape=True))
+    if created_after:
+        query = query.filter(Graph.created_at >= created_after)
+    if created_before:
+        query = query.filter(Graph.created_at < created_before)
+    if updated_after:
+        query = query.filter(Graph.updated_at >= updated_after)
+    if updated_before:
+        query = query.filter(Graph.updated_at < updated_before)
+    
+    query = query.order_by(Graph.id)
+    if not paginated:
+        rows = query.all()
+    else:
+        # Fetch one extra row to know whether there is another page
+        rows = query.limit(limit + 1).all()
+    headers = {}
+    if paginated and len(rows) > limit:
+        rows = rows[:limit]
+        headers["X-Next-Cursor"] = str(rows[-1].id)
     
-    # Convert nodes and edges from JSON strings to Python objects
     result = []
-    for graph in graphs:
-        graph_dict = {
-            "id": graph.id,
-            "name": graph.name,
-            "description": graph.description,
-            "definition": graph.definition if graph.definition else {},
-            "nodes": json.loads(graph.nodes) if graph.nodes else [],
-            "edges": json.loads(graph.edges) if graph.edges else [],
-            "created_at": graph.created_at,
-            "updated_at": graph.updated_at
-        }
+    for row in rows:
+        graph_dict = dict(zip(selected_fields, row))
+        if "definition" in graph_dict:
+            graph_dict["definition"] = graph_dict["definition"] or {}
+        if "nodes" in graph_dict:
+            graph_dict["nodes"] = graph_dict["nodes"] or []
+        if "edges" in graph_dict:
+            graph_dict["edges"] = graph_dict["edges"] or []
         result.append(graph_dict)
     
-    return result
+    # Rows come straight from our own tables, so skip response model validation
+    return FastJSONResponse(result, headers=headers)
 
 @app.get("/api/graphs/{graph_id}", response_model=GraphResponse)
 def get_graph(graph_id: int, db: Session = Depends(get_db)):
@@ -145,19 +263,18 @@ def get_graph(graph_id: int, db: Session = Depends(get_db)):
         logger.warning(f"Graph with ID {graph_id} not found")
         raise HTTPException(status_code=404, detail="Graph not found")
     
-    # Convert nodes and edges from JSON strings to Python objects
     graph_dict = {
         "id": graph.id,
         "name": graph.name,
         "description": graph.description,
         "definition": graph.definition if graph.definition else {},
-        "nodes": json.loads(graph.nodes) if graph.nodes else [],
-        "edges": json.loads(graph.edges) if graph.edges else [],
+        "nodes": graph.nodes or [],
+        "edges": graph.edges or [],
         "created_at": graph.created_at,
         "updated_at": graph.updated_at
     }
     
-    return graph_dict
+    return FastJSONResponse(graph_dict)
 
 @app.put("/api/graphs/{graph_id}", response_model=GraphResponse)
 def update_graph(graph_id: int, graph: GraphUpdate, db: Session = Depends(get_db)):
@@ -175,17 +292,29 @@ def update_graph(graph_id: int, graph: GraphUpdate, db: Session = Depends(get_db
         db_graph.name = graph.name
     if graph.description is not None:
         db_graph.description = graph.description
+    if graph.definition is not None:
+        try:
+            db_graph.compiled_definition = compile_definition(graph.definition)
+        except GraphValidationError as e:
+            logger.warning(f"Invalid definition for graph with ID {graph_id}")
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=e.errors)
+        db_graph.definition = graph.definition
     
     # Update nodes and edges if provided
     if graph.nodes is not None:
-        db_graph.nodes = json.dumps(graph.nodes)
+        db_graph.nodes = graph.nodes
     if graph.edges is not None:
-        db_graph.edges = json.dumps(graph.edges)
+        db_graph.edges = graph.edges
     
     # Save to database
     db.commit()
     db.refresh(db_graph)
     
+    # Drop any compiled graph built from the previous version; its node
+    # functions are kept so the rebuild only recreates the edited nodes
+    graph_cache.invalidate(graph_id)
+    graph_definition_cache.delete(str(graph_id))
+    
     logger.info(f"Graph with ID {graph_id} updated successfully")
     
     # Convert back to response format
@@ -194,13 +323,13 @@ def update_graph(graph_id: int, graph: GraphUpdate, db: Session = Depends(get_db
         "name": db_graph.name,
         "description": db_graph.description,
         "definition": db_graph.definition if db_graph.definition else {},
-        "nodes": json.loads(db_graph.nodes) if db_graph.nodes else [],
-        "edges": json.loads(db_graph.edges) if db_graph.edges else [],
+        "nodes": db_graph.nodes or [],
+        "edges": db_graph.edges or [],
         "created_at": db_graph.created_at,
         "updated_at": db_graph.updated_at
     }
     
-    return graph_dict
+    return FastJSONResponse(graph_dict)
 
 @app.delete("/api/graphs/{graph_id}")
 def delete_graph(graph_id: int, db: Session = Depends(get_db)):
@@ -213,76 +342,637 @@ def delete_graph(graph_id: int, db: Session = Depends(get_db)):
         logger.warning("Graph not found for deletion", data={"graph_id": graph_id})
         raise HTTPException(status_code=404, detail=f"Graph with ID {graph_id} not found")
     
-    # Delete the graph
+    # Delete the graph, along with the checkpoints of its unfinished runs
+    run_ids = [run.id for run in db.query(GraphRunRecord.id).filter(GraphRunRecord.graph_id == graph_id)]
     db.delete(db_graph)
     db.commit()
+    graph_cache.invalidate(graph_id, node_functions=True)
+    graph_definition_cache.delete(str(graph_id))
+    for run_id in run_ids:
+        checkpointer.delete_thread(run_thread_id(run_id))
     
     logger.info("Graph deleted successfully", data={"graph_id": graph_id})
     return {"message": "Graph deleted successfully"}
 
+def build_async_graph(definition: Dict[str, Any], node_functions=None, graph_id: Optional[int] = None):
+    """Build a graph whose I/O-bound nodes run natively on the event loop."""
+    return build_langgraph_from_definition(definition, use_async=True, node_functions=node_functions, graph_id=graph_id)
+
+def build_checkpointed_graph(definition: Dict[str, Any], node_functions=None, graph_id: Optional[int] = None):
+    """Build an async graph that saves its state after every step, so failed runs can be resumed."""
+    return build_langgraph_from_definition(
+        definition, use_async=True, checkpointer=checkpointer, node_functions=node_functions, graph_id=graph_id
+    )
+
+def load_graph(graph_id: int, definition: Dict[str, Any], builder, variant: str = ""):
+    """Return the compiled graph from the cache, rebuilding only changed nodes on a miss."""
+    node_functions = graph_cache.node_functions(graph_id)
+    return graph_cache.get_or_build(
+        graph_id,
+        definition,
+        lambda changed_definition: builder(changed_definition, node_functions=node_functions, graph_id=graph_id),
+        variant=variant
+    )
+
+def get_run_graph(graph_id: int, definition: Dict[str, Any]):
+    """Return the compiled graph for a recorded run, checkpointed when checkpointing is enabled."""
+    if settings.CHECKPOINT_ENABLED:
+        return load_graph(graph_id, definition, build_checkpointed_graph, variant="checkpointed")
+    return load_graph(graph_id, definition, build_async_graph)
+
+def get_runtime_definition(graph: Graph) -> Dict[str, Any]:
+    """Return the precompiled definition, falling back to the raw one for graphs saved before precompilation."""
+    return graph.compiled_definition or graph.definition
+
+def load_graph_definition(graph_id: int, db: Session) -> Optional[Dict[str, Any]]:
+    """
+    Return the runtime definition of a graph, or None if the graph does not exist.
+
+    Definitions are kept in the shared cache, so with a shared backend a
+    graph loaded by one worker is not read from the database by the others.
+    Updating or deleting the graph removes the entry.
+    """
+    definition = graph_definition_cache.get(str(graph_id))
+    if definition is not None:
+        return definition
+    
+    row = db.query(Graph.compiled_definition, Graph.definition).filter(Graph.id == graph_id).first()
+    if row is None:
+        return None
+    definition = row.compiled_definition or row.definition
+    graph_definition_cache.set(str(graph_id), definition, ttl=settings.CACHE_TTL_SECONDS)
+    return definition
+
 @app.post("/api/graphs/{graph_id}/run", response_model=Dict[str, Any])
-def run_graph_endpoint(graph_id: int, run_input: GraphRun, db: Session = Depends(get_db)):
+async def run_graph_endpoint(graph_id: int, run_input: GraphRun, db: Session = Depends(get_db)):
     """Run a graph with the provided input"""
     logger.info("Running graph", data={"graph_id": graph_id})
     
     try:
-        # Get the graph
-        graph = db.query(Graph).filter(Graph.id == graph_id).first()
-        if not graph:
+        # Get the graph definition, off the event loop as the session blocks
+        definition = await run_in_threadpool(load_graph_definition, graph_id, db)
+        if definition is None:
             logger.warning("Graph not found for execution", data={"graph_id": graph_id})
             raise HTTPException(status_code=404, detail=f"Graph with ID {graph_id} not found")
         
-        # Build the graph
-        logger.debug("Building graph from definition", data={"graph_id": graph_id})
-        langgraph = build_langgraph_from_definition(graph.definition)
-        
-        # Run the graph
-        logger.debug("Executing graph", data={"graph_id": graph_id, "input": run_input.input})
-        result = run_graph(langgraph, {"input": run_input.input})
-        
-        logger.info("Graph execution completed successfully", data={"graph_id": graph_id})
+        definition_hash = hash_definition(definition)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error running graph: {str(e)}", data={"graph_id": graph_id, "error": str(e)})
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to run graph: {str(e)}"
+        )
+    
+    async def execute():
+        return await start_graph_run(graph_id, definition, definition_hash, run_input.input)
+    
+    if not settings.RUN_COALESCING_ENABLED:
+        return FastJSONResponse(await execute())
+    
+    # Identical concurrent requests share one execution and its response
+    response, coalesced = await run_coalescer.run(run_key(graph_id, definition_hash, run_input.input), execute)
+    return FastJSONResponse(response, headers={"X-Run-Coalesced": "true" if coalesced else "false"})
+
+async def start_graph_run(graph_id: int, definition: Dict[str, Any], definition_hash: str, input_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Build, record and execute a run started by the run endpoint, returning its response."""
+    try:
+        # Build the graph in a worker thread, reusing the compiled version
+        # when the definition is unchanged
+        logger.debug("Loading compiled graph", data={"graph_id": graph_id})
+        langgraph = await run_in_threadpool(get_run_graph, graph_id, definition)
         
-        # Save the execution result
-        execution_time = datetime.now()
+        # Checkpointed runs are recorded up front so a failure can be resumed by run ID
+        run_id = None
+        if settings.CHECKPOINT_ENABLED:
+            run_id = await run_in_threadpool(create_run_record, graph_id, input_data, definition_hash)
+    except Exception as e:
+        logger.error(f"Error running graph: {str(e)}", data={"graph_id": graph_id, "error": str(e)})
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to run graph: {str(e)}"
+        )
+    
+    # Run the graph on the event loop so the request does not hold a worker thread
+    if logger.is_enabled("debug"):
+        logger.debug("Executing graph", data={"graph_id": graph_id, "input": input_data})
+    return await execute_recorded_run(graph_id, langgraph, run_id, input_data, {"input": input_data})
+
+@app.post("/api/graphs/{graph_id}/run/batch", response_model=Dict[str, Any])
+async def run_graph_batch_endpoint(graph_id: int, batch: GraphBatchRun, db: Session = Depends(get_db)):
+    """Run a graph over many inputs and record all executions in one transaction"""
+    logger.info("Running graph batch", data={"graph_id": graph_id, "batch_size": len(batch.inputs)})
+    
+    if len(batch.inputs) > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Batch size {len(batch.inputs)} exceeds the limit of {settings.BATCH_MAX_ITEMS}"
+        )
+    
+    definition = await run_in_threadpool(load_graph_definition, graph_id, db)
+    if definition is None:
+        logger.warning("Graph not found for batch execution", data={"graph_id": graph_id})
+        raise HTTPException(status_code=404, detail=f"Graph with ID {graph_id} not found")
+    
+    max_concurrency = min(batch.max_concurrency or settings.BATCH_MAX_CONCURRENCY, settings.BATCH_MAX_CONCURRENCY)
+    
+    try:
+        # Build once for the whole batch
+        langgraph = await run_in_threadpool(load_graph, graph_id, definition, build_async_graph)
+    except Exception as e:
+        logger.error(f"Error building graph for batch: {str(e)}", data={"graph_id": graph_id})
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to run graph: {str(e)}"
+        )
+    
+    # Batch items queue for the LLM behind interactive runs
+    with llm_lane("batch"):
+        outcomes = await arun_graph_batch(
+            langgraph,
+            [{"input": run_input} for run_input in batch.inputs],
+            max_concurrency
+        )
+    
+    # Insert every successful execution in a single transaction
+    execution_time = datetime.now()
+    executions = await run_in_threadpool(save_batch_executions, db, graph_id, batch.inputs, outcomes, execution_time)
+    
+    results = []
+    for index, outcome in enumerate(outcomes):
+        if isinstance(outcome, Exception):
+            results.append({"index": index, "status": "error", "error": str(outcome)})
+        else:
+            results.append({
+                "index": index,
+                "status": "success",
+                "result": outcome,
+                "execution_id": executions[index]
+            })
+    
+    logger.info("Graph batch completed", data={
+        "graph_id": graph_id,
+        "succeeded": len(executions),
+        "failed": len(outcomes) - len(executions)
+    })
+    
+    return FastJSONResponse({
+        "results": results,
+        "succeeded": len(executions),
+        "failed": len(outcomes) - len(executions),
+        "execution_time": execution_time
+    })
+
+def save_batch_executions(db: Session, graph_id: int, inputs: List[Dict[str, Any]], outcomes: List[Any], execution_time: datetime) -> Dict[int, int]:
+    """Record the successful items of a batch in one transaction and return their execution IDs by index."""
+    executions = {}
+    for index, (run_input, outcome) in enumerate(zip(inputs, outcomes)):
+        if not isinstance(outcome, Exception):
+            executions[index] = GraphExecution(
+                graph_id=graph_id,
+                input_data=run_input,
+                output_data=outcome,
+                execution_time=execution_time
+            )
+    db.add_all(executions.values())
+    db.commit()
+    return {index: execution.id for index, execution in executions.items()}
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    """Format one Server-Sent Events message."""
+    return f"event: {event}\ndata: {json_backend.dumps(data)}\n\n"
+
+def save_execution(graph_id: int, input_data: Dict[str, Any], result: Dict[str, Any], trace=None) -> int:
+    """Record a finished execution, and its trace if any, in its own session and return its ID."""
+    db = SessionLocal()
+    try:
         db_execution = GraphExecution(
             graph_id=graph_id,
-            input_data=json.dumps(run_input.input),
-            output_data=json.dumps(result),
-            execution_time=execution_time
+            input_data=input_data,
+            output_data=result,
+            execution_time=datetime.now()
         )
+        if trace is not None:
+            db_execution.trace = ExecutionTrace(graph_id=graph_id, status="success", trace=trace.to_record())
         db.add(db_execution)
         db.commit()
-        
-        return {
-            "result": result,
-            "execution_id": db_execution.id,
-            "execution_time": execution_time
-        }
+        return db_execution.id
+    finally:
+        db.close()
+
+@app.post("/api/graphs/{graph_id}/run/stream")
+async def stream_graph_endpoint(graph_id: int, run_input: GraphRun, db: Session = Depends(get_db)):
+    """Run a graph and stream node results and LLM tokens as Server-Sent Events"""
+    logger.info("Streaming graph run", data={"graph_id": graph_id})
+    
+    definition = await run_in_threadpool(load_graph_definition, graph_id, db)
+    if definition is None:
+        logger.warning("Graph not found for streaming execution", data={"graph_id": graph_id})
+        raise HTTPException(status_code=404, detail=f"Graph with ID {graph_id} not found")
+    
+    try:
+        langgraph = await run_in_threadpool(load_graph, graph_id, definition, build_async_graph)
     except Exception as e:
-        logger.error(f"Error running graph: {str(e)}", data={"graph_id": graph_id, "error": str(e)})
+        logger.error(f"Error building graph for streaming: {str(e)}", data={"graph_id": graph_id})
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to run graph: {str(e)}"
         )
+    
+    async def event_stream():
+        try:
+            with start_trace() as trace:
+                async for event in astream_graph(langgraph, {"input": run_input.input}):
+                    event_name = event.pop("event")
+                    if event_name == "end":
+                        if trace is not None:
+                            trace.finish()
+                        event["execution_id"] = await run_in_threadpool(
+                            save_execution, graph_id, run_input.input, event["result"], trace
+                        )
+                    yield format_sse(event_name, event)
+        except Exception as e:
+            # Headers are already sent, so failures are reported in-band
+            logger.error(f"Error streaming graph: {str(e)}", data={"graph_id": graph_id})
+            yield format_sse("error", {"detail": f"Failed to run graph: {str(e)}"})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
-@app.get("/api/graphs/{graph_id}/executions", response_model=List[GraphExecution])
-def get_graph_executions(graph_id: int, db: Session = Depends(get_db)):
-    logger.info(f"Fetching executions for graph ID: {graph_id}")
-    executions = db.query(GraphExecution).filter(
-        GraphExecution.graph_id == graph_id
-    ).order_by(GraphExecution.execution_time.desc()).all()
+def create_run_record(graph_id: int, input_data: Dict[str, Any], definition_hash: str, status: str = "running") -> int:
+    """Record a run, by default one that starts executing now, and return its ID."""
+    db = SessionLocal()
+    try:
+        db_run = GraphRunRecord(
+            graph_id=graph_id,
+            input_data=input_data,
+            status=status,
+            definition_hash=definition_hash
+        )
+        db.add(db_run)
+        db.commit()
+        return db_run.id
+    finally:
+        db.close()
+
+def update_run_record(run_id: int, **fields):
+    """Update a background run record in its own session."""
+    db = SessionLocal()
+    try:
+        db.query(GraphRunRecord).filter(GraphRunRecord.id == run_id).update(fields)
+        db.commit()
+    finally:
+        db.close()
+    run_status_cache.delete(str(run_id))
+
+def save_run_result(run_id: Optional[int], graph_id: int, input_data: Dict[str, Any], result: Dict[str, Any], trace=None):
+    """
+    Mark a run as successful and record it in the execution history.
+
+    Returns:
+        The ID and time of the new execution
+    """
+    completed_at = datetime.now()
+    db = SessionLocal()
+    try:
+        if run_id is not None:
+            db.query(GraphRunRecord).filter(GraphRunRecord.id == run_id).update({
+                "status": "success",
+                "output_data": result,
+                "completed_at": completed_at
+            })
+            # A resumed run replaces the trace of its failed attempt
+            db.query(ExecutionTrace).filter(ExecutionTrace.run_id == run_id).delete(synchronize_session=False)
+        db_execution = GraphExecution(
+            graph_id=graph_id,
+            input_data=input_data,
+            output_data=result,
+            execution_time=completed_at
+        )
+        if trace is not None:
+            db_execution.trace = ExecutionTrace(run_id=run_id, graph_id=graph_id, status="success", trace=trace.to_record())
+        db.add(db_execution)
+        db.commit()
+        return db_execution.id, completed_at
+    finally:
+        db.close()
+        if run_id is not None:
+            run_status_cache.delete(str(run_id))
+
+def save_run_trace(run_id: int, graph_id: int, trace, status: str):
+    """Record the trace of a run that has no execution entry, replacing any earlier attempt's."""
+    db = SessionLocal()
+    try:
+        db.query(ExecutionTrace).filter(ExecutionTrace.run_id == run_id).delete(synchronize_session=False)
+        db.add(ExecutionTrace(run_id=run_id, graph_id=graph_id, status=status, trace=trace.to_record()))
+        db.commit()
+    finally:
+        db.close()
+
+async def execute_recorded_run(graph_id: int, langgraph, run_id: Optional[int], input_data: Dict[str, Any], inputs: Optional[Dict[str, Any]]):
+    """
+    Run a graph for a request and record the outcome.
+
+    With a run ID the graph is checkpointed under that run, so a failure
+    leaves the run resumable and the error response carries its ID in the
+    X-Run-ID header. Checkpoints are dropped once the run succeeds.
+
+    Args:
+        graph_id: The ID of the graph
+        langgraph: The compiled graph
+        run_id: The run record, or None for an unrecorded run
+        input_data: The run input, stored with the execution
+        inputs: The graph inputs, or None to resume from the last checkpoint
+
+    Returns:
+        The response body with the result, execution and run IDs
+    """
+    thread_id = run_thread_id(run_id) if run_id is not None else None
+    with start_trace() as trace:
+        try:
+            result = await arun_graph(langgraph, inputs, thread_id=thread_id)
+        except Exception as e:
+            error = e
+        else:
+            error = None
     
-    return executions
+    if error is not None:
+        logger.error(f"Error running graph: {str(error)}", data={"graph_id": graph_id, "run_id": run_id, "error": str(error)})
+        if trace is not None:
+            logger.warning("Graph run failed after visiting nodes", data={
+                "graph_id": graph_id,
+                "nodes_visited": trace.columns["node"]
+            })
+        headers = None
+        if run_id is not None:
+            await run_in_threadpool(
+                update_run_record,
+                run_id,
+                status="error",
+                error_message=str(error),
+                completed_at=datetime.now()
+            )
+            if trace is not None:
+                await run_in_threadpool(save_run_trace, run_id, graph_id, trace, "error")
+            headers = {"X-Run-ID": str(run_id)}
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to run graph: {str(error)}",
+            headers=headers
+        )
+    
+    logger.info("Graph execution completed successfully", data={"graph_id": graph_id, "run_id": run_id})
+    
+    # Save the execution result
+    execution_id, execution_time = await run_in_threadpool(save_run_result, run_id, graph_id, input_data, result, trace)
+    if thread_id is not None:
+        await checkpointer.adelete_thread(thread_id)
+    
+    response = {
+        "result": result,
+        "execution_id": execution_id,
+        "execution_time": execution_time
+    }
+    if run_id is not None:
+        response["run_id"] = run_id
+    return response
 
-if __name__ == "__main__":
-    import uvicorn
-    from .https_config import get_https_config
+async def execute_background_run(run_id: int, graph_id: int, definition: Dict[str, Any], input_data: Dict[str, Any]):
+    """Execute a queued run and record its progress in the graph_runs table."""
+    logger.info("Starting background run", data={"run_id": run_id, "graph_id": graph_id})
+    await run_in_threadpool(update_run_record, run_id, status="running", started_at=datetime.now())
+    
+    thread_id = run_thread_id(run_id) if settings.CHECKPOINT_ENABLED else None
+    with start_trace() as trace, llm_lane("batch"):
+        try:
+            langgraph = await run_in_threadpool(get_run_graph, graph_id, definition)
+            result = await arun_graph(langgraph, {"input": input_data}, thread_id=thread_id)
+        except Exception as e:
+            error = e
+        else:
+            error = None
+    
+    if error is not None:
+        logger.error(f"Background run failed: {str(error)}", data={"run_id": run_id, "graph_id": graph_id})
+        await run_in_threadpool(
+            update_run_record,
+            run_id,
+            status="error",
+            error_message=str(error),
+            completed_at=datetime.now()
+        )
+        if trace is not None:
+            await run_in_threadpool(save_run_trace, run_id, graph_id, trace, "error")
+        return
     
-    host = os.environ.get("HOST", "0.0.0.0")
-    port = int(os.environ.get("PORT", "8000"))
+    await run_in_threadpool(save_run_result, run_id, graph_id, input_data, result, trace)
+    if thread_id is not None:
+        await checkpointer.adelete_thread(thread_id)
+    logger.info("Background run completed successfully", data={"run_id": run_id, "graph_id": graph_id})
+
+@app.post("/api/graphs/{graph_id}/run/async", response_model=Dict[str, Any], status_code=status.HTTP_202_ACCEPTED)
+async def submit_graph_run(graph_id: int, run_input: GraphRun, db: Session = Depends(get_db)):
+    """Queue a graph run and return its run ID without waiting for the result"""
+    logger.info("Submitting background run", data={"graph_id": graph_id})
+    
+    definition = await run_in_threadpool(load_graph_definition, graph_id, db)
+    if definition is None:
+        logger.warning("Graph not found for background run", data={"graph_id": graph_id})
+        raise HTTPException(status_code=404, detail=f"Graph with ID {graph_id} not found")
+    
+    # Reject before creating a record so a full queue leaves no orphaned runs
+    if run_queue.is_full():
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Run queue is full, retry later",
+            headers={"Retry-After": "1"}
+        )
     
-    # Get HTTPS configuration if enabled
-    https_config = get_https_config()
+    run_id = await run_in_threadpool(
+        create_run_record, graph_id, run_input.input, hash_definition(definition), "queued"
+    )
+    try:
+        run_queue.submit(
+            lambda: execute_background_run(run_id, graph_id, definition, run_input.input),
+            run_id=run_id
+        )
+    except RunQueueFull as e:
+        await run_in_threadpool(
+            update_run_record,
+            run_id,
+            status="error",
+            error_message=str(e),
+            completed_at=datetime.now()
+        )
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Run queue is full, retry later",
+            headers={"Retry-After": "1"}
+        )
+    
+    logger.info("Background run queued", data={"graph_id": graph_id, "run_id": run_id})
+    return {"run_id": run_id, "status": "queued"}
+
+@app.get("/api/runs/{run_id}", response_model=GraphRunResponse)
+def get_run(run_id: int, db: Session = Depends(get_db)):
+    """Get the status and result of a background run"""
+    cached = run_status_cache.get(str(run_id))
+    if cached is not None:
+        return FastJSONResponse(cached)
+    
+    db_run = db.query(GraphRunRecord).filter(GraphRunRecord.id == run_id).first()
+    if not db_run:
+        raise HTTPException(status_code=404, detail=f"Run with ID {run_id} not found")
+    
+    # Finished runs only change when resumed, which removes the entry
+    response = GraphRunResponse.model_validate(db_run).model_dump(mode="json")
+    if db_run.status in ("success", "error"):
+        run_status_cache.set(str(run_id), response, ttl=settings.CACHE_TTL_SECONDS)
+    return FastJSONResponse(response)
+
+@app.post("/api/runs/{run_id}/resume", response_model=Dict[str, Any])
+async def resume_run(run_id: int, db: Session = Depends(get_db)):
+    """Resume a failed run from its last checkpoint, re-running only the nodes that did not complete"""
+    logger.info("Resuming run", data={"run_id": run_id})
+    
+    if not settings.CHECKPOINT_ENABLED:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Checkpointing is disabled, runs cannot be resumed")
+    
+    graph_id, definition, input_data = await run_in_threadpool(load_resumable_run, run_id, db)
+    langgraph = await run_in_threadpool(get_run_graph, graph_id, definition)
+    snapshot = await langgraph.aget_state({"configurable": {"thread_id": run_thread_id(run_id)}})
+    if not snapshot.next:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Run {run_id} has no checkpoint to resume from")
+    
+    logger.info("Resuming run from checkpoint", data={"run_id": run_id, "graph_id": graph_id, "next_nodes": list(snapshot.next)})
+    await run_in_threadpool(update_run_record, run_id, status="running", error_message=None, completed_at=None)
+    
+    return FastJSONResponse(await execute_recorded_run(graph_id, langgraph, run_id, input_data, None))
+
+def load_resumable_run(run_id: int, db: Session):
+    """
+    Check that a run can be resumed and load what resuming it needs.
+
+    Returns:
+        The graph ID, the runtime definition and the run input
+    """
+    db_run = db.query(GraphRunRecord).filter(GraphRunRecord.id == run_id).first()
+    if not db_run:
+        raise HTTPException(status_code=404, detail=f"Run with ID {run_id} not found")
+    if db_run.status != "error":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Only failed runs can be resumed, run {run_id} is {db_run.status}"
+        )
+    
+    graph = db.query(Graph).filter(Graph.id == db_run.graph_id).first()
+    if not graph:
+        raise HTTPException(status_code=404, detail=f"Graph with ID {db_run.graph_id} not found")
+    
+    # Checkpoints only line up with the nodes of the definition they were saved with
+    definition = get_runtime_definition(graph)
+    if db_run.definition_hash != hash_definition(definition):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Graph {graph.id} has changed since run {run_id}, start a new run instead"
+        )
+    return graph.id, definition, db_run.input_data or {}
+
+
+def trace_response(db_trace: ExecutionTrace) -> FastJSONResponse:
+    """Expand a stored trace into the API response."""
+    return FastJSONResponse({
+        "execution_id": db_trace.execution_id,
+        "run_id": db_trace.run_id,
+        "graph_id": db_trace.graph_id,
+        "status": db_trace.status,
+        **expand_trace(db_trace.trace)
+    })
+
+def find_trace(db: Session, column, value: int) -> Optional[ExecutionTrace]:
+    """Return the stored trace whose `column` equals `value`, if any."""
+    return db.query(ExecutionTrace).filter(column == value).first()
+
+@app.get("/api/executions/{execution_id}/trace", response_model=ExecutionTraceResponse)
+async def get_execution_trace(execution_id: int, db: Session = Depends(get_db)):
+    """Get the node-level trace of an execution"""
+    db_trace = await run_in_threadpool(find_trace, db, ExecutionTrace.execution_id, execution_id)
+    if not db_trace:
+        raise HTTPException(status_code=404, detail=f"Trace for execution {execution_id} not found")
+    
+    return trace_response(db_trace)
+
+@app.get("/api/runs/{run_id}/trace", response_model=ExecutionTraceResponse)
+async def get_run_trace(run_id: int, db: Session = Depends(get_db)):
+    """Get the node-level trace of a background run, including failed runs"""
+    db_trace = await run_in_threadpool(find_trace, db, ExecutionTrace.run_id, run_id)
+    if not db_trace:
+        raise HTTPException(status_code=404, detail=f"Trace for run {run_id} not found")
+    
+    return trace_response(db_trace)
+
+# Columns returned by the execution history, in response order
+EXECUTION_LIST_FIELDS = ["id", "graph_id", "input_data", "output_data", "execution_time"]
+EXECUTION_SUMMARY_FIELDS = ["id", "graph_id", "input_data", "execution_time"]
+
+def encode_execution_cursor(execution_time: datetime, execution_id: int) -> str:
+    """Build the history cursor pointing after the given execution."""
+    return f"{execution_time.isoformat()}_{execution_id}"
+
+def decode_execution_cursor(cursor: str):
+    """Split a history cursor into its execution time and ID, raising ValueError if malformed."""
+    execution_time, execution_id = cursor.rsplit("_", 1)
+    return datetime.fromisoformat(execution_time), int(execution_id)
+
+def query_graph_executions(db: Session, graph_id: int, selected_fields: List[str], limit: int, after=None) -> List[Any]:
+    """Fetch up to `limit` rows of a graph's history, newest first, after the decoded cursor if given."""
+    # Filter and order match the (graph_id, execution_time) index
+    query = db.query(*[getattr(GraphExecution, field) for field in selected_fields]).filter(
+        GraphExecution.graph_id == graph_id
+    )
+    if after is not None:
+        cursor_time, cursor_id = after
+        query = query.filter(or_(
+            GraphExecution.execution_time < cursor_time,
+            and_(GraphExecution.execution_time == cursor_time, GraphExecution.id < cursor_id)
+        ))
+    return query.order_by(GraphExecution.execution_time.desc(), GraphExecution.id.desc()).limit(limit).all()
+
+@app.get("/api/graphs/{graph_id}/executions", response_model=List[GraphExecutionListItem], response_model_exclude_unset=True)
+async def get_graph_executions(
+    graph_id: int,
+    limit: Optional[int] = Query(default=None, ge=1, description="Maximum number of executions to return"),
+    cursor: Optional[str] = Query(default=None, description="Return executions after this cursor, from the X-Next-Cursor header"),
+    summary: bool = Query(default=False, description="Leave out output_data"),
+    db: Session = Depends(get_db)
+):
+    """Get a page of a graph's executions, newest first"""
+    logger.info("Fetching executions", data={"graph_id": graph_id, "cursor": cursor})
+    
+    limit = min(limit or settings.EXECUTION_LIST_DEFAULT_LIMIT, settings.EXECUTION_LIST_MAX_LIMIT)
+    selected_fields = EXECUTION_SUMMARY_FIELDS if summary else EXECUTION_LIST_FIELDS
+    
+    after = None
+    if cursor:
+        try:
+            after = decode_execution_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    
+    # Fetch one extra row to know whether there is another page
+    rows = await run_in_threadpool(query_graph_executions, db, graph_id, selected_fields, limit + 1, after)
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        headers["X-Next-Cursor"] = encode_execution_cursor(rows[-1].execution_time, rows[-1].id)
+    
+    return FastJSONResponse([dict(zip(selected_fields, row)) for row in rows], headers=headers)
+
+if __name__ == "__main__":
+    from .server import main
     
-    logger.info(f"Starting server on {host}:{port}")
-    uvicorn.run("app.api.main:app", host=host, port=port, reload=True, **https_config) 
\ No newline at end of file
+    main(["--reload"])
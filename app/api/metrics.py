@@ -0,0 +1,351 @@
+"""
+In-process metrics exposed in the Prometheus text format.
+
+Metrics are kept in a registry of counters and histograms with labels.
+Label children are resolved once, typically when a graph is built, so
+recording a sample on the hot path is a clock read and a locked add.
+
+Labels taken from user-defined names (graphs, nodes, models, tools) are
+declared as bounded: their values are truncated, and once a metric has
+METRICS_MAX_SERIES label sets, new ones are reported as "other".
+"""
+import asyncio
+import functools
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .config import settings
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Limits applied to bounded label values
+MAX_LABEL_LENGTH = 64
+OVERFLOW_LABEL = "other"
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+class _CounterChild:
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+class _HistogramChild:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self._buckets = buckets
+        self._counts = [0] * len(buckets)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self._sum += value
+            self._count += 1
+            for index, bound in enumerate(self._buckets):
+                if value <= bound:
+                    self._counts[index] += 1
+                    break
+
+    def snapshot(self) -> Tuple[List[int], float, int]:
+        with self._lock:
+            return list(self._counts), self._sum, self._count
+
+class _Metric:
+    metric_type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), bounded: Sequence[str] = (), max_series: Optional[int] = None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.max_series = settings.METRICS_MAX_SERIES if max_series is None else max_series
+        self._bounded = frozenset(self.labelnames.index(label) for label in bounded)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: Any):
+        """Return the child for the given label values, creating it on first use."""
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                key = self._bound(key)
+                child = self._children.get(key)
+                if child is None:
+                    child = self._children[key] = self._new_child()
+        return child
+
+    def _bound(self, key: Tuple[str, ...]) -> Tuple[str, ...]:
+        # Called with the lock held for label sets without a child yet
+        if not self._bounded:
+            return key
+        key = tuple(value[:MAX_LABEL_LENGTH] if index in self._bounded else value for index, value in enumerate(key))
+        if key not in self._children and self.max_series and len(self._children) >= self.max_series:
+            key = tuple(OVERFLOW_LABEL if index in self._bounded else value for index, value in enumerate(key))
+        return key
+
+    def clear(self) -> None:
+        """Drop every child, used by tests."""
+        with self._lock:
+            self._children.clear()
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {_escape(self.documentation)}", f"# TYPE {self.name} {self.metric_type}"]
+
+class Counter(_Metric):
+    """Monotonically increasing value per label set."""
+    metric_type = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1) -> None:
+        """Increment the counter of a metric without labels."""
+        self.labels().inc(amount)
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        for values, child in sorted(self._children.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}")
+        return lines
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets per label set."""
+    metric_type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS, bounded: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames, bounded)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        """Record a value for a metric without labels."""
+        self.labels().observe(value)
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        for values, child in sorted(self._children.items()):
+            counts, total, count = child.snapshot()
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, values, ("le", _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+class CallbackMetric:
+    """Metric whose value is read from a function at scrape time."""
+    def __init__(self, name: str, documentation: str, metric_type: str, function: Callable[[], float]):
+        self.name = name
+        self.documentation = documentation
+        self.metric_type = metric_type
+        self.function = function
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {_escape(self.documentation)}",
+            f"# TYPE {self.name} {self.metric_type}",
+            f"{self.name} {_format_value(self.function())}",
+        ]
+
+class MetricsRegistry:
+    """Collection of metrics rendered together on /metrics."""
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = (), bounded: Sequence[str] = ()) -> Counter:
+        """Create or return a counter; `bounded` names the labels holding user-defined values."""
+        return self._register(Counter(name, documentation, labelnames, bounded))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS, bounded: Sequence[str] = ()) -> Histogram:
+        """Create or return a histogram; `bounded` names the labels holding user-defined values."""
+        return self._register(Histogram(name, documentation, labelnames, buckets, bounded))
+
+    def callback(self, name: str, documentation: str, metric_type: str, function: Callable[[], float]) -> CallbackMetric:
+        """Register a gauge or counter read from a function when metrics are rendered."""
+        return self._register(CallbackMetric(name, documentation, metric_type, function))
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        lines: List[str] = []
+        for name in sorted(self._metrics):
+            try:
+                lines.extend(self._metrics[name].render())
+            except Exception:
+                # A failing callback must not break the whole scrape
+                continue
+        return "\n".join(lines) + "\n"
+
+# Shared registry
+registry = MetricsRegistry()
+
+NODE_DURATION = registry.histogram(
+    "graphflow_node_duration_seconds", "Time spent in a graph node", ("graph", "node", "node_type"),
+    bounded=("graph", "node")
+)
+NODE_INVOCATIONS = registry.counter(
+    "graphflow_node_invocations_total", "Graph node invocations", ("graph", "node", "node_type"),
+    bounded=("graph", "node")
+)
+NODE_ERRORS = registry.counter(
+    "graphflow_node_errors_total", "Graph node invocations that raised", ("graph", "node", "node_type"),
+    bounded=("graph", "node")
+)
+ROUTER_DURATION = registry.histogram(
+    "graphflow_router_duration_seconds", "Time spent deciding a conditional edge", ("graph", "source"),
+    bounded=("graph", "source")
+)
+ROUTE_DECISIONS = registry.counter(
+    "graphflow_route_decisions_total", "Conditional edge decisions by destination", ("graph", "source", "destination"),
+    bounded=("graph", "source", "destination")
+)
+LLM_REQUESTS = registry.counter(
+    "graphflow_llm_requests_total", "LLM node calls by response cache outcome", ("model", "cache"),
+    bounded=("model",)
+)
+LLM_TOKENS = registry.counter(
+    "graphflow_llm_tokens_total", "LLM tokens reported by the provider", ("model", "kind"),
+    bounded=("model",)
+)
+GRAPH_BUILD_DURATION = registry.histogram(
+    "graphflow_graph_build_duration_seconds", "Time spent building and compiling a graph"
+)
+HTTP_REQUEST_DURATION = registry.histogram(
+    "graphflow_http_request_duration_seconds", "HTTP request latency", ("method", "route", "status")
+)
+
+def record_llm_usage(model_name: str, message: Any) -> None:
+    """Count the token usage reported on an LLM response message, if any."""
+    usage = getattr(message, "usage_metadata", None)
+    if not usage:
+        return
+    input_tokens = usage.get("input_tokens", 0)
+    output_tokens = usage.get("output_tokens", 0)
+    if input_tokens:
+        LLM_TOKENS.labels(model_name, "prompt").inc(input_tokens)
+    if output_tokens:
+        LLM_TOKENS.labels(model_name, "completion").inc(output_tokens)
+
+def instrument_node(function: Callable, node_id: str, node_type: str, graph_id: Optional[int] = None) -> Callable:
+    """
+    Wrap a node function to record its latency, invocations and errors.
+
+    Args:
+        function: The node function from create_node_function
+        node_id: The node ID, used as the "node" label
+        node_type: The node type
+        graph_id: The stored graph, used as the "graph" label so nodes of
+            different graphs with the same ID are kept apart
+
+    Returns:
+        A function with the same signature and sync/async kind
+    """
+    if not settings.METRICS_ENABLED:
+        return function
+
+    graph = "" if graph_id is None else graph_id
+    duration = NODE_DURATION.labels(graph, node_id, node_type)
+    invocations = NODE_INVOCATIONS.labels(graph, node_id, node_type)
+    errors = NODE_ERRORS.labels(graph, node_id, node_type)
+
+    if asyncio.iscoroutinefunction(function):
+        @functools.wraps(function)
+        async def async_node(state):
+            invocations.inc()
+            start = time.perf_counter()
+            try:
+                return await function(state)
+            except BaseException:
+                errors.inc()
+                raise
+            finally:
+                duration.observe(time.perf_counter() - start)
+        return async_node
+
+    @functools.wraps(function)
+    def node(state):
+        invocations.inc()
+        start = time.perf_counter()
+        try:
+            return function(state)
+        except BaseException:
+            errors.inc()
+            raise
+        finally:
+            duration.observe(time.perf_counter() - start)
+    return node
+
+def instrument_router(function: Callable, source: str, graph_id: Optional[int] = None) -> Callable:
+    """
+    Wrap a router function to record its latency and the destinations it picks.
+
+    Args:
+        function: The router from create_router_function
+        source: The node the conditional edge leaves from
+        graph_id: The stored graph, used as the "graph" label
+
+    Returns:
+        The wrapped router
+    """
+    if not settings.METRICS_ENABLED:
+        return function
+
+    graph = "" if graph_id is None else graph_id
+    duration = ROUTER_DURATION.labels(graph, source)
+    decisions: Dict[Any, Any] = {}
+
+    @functools.wraps(function)
+    def router(state):
+        start = time.perf_counter()
+        try:
+            destination = function(state)
+        finally:
+            duration.observe(time.perf_counter() - start)
+        counter = decisions.get(destination)
+        if counter is None:
+            counter = decisions.setdefault(destination, ROUTE_DECISIONS.labels(graph, source, destination))
+        counter.inc()
+        return destination
+    return router
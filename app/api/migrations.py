@@ -0,0 +1,138 @@
+from typing import List
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+from .database import Base
+from . import logger
+
+# Columns that used to hold JSON encoded as text
+JSON_TEXT_COLUMNS = [
+    ("graphs", "nodes"),
+    ("graphs", "edges"),
+    ("graph_executions", "input_data"),
+    ("graph_executions", "output_data"),
+]
+
+def add_missing_columns(engine: Engine) -> List[str]:
+    """
+    Add nullable model columns that are missing from existing tables.
+
+    create_all only creates missing tables, so columns added to a model
+    after its table was created need an ALTER TABLE.
+
+    Args:
+        engine: The database engine
+
+    Returns:
+        The "table.column" names that were added
+    """
+    inspector = inspect(engine)
+    added = []
+
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                if not column.nullable:
+                    logger.warning("Cannot add non-nullable column automatically", data={
+                        "table": table.name,
+                        "column": column.name
+                    })
+                    continue
+
+                column_type = column.type.compile(dialect=engine.dialect)
+                connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+                added.append(f"{table.name}.{column.name}")
+
+    if added:
+        logger.info("Added missing columns", data={"columns": added})
+    return added
+
+def add_missing_indexes(engine: Engine) -> List[str]:
+    """
+    Create model indexes that are missing from existing tables.
+
+    Args:
+        engine: The database engine
+
+    Returns:
+        The names of the indexes that were created
+    """
+    inspector = inspect(engine)
+    added = []
+
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in existing:
+                continue
+            index.create(bind=engine)
+            added.append(index.name)
+
+    if added:
+        logger.info("Created missing indexes", data={"indexes": added})
+    return added
+
+def convert_json_columns(engine: Engine) -> List[str]:
+    """
+    Convert JSON text columns to native JSON storage.
+
+    On PostgreSQL the columns are altered to JSONB, parsing the existing
+    rows in place. On MySQL they become JSON columns. SQLite stores JSON as
+    text, and the rows already hold json.dumps output, so they are read
+    as-is without conversion.
+
+    Args:
+        engine: The database engine
+
+    Returns:
+        The "table.column" names that were converted
+    """
+    dialect = engine.dialect.name
+    if dialect not in ("postgresql", "mysql", "mariadb"):
+        return []
+
+    inspector = inspect(engine)
+    converted = []
+
+    with engine.begin() as connection:
+        for table_name, column_name in JSON_TEXT_COLUMNS:
+            if not inspector.has_table(table_name):
+                continue
+
+            columns = {column["name"]: column for column in inspector.get_columns(table_name)}
+            column = columns.get(column_name)
+            if column is None:
+                continue
+
+            current_type = column["type"].compile(dialect=engine.dialect).upper()
+            if "JSON" in current_type:
+                continue
+
+            if dialect == "postgresql":
+                connection.execute(text(
+                    f'ALTER TABLE {table_name} ALTER COLUMN {column_name} TYPE JSONB USING {column_name}::jsonb'
+                ))
+            else:
+                null_clause = "NULL" if column["nullable"] else "NOT NULL"
+                connection.execute(text(f'ALTER TABLE {table_name} MODIFY {column_name} JSON {null_clause}'))
+            converted.append(f"{table_name}.{column_name}")
+
+    if converted:
+        logger.info("Converted columns to native JSON", data={"columns": converted})
+    return converted
+
+def run_migrations(engine: Engine) -> None:
+    """Bring an existing database schema up to date with the models."""
+    add_missing_columns(engine)
+    add_missing_indexes(engine)
+    convert_json_columns(engine)
@@ -1,9 +1,13 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, JSON
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, JSON, Index, LargeBinary
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from datetime import datetime
 from .database import Base
 
+# Native JSON storage, JSONB on PostgreSQL so payloads can be indexed and queried
+JSONType = JSON().with_variant(JSONB(), "postgresql")
+
 class Graph(Base):
     """Model for storing graph definitions"""
     __tablename__ = "graphs"
@@ -12,8 +16,9 @@ class Graph(Base):
     name = Column(String(255), nullable=False)
     description = Column(Text, nullable=True)
     definition = Column(JSON, nullable=True)  # JSON definition of the graph
-    nodes = Column(Text, nullable=False)  # JSON string of nodes
-    edges = Column(Text, nullable=False)  # JSON string of edges
+    compiled_definition = Column(JSON, nullable=True)  # Validated, normalized definition used at run time
+    nodes = Column(JSONType, nullable=False)  # List of node definitions
+    edges = Column(JSONType, nullable=False)  # List of edge definitions
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -62,20 +67,96 @@ class GraphRun(Base):
     output_data = Column(JSON, nullable=True)  # Output data from the run
     status = Column(String, index=True)  # Status of the run (e.g., "success", "error")
     error_message = Column(Text, nullable=True)  # Error message if the run failed
+    definition_hash = Column(String(64), nullable=True)  # Hash of the definition the run was checkpointed with
     started_at = Column(DateTime(timezone=True), server_default=func.now())
     completed_at = Column(DateTime(timezone=True), nullable=True)
 
     # Relationships
     graph = relationship("Graph", back_populates="runs")
+    trace = relationship("ExecutionTrace", back_populates="run", uselist=False, cascade="all, delete-orphan")
 
 class GraphExecution(Base):
     __tablename__ = "graph_executions"
     
     id = Column(Integer, primary_key=True, index=True)
     graph_id = Column(Integer, ForeignKey("graphs.id"), nullable=False)
-    input_data = Column(Text, nullable=False)  # JSON string of input data
-    output_data = Column(Text, nullable=False)  # JSON string of output data
+    input_data = Column(JSONType, nullable=False)  # Input data of the execution
+    output_data = Column(JSONType, nullable=False)  # Output data of the execution
     execution_time = Column(DateTime, default=datetime.utcnow)
     
     # Relationship with graph
-    graph = relationship("Graph", back_populates="executions") 
\ No newline at end of file
+    graph = relationship("Graph", back_populates="executions")
+    trace = relationship("ExecutionTrace", back_populates="execution", uselist=False, cascade="all, delete-orphan")
+
+    __table_args__ = (
+        # Serves the per-graph history listing and retention scans
+        Index("ix_graph_executions_graph_id_execution_time", "graph_id", "execution_time"),
+        # SQLite would otherwise reuse the IDs of pruned executions, which
+        # then collide with their archived copies
+        {"sqlite_autoincrement": True},
+    )
+
+class GraphExecutionArchive(Base):
+    """Model for executions moved out of graph_executions by the retention job"""
+    __tablename__ = "graph_execution_archive"
+
+    id = Column(Integer, primary_key=True)  # ID of the original execution
+    graph_id = Column(Integer, index=True)  # No foreign key, archived rows outlive their graph
+    input_data = Column(JSONType, nullable=True)
+    output_data = Column(JSONType, nullable=True)
+    execution_time = Column(DateTime, index=True)
+    archived_at = Column(DateTime, default=datetime.utcnow)
+
+class LLMCacheEntry(Base):
+    """Model for storing cached LLM responses"""
+    __tablename__ = "llm_response_cache"
+
+    key = Column(String(64), primary_key=True)  # Hash of model, temperature and prompt
+    model_name = Column(String(255), index=True)
+    response = Column(Text, nullable=False)  # Response content
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=True, index=True)  # Null means the entry never expires
+
+class ExecutionTrace(Base):
+    """Model for storing the node-level trace of a run"""
+    __tablename__ = "execution_traces"
+
+    id = Column(Integer, primary_key=True, index=True)
+    execution_id = Column(Integer, ForeignKey("graph_executions.id", ondelete="CASCADE"), nullable=True, unique=True)
+    run_id = Column(Integer, ForeignKey("graph_runs.id", ondelete="CASCADE"), nullable=True, unique=True)
+    graph_id = Column(Integer, index=True)
+    status = Column(String, nullable=False)  # "success" or "error"
+    trace = Column(JSONType, nullable=False)  # Column-wise spans and routing decisions
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    # Relationships
+    execution = relationship("GraphExecution", back_populates="trace")
+    run = relationship("GraphRun", back_populates="trace")
+
+class GraphCheckpoint(Base):
+    """Model for storing LangGraph checkpoints of resumable runs"""
+    __tablename__ = "graph_checkpoints"
+
+    thread_id = Column(String(64), primary_key=True)  # "run-<run id>"
+    checkpoint_ns = Column(String(255), primary_key=True, default="")
+    checkpoint_id = Column(String(64), primary_key=True)  # Time-ordered, so the newest sorts last
+    parent_checkpoint_id = Column(String(64), nullable=True)
+    checkpoint_type = Column(String(32), nullable=False)  # Serializer type tag
+    checkpoint = Column(LargeBinary, nullable=False)  # Serialized checkpoint including channel values
+    metadata_type = Column(String(32), nullable=False)
+    checkpoint_metadata = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class GraphCheckpointWrite(Base):
+    """Model for storing pending writes of tasks that finished after a checkpoint"""
+    __tablename__ = "graph_checkpoint_writes"
+
+    thread_id = Column(String(64), primary_key=True)
+    checkpoint_ns = Column(String(255), primary_key=True, default="")
+    checkpoint_id = Column(String(64), primary_key=True)
+    task_id = Column(String(64), primary_key=True)
+    idx = Column(Integer, primary_key=True)
+    channel = Column(String(255), nullable=False)
+    value_type = Column(String(32), nullable=False)
+    value = Column(LargeBinary, nullable=False)
+    task_path = Column(String(255), nullable=False, default="")
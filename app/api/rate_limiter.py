@@ -0,0 +1,416 @@
+"""
+Process-wide rate limiting of LLM calls.
+
+Every LLM node of every graph goes through the limiter of its model,
+which enforces a requests-per-minute and a tokens-per-minute budget
+(token buckets refilled continuously) and a cap on concurrent calls.
+Calls that cannot start yet wait in a queue ordered by lane, then
+arrival: interactive runs are served before batch and background runs,
+so a large batch cannot starve a user waiting on a response.
+
+Prompt tokens are estimated from the text before the call; once the
+provider reports the actual usage the difference is settled against the
+bucket, which may go into debt and delay the next calls accordingly.
+"""
+import asyncio
+import contextlib
+import contextvars
+import heapq
+import itertools
+import math
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional
+
+from .config import settings
+from . import metrics
+
+# Lanes by priority, lower values are served first
+LANES = {"interactive": 0, "batch": 1}
+
+_current_lane: contextvars.ContextVar[str] = contextvars.ContextVar("graphflow_llm_lane", default="interactive")
+
+LLM_QUEUE_WAIT = metrics.registry.histogram(
+    "graphflow_llm_queue_wait_seconds", "Time LLM calls waited for the rate limiter", ("model", "lane"),
+    bounded=("model",)
+)
+LLM_RATE_LIMITED = metrics.registry.counter(
+    "graphflow_llm_rate_limited_total", "LLM calls rejected by the provider with HTTP 429", ("model",),
+    bounded=("model",)
+)
+
+@contextlib.contextmanager
+def llm_lane(lane: str) -> Iterator[None]:
+    """
+    Run the block's LLM calls in the given lane.
+
+    The lane is held in a context variable, so it follows the run into
+    the tasks and worker threads that execute its nodes.
+    """
+    if lane not in LANES:
+        raise ValueError(f"Unknown LLM lane '{lane}', expected one of {', '.join(LANES)}")
+    token = _current_lane.set(lane)
+    try:
+        yield
+    finally:
+        _current_lane.reset(token)
+
+def current_lane() -> str:
+    """Return the lane of the run in progress."""
+    return _current_lane.get()
+
+def estimate_tokens(prompt: Any) -> int:
+    """Roughly estimate the tokens of a prompt, at four characters per token."""
+    text = prompt.to_string() if hasattr(prompt, "to_string") else str(prompt)
+    return len(text) // 4 + 1
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """Whether an exception is the provider rejecting a call with HTTP 429."""
+    return getattr(error, "status_code", None) == 429
+
+class TokenBucket:
+    """Budget per minute refilled continuously, with up to one minute of burst."""
+    def __init__(self, per_minute: float, now: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated = now
+
+    def _refill(self, now: float) -> None:
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def delay(self, amount: float, now: float) -> float:
+        """Seconds until `amount` can be taken; requests above the capacity wait for a full bucket."""
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.tokens
+        return missing / self.rate if missing > 0 else 0.0
+
+    def take(self, amount: float) -> None:
+        self.tokens -= amount
+
+class _Waiter:
+    """A queued call, woken when it may be able to start."""
+    __slots__ = ("priority", "seq", "tokens", "_loop", "_event")
+
+    def __init__(self, priority: int, seq: int, tokens: int, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.priority = priority
+        self.seq = seq
+        self.tokens = tokens
+        self._loop = loop
+        self._event = threading.Event() if loop is None else asyncio.Event()
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+    def notify(self) -> None:
+        if self._loop is None:
+            self._event.set()
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._event.set)
+        except RuntimeError:
+            # The waiter's event loop is closed, it is not waiting anymore
+            pass
+
+    def reset(self) -> None:
+        """Forget earlier notifications; called before each check so none is missed."""
+        self._event.clear()
+
+    def wait(self, timeout: Optional[float]) -> None:
+        self._event.wait(timeout)
+
+    async def await_(self, timeout: Optional[float]) -> None:
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+class Permit:
+    """An admitted call; settle() corrects the token estimate once usage is known."""
+    __slots__ = ("limiter", "tokens", "waited")
+
+    def __init__(self, limiter: "ModelRateLimiter", tokens: int, waited: float):
+        self.limiter = limiter
+        self.tokens = tokens
+        self.waited = waited
+
+    def settle(self, actual_tokens: Optional[int]) -> None:
+        """Charge the difference between the reported and the estimated tokens."""
+        if actual_tokens is None:
+            return
+        self.limiter._adjust_tokens(actual_tokens - self.tokens)
+        self.tokens = actual_tokens
+
+class ModelRateLimiter:
+    """
+    Request, token and concurrency limits of one model.
+
+    A limit of 0 disables it. Waiters start strictly in queue order, so a
+    call needing many tokens is not overtaken by smaller ones behind it.
+    """
+    def __init__(
+        self,
+        model_name: str,
+        requests_per_minute: float = 0,
+        tokens_per_minute: float = 0,
+        max_concurrency: int = 0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.model_name = model_name
+        self.max_concurrency = max_concurrency
+        self._clock = clock
+        now = clock()
+        self._requests = TokenBucket(requests_per_minute, now) if requests_per_minute else None
+        self._tokens = TokenBucket(tokens_per_minute, now) if tokens_per_minute else None
+        self._queue: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._wait_metrics = {lane: LLM_QUEUE_WAIT.labels(model_name, lane) for lane in LANES}
+        self._rate_limited = LLM_RATE_LIMITED.labels(model_name)
+        self.active = 0
+
+    @property
+    def queued(self) -> int:
+        """Number of calls waiting to start."""
+        return len(self._queue)
+
+    def _delay(self, tokens: int, now: float) -> float:
+        """Seconds until a call needing `tokens` may start, inf while all slots are busy. Lock held."""
+        if self.max_concurrency and self.active >= self.max_concurrency:
+            return math.inf
+        delay = 0.0
+        if self._requests is not None:
+            delay = self._requests.delay(1, now)
+        if self._tokens is not None and tokens:
+            delay = max(delay, self._tokens.delay(tokens, now))
+        return delay
+
+    def _admit(self, tokens: int) -> None:
+        """Take a slot and the budget of a call. Lock held."""
+        self.active += 1
+        if self._requests is not None:
+            self._requests.take(1)
+        if self._tokens is not None:
+            self._tokens.take(tokens)
+
+    def _try_start(self, waiter: _Waiter) -> float:
+        """Start the waiter if it is first in line and within the limits, returning 0, else the seconds to wait."""
+        with self._lock:
+            if self._queue[0] is not waiter:
+                return math.inf
+            delay = self._delay(waiter.tokens, self._clock())
+            if delay > 0:
+                return delay
+            self._admit(waiter.tokens)
+            heapq.heappop(self._queue)
+            # The next waiter may fit in the remaining budget too
+            if self._queue:
+                self._queue[0].notify()
+            return 0.0
+
+    def _enqueue(self, tokens: int, loop: Optional[asyncio.AbstractEventLoop]) -> Optional[_Waiter]:
+        """Start the call right away if nobody is queued and it fits, else queue it."""
+        with self._lock:
+            if not self._queue and self._delay(tokens, self._clock()) == 0:
+                self._admit(tokens)
+                return None
+            waiter = _Waiter(LANES[current_lane()], next(self._seq), tokens, loop)
+            heapq.heappush(self._queue, waiter)
+            return waiter
+
+    def _abandon(self, waiter: _Waiter) -> None:
+        """Remove a waiter that gave up, waking whoever is first in line now."""
+        with self._lock:
+            if waiter in self._queue:
+                self._queue.remove(waiter)
+                heapq.heapify(self._queue)
+                if self._queue:
+                    self._queue[0].notify()
+
+    def _record_wait(self, start: float) -> float:
+        waited = self._clock() - start
+        if settings.METRICS_ENABLED:
+            self._wait_metrics[current_lane()].observe(waited)
+        return waited
+
+    def acquire(self, tokens: int = 0) -> Permit:
+        """Block until a call may start and return its permit."""
+        start = self._clock()
+        waiter = self._enqueue(tokens, None)
+        if waiter is not None:
+            try:
+                while True:
+                    waiter.reset()
+                    delay = self._try_start(waiter)
+                    if delay == 0:
+                        break
+                    waiter.wait(None if math.isinf(delay) else delay)
+            except BaseException:
+                self._abandon(waiter)
+                raise
+        return Permit(self, tokens, self._record_wait(start))
+
+    async def aacquire(self, tokens: int = 0) -> Permit:
+        """Wait without blocking the event loop until a call may start and return its permit."""
+        start = self._clock()
+        waiter = self._enqueue(tokens, asyncio.get_running_loop())
+        if waiter is not None:
+            try:
+                while True:
+                    waiter.reset()
+                    delay = self._try_start(waiter)
+                    if delay == 0:
+                        break
+                    await waiter.await_(None if math.isinf(delay) else delay)
+            except BaseException:
+                # Cancelled while waiting, e.g. the client disconnected
+                self._abandon(waiter)
+                raise
+        return Permit(self, tokens, self._record_wait(start))
+
+    def release(self, permit: Permit) -> None:
+        """Free the concurrency slot of a finished call."""
+        with self._lock:
+            self.active -= 1
+            if self._queue:
+                self._queue[0].notify()
+
+    def _adjust_tokens(self, amount: int) -> None:
+        if self._tokens is None or not amount:
+            return
+        with self._lock:
+            self._tokens.take(amount)
+            if amount < 0 and self._queue:
+                self._queue[0].notify()
+
+    def rate_limited(self) -> None:
+        """
+        Record a 429 from the provider and empty the request bucket.
+
+        The provider's own window is out of step with ours, so queued calls
+        back off for a while instead of retrying into more 429s.
+        """
+        self._rate_limited.inc()
+        if self._requests is None:
+            return
+        with self._lock:
+            self._requests.tokens = min(self._requests.tokens, 0.0)
+
+    @contextlib.contextmanager
+    def limit(self, tokens: int = 0) -> Iterator[Permit]:
+        """
+        Hold a permit for the duration of the block.
+
+        If the block times out while its call keeps running in a worker
+        thread (an error with a `running` future), the permit is held until
+        that call returns, so abandoned calls still count toward the limits.
+        """
+        permit = self.acquire(tokens)
+        release = True
+        try:
+            yield permit
+        except Exception as e:
+            if is_rate_limit_error(e):
+                self.rate_limited()
+            running = getattr(e, "running", None)
+            if running is not None:
+                release = False
+                running.add_done_callback(lambda _: self.release(permit))
+            raise
+        finally:
+            if release:
+                self.release(permit)
+
+    @contextlib.asynccontextmanager
+    async def alimit(self, tokens: int = 0) -> AsyncIterator[Permit]:
+        """Async variant of limit()."""
+        permit = await self.aacquire(tokens)
+        try:
+            yield permit
+        except Exception as e:
+            if is_rate_limit_error(e):
+                self.rate_limited()
+            raise
+        finally:
+            self.release(permit)
+
+class LLMRateLimiter:
+    """Registry of per-model limiters, shared by every graph in the process."""
+    def __init__(
+        self,
+        enabled: bool = True,
+        requests_per_minute: float = 0,
+        tokens_per_minute: float = 0,
+        max_concurrency: int = 0,
+        overrides: Optional[Dict[str, Dict[str, float]]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.enabled = enabled
+        self.defaults = {
+            "requests_per_minute": requests_per_minute,
+            "tokens_per_minute": tokens_per_minute,
+            "max_concurrency": max_concurrency,
+        }
+        self.overrides = overrides or {}
+        self._clock = clock
+        self._limiters: Dict[str, ModelRateLimiter] = {}
+        self._lock = threading.Lock()
+
+    def limits(self, model_name: str) -> Dict[str, float]:
+        """Return the limits of a model: the defaults updated with its overrides."""
+        limits = dict(self.defaults)
+        limits.update(self.overrides.get(model_name, {}))
+        return limits
+
+    def for_model(self, model_name: str) -> Optional[ModelRateLimiter]:
+        """
+        Get the limiter of a model, created on first use.
+
+        Returns:
+            The limiter, or None if limiting is disabled or the model has no limits
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            limiter = self._limiters.get(model_name)
+            if limiter is None:
+                limits = self.limits(model_name)
+                if not any(limits.values()):
+                    return None
+                limiter = self._limiters[model_name] = ModelRateLimiter(
+                    model_name,
+                    requests_per_minute=limits["requests_per_minute"],
+                    tokens_per_minute=limits["tokens_per_minute"],
+                    max_concurrency=int(limits["max_concurrency"]),
+                    clock=self._clock,
+                )
+            return limiter
+
+    @property
+    def queued(self) -> int:
+        """Calls waiting to start, across all models."""
+        return sum(limiter.queued for limiter in list(self._limiters.values()))
+
+    @property
+    def active(self) -> int:
+        """Calls in progress, across all models."""
+        return sum(limiter.active for limiter in list(self._limiters.values()))
+
+    def clear(self) -> None:
+        """Forget every limiter, used by tests."""
+        with self._lock:
+            self._limiters.clear()
+
+# Shared limiter used by LLM nodes
+llm_rate_limiter = LLMRateLimiter(
+    enabled=settings.LLM_RATE_LIMIT_ENABLED,
+    requests_per_minute=settings.LLM_REQUESTS_PER_MINUTE,
+    tokens_per_minute=settings.LLM_TOKENS_PER_MINUTE,
+    max_concurrency=settings.LLM_MAX_CONCURRENCY,
+    overrides=settings.LLM_RATE_LIMITS,
+)
+
+metrics.registry.callback("graphflow_llm_queued_calls", "LLM calls waiting for the rate limiter", "gauge", lambda: llm_rate_limiter.queued)
+metrics.registry.callback("graphflow_llm_active_calls", "LLM calls in progress", "gauge", lambda: llm_rate_limiter.active)
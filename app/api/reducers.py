@@ -0,0 +1,74 @@
+from typing import Any, Callable, Dict, List
+
+# Marker for state keys that a branch did not write
+MISSING = object()
+
+def _present(values: List[Any]) -> List[Any]:
+    return [value for value in values if value is not MISSING]
+
+def reduce_list(values: List[Any], config: Dict[str, Any]) -> List[Any]:
+    """Collect branch values into a list."""
+    return _present(values)
+
+def reduce_extend(values: List[Any], config: Dict[str, Any]) -> List[Any]:
+    """Concatenate list values, wrapping scalars."""
+    result = []
+    for value in _present(values):
+        if isinstance(value, list):
+            result.extend(value)
+        else:
+            result.append(value)
+    return result
+
+def reduce_concat(values: List[Any], config: Dict[str, Any]) -> str:
+    """Join values as text."""
+    separator = config.get("separator", "\n")
+    return separator.join(str(value) for value in _present(values))
+
+def reduce_merge(values: List[Any], config: Dict[str, Any]) -> Dict[str, Any]:
+    """Merge dict values, later keys overriding earlier ones."""
+    result = {}
+    for value in _present(values):
+        if isinstance(value, dict):
+            result.update(value)
+    return result
+
+def reduce_sum(values: List[Any], config: Dict[str, Any]) -> Any:
+    """Add numeric values."""
+    return sum(_present(values))
+
+def reduce_first(values: List[Any], config: Dict[str, Any]) -> Any:
+    """Take the first value that was written."""
+    present = _present(values)
+    return present[0] if present else None
+
+def reduce_last(values: List[Any], config: Dict[str, Any]) -> Any:
+    """Take the last value that was written."""
+    present = _present(values)
+    return present[-1] if present else None
+
+# Reducers available to join nodes, by name
+JOIN_REDUCERS: Dict[str, Callable[[List[Any], Dict[str, Any]], Any]] = {
+    "list": reduce_list,
+    "extend": reduce_extend,
+    "concat": reduce_concat,
+    "merge": reduce_merge,
+    "sum": reduce_sum,
+    "first": reduce_first,
+    "last": reduce_last,
+}
+
+def merge_state(current: Dict[str, Any], update: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    State reducer for graphs with parallel branches.
+
+    Branch updates are merged key by key instead of replacing the state, so
+    concurrent branches writing different keys do not conflict. LangGraph
+    applies the updates of one step in a fixed task order, so the merge is
+    deterministic.
+    """
+    if not current:
+        return dict(update or {})
+    if not update:
+        return current
+    return {**current, **update}
@@ -0,0 +1,400 @@
+"""
+Timeout, retry and circuit breaker policies of graph nodes.
+
+A policy is read from the node config, falling back to the defaults in
+settings for LLM and tool nodes, which call external services:
+
+    timeout            Seconds an attempt may take (0 disables)
+    retries            Extra attempts after a transient failure
+    retry_backoff      Base delay before the first retry, doubled for each one
+    retry_max_backoff  Upper bound of the retry delay
+    circuit_breaker    Fail fast while the node's provider is failing (true/false)
+
+Only transient failures are retried: timeouts, connection errors, HTTP
+429 and 5xx responses. Other errors, such as a prompt missing a
+variable, fail the node right away.
+
+For LLM and tool nodes the timeout and circuit breaker apply to the
+provider call itself, after the rate limiter has admitted it, so local
+queueing is neither timed out nor blamed on the provider. Other node
+types with a timeout are timed as a whole. Sync calls run in a pool of
+NODE_TIMEOUT_WORKERS threads, and their timeout starts once a thread
+picks them up.
+
+Circuit breakers are shared by every node calling the same provider.
+After CIRCUIT_BREAKER_FAILURE_THRESHOLD consecutive failures (excluding
+429s, which mean our own rate is too high)
+the circuit opens and calls fail immediately; after
+CIRCUIT_BREAKER_RESET_SECONDS one trial call is let through, which
+closes the circuit again if it succeeds.
+"""
+import asyncio
+import concurrent.futures
+import contextvars
+import functools
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+import httpx
+
+from .config import settings
+from . import metrics
+from . import logger
+
+try:
+    import openai
+    _CONNECTION_ERRORS = (TimeoutError, ConnectionError, httpx.TransportError, openai.APIConnectionError)
+except ImportError:  # Only needed to classify OpenAI client errors
+    _CONNECTION_ERRORS = (TimeoutError, ConnectionError, httpx.TransportError)
+
+# Node types that call external services and get the default policy
+IO_NODE_TYPES = ("llm", "tool")
+
+NODE_RETRIES = metrics.registry.counter(
+    "graphflow_node_retries_total", "Node attempts retried after a transient failure", ("node_type",)
+)
+NODE_TIMEOUTS = metrics.registry.counter(
+    "graphflow_node_timeouts_total", "Node attempts and provider calls that exceeded their timeout", ("provider",),
+    bounded=("provider",)
+)
+CIRCUIT_REJECTIONS = metrics.registry.counter(
+    "graphflow_circuit_rejections_total", "Node calls failed fast by an open circuit", ("provider",),
+    bounded=("provider",)
+)
+
+class NodeTimeoutError(TimeoutError):
+    """
+    Raised when a node attempt exceeds its timeout.
+
+    A sync call cannot be interrupted, so it keeps running in its worker
+    thread; `running` is then the future that completes when it returns.
+    """
+    running: Optional[concurrent.futures.Future] = None
+
+class CircuitOpenError(RuntimeError):
+    """Raised when a node is called while its provider's circuit is open."""
+
+def is_transient(error: BaseException) -> bool:
+    """Whether a failure may succeed when tried again."""
+    if isinstance(error, _CONNECTION_ERRORS):
+        return True
+    status_code = getattr(error, "status_code", None)
+    return isinstance(status_code, int) and (status_code == 429 or status_code >= 500)
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker of one provider."""
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0, clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+        self._rejections = CIRCUIT_REJECTIONS.labels(name)
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def before_call(self) -> None:
+        """
+        Check that a call may go ahead.
+
+        Raises:
+            CircuitOpenError: If the circuit is open, or half open with a trial call already running
+        """
+        with self._lock:
+            if self._state == self.CLOSED:
+                return
+            if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                self._state = self.HALF_OPEN
+                self._trial_running = False
+            if self._state == self.HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return
+        self._rejections.inc()
+        raise CircuitOpenError(f"Circuit for provider '{self.name}' is open after repeated failures, failing fast")
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info("Circuit closed", data={"provider": self.name})
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    logger.warning("Circuit opened", data={"provider": self.name, "failures": self._failures})
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+                self._trial_running = False
+
+    def record_ignored(self) -> None:
+        """Record a call that failed for a reason unrelated to the provider's health."""
+        with self._lock:
+            self._trial_running = False
+
+class CircuitBreakerRegistry:
+    """Circuit breakers by provider, shared by every graph in the process."""
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, provider: str) -> CircuitBreaker:
+        """Get the breaker of a provider, created on first use."""
+        with self._lock:
+            breaker = self._breakers.get(provider)
+            if breaker is None:
+                breaker = self._breakers[provider] = CircuitBreaker(
+                    provider, self.failure_threshold, self.reset_timeout, self._clock
+                )
+            return breaker
+
+    def clear(self) -> None:
+        """Forget every breaker, used by tests."""
+        with self._lock:
+            self._breakers.clear()
+
+# Shared breakers used by node policies
+circuit_breakers = CircuitBreakerRegistry(
+    failure_threshold=settings.CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+    reset_timeout=settings.CIRCUIT_BREAKER_RESET_SECONDS,
+)
+
+# Threads running sync nodes that have a timeout, so the caller can stop
+# waiting; a call that hangs keeps its thread until it returns
+_timeout_executor = concurrent.futures.ThreadPoolExecutor(
+    max_workers=max(1, settings.NODE_TIMEOUT_WORKERS),
+    thread_name_prefix="graphflow-node"
+)
+
+def call_with_timeout(function: Callable, args: tuple, timeout: float, timeout_error: Callable[[], NodeTimeoutError]) -> Any:
+    """
+    Run a blocking function in a worker thread, with the caller's context,
+    and wait at most `timeout` seconds once a worker has started it.
+
+    Waiting for a free worker does not count toward the timeout. On timeout
+    the error from `timeout_error` is raised with the still running future
+    attached as `running`.
+    """
+    context = contextvars.copy_context()
+    started = threading.Event()
+
+    def run():
+        started.set()
+        return context.run(function, *args)
+
+    future = _timeout_executor.submit(run)
+    started.wait()
+    try:
+        return future.result(timeout)
+    except concurrent.futures.TimeoutError:
+        error = timeout_error()
+        error.running = future
+        raise error from None
+
+def node_provider(node_type: str, config: Dict[str, Any]) -> Optional[str]:
+    """Return the external service a node calls, used to pick its circuit breaker."""
+    if node_type == "llm":
+        return "openai"
+    if node_type == "tool":
+        return config.get("tool_type") or None
+    return None
+
+def node_policy(node_type: str, config: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the timeout, retry and circuit breaker settings of a node."""
+    io_node = node_type in IO_NODE_TYPES
+    return {
+        "timeout": float(config.get("timeout", settings.NODE_TIMEOUT_SECONDS if io_node else 0) or 0),
+        "retries": int(config.get("retries", settings.NODE_RETRIES if io_node else 0) or 0),
+        "retry_backoff": float(config.get("retry_backoff", settings.NODE_RETRY_BACKOFF_SECONDS)),
+        "retry_max_backoff": float(config.get("retry_max_backoff", settings.NODE_RETRY_MAX_BACKOFF_SECONDS)),
+        "circuit_breaker": bool(config.get("circuit_breaker", settings.CIRCUIT_BREAKER_ENABLED and io_node)),
+    }
+
+def backoff_delay(attempt: int, base: float, maximum: float) -> float:
+    """Delay before retry number `attempt` (from 0): exponential with full jitter."""
+    return random.uniform(0, min(maximum, base * (2 ** attempt)))
+
+def counts_against_provider(error: BaseException) -> bool:
+    """
+    Whether a failed provider call says the provider is unhealthy.
+
+    A 429 only means our own request rate is too high, which the rate
+    limiter already handles, so it does not open the circuit.
+    """
+    return is_transient(error) and getattr(error, "status_code", None) != 429
+
+class CallPolicy:
+    """
+    Timeout and circuit breaker around each call a node makes to its provider.
+
+    LLM and tool nodes apply it inside their rate limiter permit, so time
+    spent queueing for the limiter never counts toward the timeout and a
+    busy queue cannot open the circuit.
+    """
+    def __init__(self, provider: Optional[str], timeout: float, breaker: Optional[CircuitBreaker]):
+        self.provider = provider
+        self.timeout = timeout
+        self.breaker = breaker
+        self._timed_out = NODE_TIMEOUTS.labels(provider or "none")
+
+    def _timeout_error(self) -> NodeTimeoutError:
+        self._timed_out.inc()
+        return NodeTimeoutError(f"Call to provider '{self.provider}' timed out after {self.timeout:g}s")
+
+    def _record(self, error: Optional[BaseException]) -> None:
+        if self.breaker is None:
+            return
+        if error is None:
+            self.breaker.record_success()
+        elif counts_against_provider(error):
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_ignored()
+
+    def call(self, function: Callable, *args: Any) -> Any:
+        """Call a blocking provider function under the policy."""
+        if self.breaker is not None:
+            self.breaker.before_call()
+        try:
+            if self.timeout:
+                result = call_with_timeout(function, args, self.timeout, self._timeout_error)
+            else:
+                result = function(*args)
+        except BaseException as e:
+            self._record(e)
+            raise
+        self._record(None)
+        return result
+
+    async def acall(self, function: Callable, *args: Any) -> Any:
+        """Await a provider coroutine function under the policy."""
+        if self.breaker is not None:
+            self.breaker.before_call()
+        try:
+            if self.timeout:
+                try:
+                    result = await asyncio.wait_for(function(*args), self.timeout)
+                except asyncio.TimeoutError:
+                    raise self._timeout_error() from None
+            else:
+                result = await function(*args)
+        except BaseException as e:
+            # Cancellation, e.g. a client disconnecting, is not counted either
+            self._record(e)
+            raise
+        self._record(None)
+        return result
+
+def call_policy(node_type: str, config: Dict[str, Any]) -> Optional[CallPolicy]:
+    """
+    Return the per-call policy of an LLM or tool node.
+
+    Returns:
+        The policy, or None for other node types and nodes with neither a
+        timeout nor a circuit breaker
+    """
+    if node_type not in IO_NODE_TYPES:
+        return None
+    policy = node_policy(node_type, config)
+    provider = node_provider(node_type, config)
+    breaker = circuit_breakers.get(provider) if policy["circuit_breaker"] and provider else None
+    if not policy["timeout"] and breaker is None:
+        return None
+    return CallPolicy(provider, policy["timeout"], breaker)
+
+def apply_node_policy(function: Callable, node_id: str, node_type: str, config: Dict[str, Any]) -> Callable:
+    """
+    Wrap a node function with its retry policy, and its timeout for node
+    types that do not call a provider.
+
+    LLM and tool nodes apply their timeout and circuit breaker per provider
+    call instead, see call_policy. A retry runs the whole node again.
+
+    Args:
+        function: The node function from create_node_function
+        node_id: The node ID
+        node_type: The node type
+        config: The node config holding the policy
+
+    Returns:
+        A function with the same sync/async kind, or the function itself
+        when the node has no policy
+    """
+    policy = node_policy(node_type, config)
+    timeout = policy["timeout"] if node_type not in IO_NODE_TYPES else 0
+    retries = max(0, policy["retries"])
+    if not timeout and not retries:
+        return function
+
+    retried = NODE_RETRIES.labels(node_type)
+    timed_out = NODE_TIMEOUTS.labels("none")
+
+    def timeout_error() -> NodeTimeoutError:
+        timed_out.inc()
+        return NodeTimeoutError(f"Node '{node_id}' timed out after {timeout:g}s")
+
+    def should_retry(error: Exception, attempt: int) -> bool:
+        if not is_transient(error) or attempt >= retries:
+            return False
+        retried.inc()
+        logger.warning(f"Retrying node after error: {str(error)}", data={
+            "node_id": node_id,
+            "attempt": attempt + 1,
+            "retries": retries
+        })
+        return True
+
+    if asyncio.iscoroutinefunction(function):
+        @functools.wraps(function)
+        async def async_node(state):
+            attempt = 0
+            while True:
+                try:
+                    if timeout:
+                        try:
+                            return await asyncio.wait_for(function(state), timeout)
+                        except asyncio.TimeoutError:
+                            raise timeout_error() from None
+                    return await function(state)
+                except Exception as e:
+                    if not should_retry(e, attempt):
+                        raise
+                await asyncio.sleep(backoff_delay(attempt, policy["retry_backoff"], policy["retry_max_backoff"]))
+                attempt += 1
+        return async_node
+
+    @functools.wraps(function)
+    def node(state):
+        attempt = 0
+        while True:
+            try:
+                if timeout:
+                    return call_with_timeout(function, (state,), timeout, timeout_error)
+                return function(state)
+            except Exception as e:
+                if not should_retry(e, attempt):
+                    raise
+            time.sleep(backoff_delay(attempt, policy["retry_backoff"], policy["retry_max_backoff"]))
+            attempt += 1
+    return node
@@ -0,0 +1,201 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import and_, func, or_
+from sqlalchemy.dialects import postgresql, sqlite
+
+from .config import settings
+from .database import SessionLocal
+from .models import ExecutionTrace, GraphExecution, GraphExecutionArchive
+from . import logger
+
+def _archive(db, rows: List[GraphExecution]) -> None:
+    """
+    Copy executions to the archive, skipping IDs that are already there.
+
+    Every worker runs the retention job, so two of them can archive the
+    same batch; the insert must not fail on the second copy.
+    """
+    values = [
+        {
+            "id": row.id,
+            "graph_id": row.graph_id,
+            "input_data": row.input_data,
+            "output_data": row.output_data,
+            "execution_time": row.execution_time,
+            "archived_at": datetime.utcnow()
+        }
+        for row in rows
+    ]
+    if not values:
+        return
+
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        db.execute(insert(GraphExecutionArchive).on_conflict_do_nothing(index_elements=["id"]), values)
+        return
+
+    # Other databases: skip rows archived before, a concurrent copy still conflicts
+    existing = {archived_id for (archived_id,) in db.query(GraphExecutionArchive.id).filter(
+        GraphExecutionArchive.id.in_([value["id"] for value in values])
+    )}
+    db.add_all([GraphExecutionArchive(**value) for value in values if value["id"] not in existing])
+
+def _remove_batches(db, criteria: List, batch_size: int, archive: bool) -> int:
+    """Delete, and optionally archive, matching executions one batch per transaction."""
+    removed = 0
+    while True:
+        if archive:
+            rows = db.query(GraphExecution).filter(*criteria).order_by(GraphExecution.id).limit(batch_size).all()
+            ids = [row.id for row in rows]
+            _archive(db, rows)
+        else:
+            # Only the IDs are needed, so the payload columns are never loaded
+            ids = [row.id for row in db.query(GraphExecution.id).filter(*criteria).order_by(GraphExecution.id).limit(batch_size)]
+
+        if not ids:
+            break
+
+        # Bulk deletes skip ORM cascades, so traces are removed explicitly
+        db.query(ExecutionTrace).filter(ExecutionTrace.execution_id.in_(ids)).delete(synchronize_session=False)
+        db.query(GraphExecution).filter(GraphExecution.id.in_(ids)).delete(synchronize_session=False)
+        db.commit()
+        db.expunge_all()
+        removed += len(ids)
+
+        if len(ids) < batch_size:
+            break
+    return removed
+
+def prune_executions(
+    retention_days: int = 0,
+    max_per_graph: int = 0,
+    batch_size: int = 500,
+    archive: bool = False,
+    session_factory: Callable = SessionLocal,
+    now: Optional[datetime] = None,
+) -> Dict[str, int]:
+    """
+    Remove old executions according to the retention policy.
+
+    Executions are removed in batches, each in its own transaction, so a
+    large backlog never holds long locks on the table.
+
+    Args:
+        retention_days: Remove executions older than this many days, 0 disables
+        max_per_graph: Keep only this many most recent executions per graph, 0 disables
+        batch_size: Executions removed per transaction
+        archive: Copy removed executions to graph_execution_archive first
+        session_factory: Factory for database sessions
+        now: Current time, defaults to datetime.now()
+
+    Returns:
+        Counts of executions removed for age ("expired") and for the per-graph limit ("trimmed")
+    """
+    batch_size = max(1, batch_size)
+    result = {"expired": 0, "trimmed": 0}
+    db = session_factory()
+    try:
+        if retention_days > 0:
+            cutoff = (now or datetime.now()) - timedelta(days=retention_days)
+            result["expired"] = _remove_batches(db, [GraphExecution.execution_time < cutoff], batch_size, archive)
+
+        if max_per_graph > 0:
+            over_limit = db.query(GraphExecution.graph_id).group_by(GraphExecution.graph_id).having(
+                func.count(GraphExecution.id) > max_per_graph
+            ).all()
+            for (graph_id,) in over_limit:
+                # The newest execution past the limit; it and everything older goes
+                boundary = db.query(GraphExecution.execution_time, GraphExecution.id).filter(
+                    GraphExecution.graph_id == graph_id
+                ).order_by(GraphExecution.execution_time.desc(), GraphExecution.id.desc()).offset(max_per_graph).first()
+                if boundary is None:
+                    continue
+                boundary_time, boundary_id = boundary
+                criteria = [
+                    GraphExecution.graph_id == graph_id,
+                    or_(
+                        GraphExecution.execution_time < boundary_time,
+                        and_(GraphExecution.execution_time == boundary_time, GraphExecution.id <= boundary_id)
+                    )
+                ]
+                result["trimmed"] += _remove_batches(db, criteria, batch_size, archive)
+    finally:
+        db.close()
+
+    if result["expired"] or result["trimmed"]:
+        logger.info("Pruned graph executions", data={**result, "archived": archive})
+    return result
+
+class RetentionJob:
+    """
+    Periodic background task that applies the execution retention policy.
+
+    The pruning itself runs in a worker thread so the event loop keeps
+    serving requests while old executions are removed.
+    """
+    def __init__(
+        self,
+        interval_seconds: float = 3600,
+        retention_days: int = 0,
+        max_per_graph: int = 0,
+        batch_size: int = 500,
+        archive: bool = False,
+    ):
+        self.interval_seconds = max(1, interval_seconds)
+        self.retention_days = retention_days
+        self.max_per_graph = max_per_graph
+        self.batch_size = batch_size
+        self.archive = archive
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        """Whether any retention rule is configured."""
+        return self.retention_days > 0 or self.max_per_graph > 0
+
+    def run_once(self) -> Dict[str, int]:
+        """Apply the retention policy now."""
+        return prune_executions(
+            retention_days=self.retention_days,
+            max_per_graph=self.max_per_graph,
+            batch_size=self.batch_size,
+            archive=self.archive,
+        )
+
+    def start(self) -> None:
+        """Start the periodic task on the running event loop, if retention is enabled."""
+        if not self.enabled or self._task is not None:
+            return
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        logger.info("Execution retention job started", data={
+            "interval_seconds": self.interval_seconds,
+            "retention_days": self.retention_days,
+            "max_per_graph": self.max_per_graph
+        })
+
+    async def stop(self) -> None:
+        """Cancel the periodic task."""
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self.run_once)
+            except Exception as e:
+                logger.error(f"Execution retention failed: {str(e)}")
+            await asyncio.sleep(self.interval_seconds)
+
+# Shared job started with the API
+retention_job = RetentionJob(
+    interval_seconds=settings.EXECUTION_RETENTION_INTERVAL_SECONDS,
+    retention_days=settings.EXECUTION_RETENTION_DAYS,
+    max_per_graph=settings.EXECUTION_RETENTION_MAX_PER_GRAPH,
+    batch_size=settings.EXECUTION_RETENTION_BATCH_SIZE,
+    archive=settings.EXECUTION_RETENTION_ARCHIVE,
+)
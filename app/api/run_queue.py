@@ -0,0 +1,158 @@
+import asyncio
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+from .config import settings
+from .database import SessionLocal
+from .models import GraphRun as GraphRunRecord
+from . import logger
+
+INTERRUPTED_MESSAGE = "Run interrupted: the server stopped before it finished"
+
+class RunQueueFull(Exception):
+    """Raised when a run is submitted while the queue is at capacity."""
+
+class RunQueue:
+    """
+    Bounded in-process queue that executes background runs on a fixed pool of workers.
+
+    At most `concurrency` jobs run at once and at most `max_pending` jobs wait
+    for a worker. Submitting beyond that raises RunQueueFull so callers can
+    apply backpressure instead of queueing without limit.
+    """
+    def __init__(self, concurrency: int = 4, max_pending: int = 100):
+        self.concurrency = max(1, concurrency)
+        self.max_pending = max(1, max_pending)
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._running: Dict[int, Any] = {}
+        self.active = 0
+
+    @property
+    def pending(self) -> int:
+        """Number of submitted jobs waiting for a worker."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def is_full(self) -> bool:
+        """Whether a new submission would be rejected."""
+        return self._queue is not None and self._queue.full()
+
+    def start(self) -> None:
+        """Start the worker pool on the running event loop if it is not already running there."""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._workers:
+            return
+
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._running = {}
+        self.active = 0
+        self._workers = [
+            loop.create_task(self._worker(index)) for index in range(self.concurrency)
+        ]
+        logger.info("Run queue started", data={
+            "concurrency": self.concurrency,
+            "max_pending": self.max_pending
+        })
+
+    async def stop(self) -> List[Any]:
+        """
+        Cancel the workers and drop the jobs still waiting in the queue.
+
+        Returns:
+            The run IDs of the jobs that were cancelled or never started,
+            so the caller can record them as interrupted
+        """
+        unfinished = list(self._running.values())
+        if self._queue is not None:
+            while not self._queue.empty():
+                run_id, _ = self._queue.get_nowait()
+                self._queue.task_done()
+                unfinished.append(run_id)
+
+        workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.cancel()
+        if workers:
+            await asyncio.gather(*workers, return_exceptions=True)
+            logger.info("Run queue stopped", data={"unfinished": len(unfinished)})
+        self._queue = None
+        self._loop = None
+        return [run_id for run_id in unfinished if run_id is not None]
+
+    def submit(self, job: Callable[[], Awaitable[Any]], run_id: Any = None) -> None:
+        """
+        Enqueue a job for background execution.
+
+        Args:
+            job: Zero-argument coroutine function to execute
+            run_id: Identifier used in log messages
+
+        Raises:
+            RunQueueFull: If max_pending jobs are already waiting
+        """
+        self.start()
+        try:
+            self._queue.put_nowait((run_id, job))
+        except asyncio.QueueFull:
+            logger.warning("Run queue is full", data={"run_id": run_id, "pending": self.pending})
+            raise RunQueueFull(f"Run queue is full ({self.max_pending} runs pending)")
+
+    async def join(self) -> None:
+        """Wait until every submitted job has finished."""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            run_id, job = await self._queue.get()
+            self._running[index] = run_id
+            self.active += 1
+            try:
+                await job()
+            except Exception as e:
+                # Jobs record their own failures; this only keeps the worker alive
+                logger.error(f"Background run failed: {str(e)}", data={"run_id": run_id, "worker": index})
+            finally:
+                self._running.pop(index, None)
+                self.active -= 1
+                self._queue.task_done()
+
+def interrupt_runs(run_ids: Optional[Sequence[int]] = None, session_factory: Callable = SessionLocal) -> int:
+    """
+    Mark queued or running runs as failed because the server stopped.
+
+    Checkpointed runs marked this way can be resumed like any failed run.
+
+    Args:
+        run_ids: The runs to mark, or None for every queued or running run,
+            which on startup are left over from a server that did not stop
+            cleanly
+        session_factory: Factory for database sessions
+
+    Returns:
+        Number of runs marked
+    """
+    db = session_factory()
+    try:
+        query = db.query(GraphRunRecord).filter(GraphRunRecord.status.in_(("queued", "running")))
+        if run_ids is not None:
+            query = query.filter(GraphRunRecord.id.in_(list(run_ids)))
+        marked = query.update({
+            "status": "error",
+            "error_message": INTERRUPTED_MESSAGE,
+            "completed_at": datetime.now()
+        }, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+    if marked:
+        logger.warning("Marked unfinished runs as interrupted", data={"runs": marked})
+    return marked
+
+# Shared queue used by the API
+run_queue = RunQueue(
+    concurrency=settings.RUN_QUEUE_CONCURRENCY,
+    max_pending=settings.RUN_QUEUE_MAX_PENDING,
+)
@@ -15,6 +15,7 @@ class GraphCreate(GraphBase):
 class GraphUpdate(BaseModel):
     name: Optional[str] = None
     description: Optional[str] = None
+    definition: Optional[Dict[str, Any]] = None
     nodes: Optional[List[Dict[str, Any]]] = None
     edges: Optional[List[Dict[str, Any]]] = None
 
@@ -46,6 +47,17 @@ class GraphResponse(BaseModel):
         "from_attributes": True
     }
 
+# Listing item, containing only the fields that were requested
+class GraphListItem(BaseModel):
+    id: int
+    name: Optional[str] = None
+    description: Optional[str] = None
+    definition: Optional[Dict[str, Any]] = None
+    nodes: Optional[List[Dict[str, Any]]] = None
+    edges: Optional[List[Dict[str, Any]]] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
 # Node schemas
 class GraphNodeBase(BaseModel):
     node_id: str
@@ -87,6 +99,10 @@ class GraphEdgeResponse(GraphEdgeBase):
 class GraphRun(BaseModel):
     input: Dict[str, Any] = Field(default_factory=dict)
 
+class GraphBatchRun(BaseModel):
+    inputs: List[Dict[str, Any]] = Field(..., min_length=1, description="Input data for each run in the batch")
+    max_concurrency: Optional[int] = Field(default=None, ge=1, description="Maximum runs executed at once")
+
 class GraphRunResponse(BaseModel):
     id: int
     graph_id: int
@@ -98,7 +114,8 @@ class GraphRunResponse(BaseModel):
     completed_at: Optional[datetime] = None
 
     model_config = {
-        "orm_mode": True
+        "orm_mode": True,
+        "from_attributes": True
     }
 
 # Graph execution schemas
@@ -119,6 +136,41 @@ class GraphExecution(GraphExecutionBase):
         "from_attributes": True
     }
 
+# History item, output_data is left out of summaries
+class GraphExecutionListItem(BaseModel):
+    id: int
+    graph_id: int
+    input_data: Optional[Dict[str, Any]] = None
+    output_data: Optional[Dict[str, Any]] = None
+    execution_time: Optional[datetime] = None
+
+# Execution trace schemas
+class TraceSpan(BaseModel):
+    node: str
+    node_type: str
+    start: float  # Seconds from the start of the run
+    duration: float
+    input_size: Optional[int] = None  # Bytes of JSON state passed to the node
+    output_size: Optional[int] = None  # Bytes of JSON update returned by the node
+    error: Optional[str] = None
+
+class TraceRoute(BaseModel):
+    source: str
+    destination: Any
+    at: float  # Seconds from the start of the run
+
+class ExecutionTraceResponse(BaseModel):
+    execution_id: Optional[int] = None
+    run_id: Optional[int] = None
+    graph_id: int
+    status: str
+    version: int
+    started_at: datetime
+    duration: Optional[float] = None
+    nodes_visited: List[str]
+    spans: List[TraceSpan]
+    routes: List[TraceRoute]
+
 # Input for running a graph
 class GraphRunInput(BaseModel):
     input: Dict[str, Any] = Field(..., description="Input data for the graph execution") 
\ No newline at end of file
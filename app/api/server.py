@@ -0,0 +1,83 @@
+"""
+Command line entry point of the API server.
+
+    python -m app.api.server --workers 4
+
+Each worker is a separate process with its own compiled graph cache,
+metrics and background run queue. Graph definitions, finished run status
+and LLM responses go through the cache selected by CACHE_URL, which must
+be a shared backend (sqlite:// or redis://) for workers to see each
+other's entries and invalidations. With more than one worker, a memory://
+cache, whether the default or set explicitly, is replaced by a SQLite file
+in a private temp directory and a warning is logged. Runs left unfinished
+by a previous server are marked as interrupted once, before the workers
+start.
+"""
+import argparse
+import os
+import shutil
+import tempfile
+from typing import List, Optional
+
+from .config import settings
+from .https_config import get_https_config
+from .run_queue import interrupt_runs
+from . import logger
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run the GraphFlow API server")
+    parser.add_argument("--host", default=os.environ.get("HOST", "0.0.0.0"), help="Interface to bind")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", "8000")), help="Port to bind")
+    parser.add_argument("--workers", type=int, default=settings.SERVER_WORKERS, help="Number of worker processes")
+    parser.add_argument("--reload", action="store_true", help="Restart on code changes (single worker only)")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> None:
+    import uvicorn
+
+    args = parse_args(argv)
+    if args.workers < 1:
+        raise SystemExit("--workers must be at least 1")
+    if args.reload and args.workers > 1:
+        raise SystemExit("--reload cannot be combined with more than one worker")
+
+    cache_dir = None
+    if args.workers > 1 and settings.CACHE_URL.startswith("memory://"):
+        # A per-process cache would let workers serve definitions another
+        # worker has already replaced, so fall back to a shared file in a
+        # fresh directory only this user can access; a fixed path in the
+        # shared temp directory could be created by anyone beforehand
+        cache_dir = tempfile.mkdtemp(prefix="graphflow-cache-")
+        os.environ["CACHE_URL"] = f"sqlite:///{os.path.join(cache_dir, 'cache.db')}"
+        logger.warning("CACHE_URL is in-process, sharing the cache between workers through SQLite instead", data={
+            "workers": args.workers,
+            "configured_cache_url": settings.CACHE_URL,
+            "cache_url": os.environ["CACHE_URL"]
+        })
+
+    if args.workers > 1 and settings.RUN_RECONCILE_ON_STARTUP:
+        # A worker restarted by the supervisor must not fail the runs its
+        # siblings are executing, so stale runs are reconciled once here
+        try:
+            interrupt_runs()
+        except Exception as e:
+            # The tables may not exist yet on a fresh database
+            logger.warning(f"Could not reconcile unfinished runs: {str(e)}")
+        os.environ["RUN_RECONCILE_ON_STARTUP"] = "false"
+
+    logger.info(f"Starting server on {args.host}:{args.port}", data={"workers": args.workers})
+    try:
+        uvicorn.run(
+            "app.api.main:app",
+            host=args.host,
+            port=args.port,
+            workers=args.workers,
+            reload=args.reload,
+            **get_https_config()
+        )
+    finally:
+        if cache_dir is not None:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+Per-run execution traces.
+
+A trace records every node a run visits, with its start offset, duration
+and error, plus the destination chosen at each conditional edge. Input and
+output sizes are only measured with EXECUTION_TRACE_PAYLOAD_SIZES, as that
+serializes the whole state twice per node. Node and router wrappers append to the trace of the
+current run, found through a context variable, so runs that are not
+traced pay only a context variable lookup.
+
+Traces are stored column-wise: one list per field, indexed by span, which
+keeps the stored JSON compact for long runs.
+"""
+import asyncio
+import contextlib
+import contextvars
+import functools
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from .config import settings
+from .json_backend import json_backend
+
+TRACE_VERSION = 1
+
+# Columns stored for each node span, in order
+SPAN_FIELDS = ("node", "node_type", "start", "duration", "input_size", "output_size", "error")
+
+_current_trace: contextvars.ContextVar[Optional["RunTrace"]] = contextvars.ContextVar("graphflow_run_trace", default=None)
+
+def _payload_size(value: Any) -> Optional[int]:
+    try:
+        return len(json_backend.dumps_bytes(value))
+    except Exception:
+        return None
+
+class RunTrace:
+    """Spans and routing decisions collected during one graph run."""
+    def __init__(self):
+        self.started_at = datetime.now()
+        self._start = time.perf_counter()
+        self.duration: Optional[float] = None
+        self.columns: Dict[str, List[Any]] = {field: [] for field in SPAN_FIELDS}
+        self.routes: Dict[str, List[Any]] = {"source": [], "destination": [], "at": []}
+        self._lock = threading.Lock()
+
+    def offset(self) -> float:
+        """Seconds since the run started."""
+        return time.perf_counter() - self._start
+
+    def add_span(self, node: str, node_type: str, start: float, duration: float,
+                 input_size: Optional[int], output_size: Optional[int], error: Optional[str]) -> None:
+        """Record a finished node invocation."""
+        values = (node, node_type, round(start, 6), round(duration, 6), input_size, output_size, error)
+        with self._lock:
+            for field, value in zip(SPAN_FIELDS, values):
+                self.columns[field].append(value)
+
+    def add_route(self, source: str, destination: Any) -> None:
+        """Record the destination picked by a conditional edge."""
+        at = round(self.offset(), 6)
+        with self._lock:
+            self.routes["source"].append(source)
+            self.routes["destination"].append(destination)
+            self.routes["at"].append(at)
+
+    def finish(self) -> None:
+        """Mark the run as finished."""
+        self.duration = round(self.offset(), 6)
+
+    def to_record(self) -> Dict[str, Any]:
+        """Return the compact, column-wise form that is stored."""
+        with self._lock:
+            return {
+                "version": TRACE_VERSION,
+                "started_at": self.started_at.isoformat(),
+                "duration": self.duration,
+                "spans": {field: list(values) for field, values in self.columns.items()},
+                "routes": {field: list(values) for field, values in self.routes.items()},
+            }
+
+def expand_trace(record: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Turn a stored trace into lists of span and route objects.
+
+    Args:
+        record: The stored, column-wise trace
+
+    Returns:
+        The trace with "spans" and "routes" as lists of dicts, spans in start order
+    """
+    spans_columns = record.get("spans", {})
+    span_count = len(spans_columns.get("node", []))
+    spans = [
+        {field: spans_columns.get(field, [None] * span_count)[index] for field in SPAN_FIELDS}
+        for index in range(span_count)
+    ]
+    spans.sort(key=lambda span: span["start"] or 0)
+
+    routes_columns = record.get("routes", {})
+    route_count = len(routes_columns.get("source", []))
+    routes = [
+        {field: values[index] for field, values in routes_columns.items()}
+        for index in range(route_count)
+    ]
+
+    return {
+        "version": record.get("version"),
+        "started_at": record.get("started_at"),
+        "duration": record.get("duration"),
+        "nodes_visited": [span["node"] for span in spans],
+        "spans": spans,
+        "routes": routes,
+    }
+
+@contextlib.contextmanager
+def start_trace() -> Iterator[Optional[RunTrace]]:
+    """
+    Collect a trace for the graph run executed inside the block.
+
+    Yields None when tracing is disabled.
+    """
+    if not settings.EXECUTION_TRACE_ENABLED:
+        yield None
+        return
+
+    trace = RunTrace()
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        trace.finish()
+        _current_trace.reset(token)
+
+def current_trace() -> Optional[RunTrace]:
+    """Return the trace of the run in progress, if any."""
+    return _current_trace.get()
+
+def trace_node(function: Callable, node_id: str, node_type: str) -> Callable:
+    """
+    Wrap a node function to add a span to the current run's trace.
+
+    Args:
+        function: The node function
+        node_id: The node ID
+        node_type: The node type
+
+    Returns:
+        A function with the same sync/async kind
+    """
+    if not settings.EXECUTION_TRACE_ENABLED:
+        return function
+    measure_payloads = settings.EXECUTION_TRACE_PAYLOAD_SIZES
+
+    def record(trace: RunTrace, start: float, state: Any, output: Any, error: Optional[BaseException]) -> None:
+        trace.add_span(
+            node_id,
+            node_type,
+            start,
+            trace.offset() - start,
+            _payload_size(state) if measure_payloads else None,
+            _payload_size(output) if measure_payloads and error is None else None,
+            f"{type(error).__name__}: {error}" if error is not None else None
+        )
+
+    if asyncio.iscoroutinefunction(function):
+        @functools.wraps(function)
+        async def async_node(state):
+            trace = _current_trace.get()
+            if trace is None:
+                return await function(state)
+            start = trace.offset()
+            try:
+                output = await function(state)
+            except Exception as e:
+                record(trace, start, state, None, e)
+                raise
+            record(trace, start, state, output, None)
+            return output
+        return async_node
+
+    @functools.wraps(function)
+    def node(state):
+        trace = _current_trace.get()
+        if trace is None:
+            return function(state)
+        start = trace.offset()
+        try:
+            output = function(state)
+        except Exception as e:
+            record(trace, start, state, None, e)
+            raise
+        record(trace, start, state, output, None)
+        return output
+    return node
+
+def trace_router(function: Callable, source: str) -> Callable:
+    """Wrap a router function to record its decision in the current run's trace."""
+    if not settings.EXECUTION_TRACE_ENABLED:
+        return function
+
+    @functools.wraps(function)
+    def router(state):
+        destination = function(state)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add_route(source, destination)
+        return destination
+    return router
@@ -9,8 +9,51 @@ const APIReference: React.FC = () => {
       id: 'get-graphs',
       method: 'GET',
       path: '/api/graphs',
-      description: 'Retrieve a list of all graphs',
-      parameters: [],
+      description: 'Retrieve graphs ordered by ID. Without limit or cursor, all graphs are returned. When either is given, the response is a page and, when more graphs are available, the X-Next-Cursor response header holds the cursor for the next page.',
+      parameters: [
+        {
+          name: 'limit',
+          type: 'query',
+          dataType: 'integer',
+          required: false,
+          description: 'Maximum number of graphs to return; pages default to 100 when only a cursor is given'
+        },
+        {
+          name: 'cursor',
+          type: 'query',
+          dataType: 'integer',
+          required: false,
+          description: 'Return graphs after this cursor, taken from the X-Next-Cursor header'
+        },
+        {
+          name: 'name',
+          type: 'query',
+          dataType: 'string',
+          required: false,
+          description: 'Only return graphs whose name contains this text'
+        },
+        {
+          name: 'created_after, created_before, updated_after, updated_before',
+          type: 'query',
+          dataType: 'datetime',
+          required: false,
+          description: 'Filter graphs by creation or update time'
+        },
+        {
+          name: 'fields',
+          type: 'query',
+          dataType: 'string',
+          required: false,
+          description: 'Comma-separated list of fields to return, e.g. "id,name,updated_at"'
+        },
+        {
+          name: 'summary',
+          type: 'query',
+          dataType: 'boolean',
+          required: false,
+          description: 'Return only id, name, description and timestamps'
+        }
+      ],
       responses: [
         {
           status: 200,
@@ -255,7 +298,7 @@ const APIReference: React.FC = () => {
       id: 'run-graph',
       method: 'POST',
       path: '/api/graphs/{graph_id}/run',
-      description: 'Run a graph with the provided input',
+      description: 'Run a graph with the provided input. Identical requests made while a run is in progress share that run and its response; the X-Run-Coalesced header is true for them.',
       parameters: [
         {
           name: 'graph_id',
@@ -299,6 +342,143 @@ const APIReference: React.FC = () => {
           description: 'Error running the graph',
           example: `{
   "error": "Failed to run graph: Invalid node configuration"
+}`
+        }
+      ]
+    },
+    {
+      id: 'get-executions',
+      method: 'GET',
+      path: '/api/graphs/{graph_id}/executions',
+      description: 'Retrieve a page of a graph\'s executions, newest first. When more executions are available, the X-Next-Cursor response header holds the cursor for the next page.',
+      parameters: [
+        {
+          name: 'graph_id',
+          type: 'path',
+          dataType: 'integer',
+          required: true,
+          description: 'The ID of the graph'
+        },
+        {
+          name: 'limit',
+          type: 'query',
+          dataType: 'integer',
+          required: false,
+          description: 'Maximum number of executions to return (default 50)'
+        },
+        {
+          name: 'cursor',
+          type: 'query',
+          dataType: 'string',
+          required: false,
+          description: 'Return executions after this cursor, taken from the X-Next-Cursor header; a malformed cursor returns 400'
+        },
+        {
+          name: 'summary',
+          type: 'query',
+          dataType: 'boolean',
+          required: false,
+          description: 'Leave out output_data'
+        }
+      ],
+      responses: [
+        {
+          status: 200,
+          description: 'A list of executions',
+          example: `[
+  {
+    "id": 42,
+    "graph_id": 1,
+    "input_data": {"question": "What is the capital of France?"},
+    "output_data": {"answer": "Paris"},
+    "execution_time": "2023-06-16T14:20:00"
+  }
+]`
+        }
+      ]
+    },
+    {
+      id: 'get-execution-trace',
+      method: 'GET',
+      path: '/api/executions/{execution_id}/trace',
+      description: 'Retrieve the node-level trace of an execution: the nodes visited, the destination chosen at each conditional edge, and per-node timing and errors, plus input and output payload sizes when EXECUTION_TRACE_PAYLOAD_SIZES is enabled. Traces of background runs, including failed ones, are available at /api/runs/{run_id}/trace.',
+      parameters: [
+        {
+          name: 'execution_id',
+          type: 'path',
+          dataType: 'integer',
+          required: true,
+          description: 'The ID of the execution'
+        }
+      ],
+      responses: [
+        {
+          status: 200,
+          description: 'The execution trace',
+          example: `{
+  "execution_id": 42,
+  "run_id": null,
+  "graph_id": 1,
+  "status": "success",
+  "version": 1,
+  "started_at": "2023-06-16T14:20:00",
+  "duration": 1.284,
+  "nodes_visited": ["classify", "answer"],
+  "spans": [
+    {"node": "classify", "node_type": "llm", "start": 0.002, "duration": 0.61, "input_size": 48, "output_size": 22, "error": null},
+    {"node": "answer", "node_type": "llm", "start": 0.615, "duration": 0.66, "input_size": 70, "output_size": 310, "error": null}
+  ],
+  "routes": [
+    {"source": "classify", "destination": "answer", "at": 0.613}
+  ]
+}`
+        },
+        {
+          status: 404,
+          description: 'No trace was recorded for the execution',
+          example: `{
+  "detail": "Trace for execution 999 not found"
+}`
+        }
+      ]
+    },
+    {
+      id: 'resume-run',
+      method: 'POST',
+      path: '/api/runs/{run_id}/resume',
+      description: 'Resume a failed run from its last checkpoint. Requires CHECKPOINT_ENABLED, which is off by default; with it on, runs save their state after every node, so only the node that failed and the ones after it run again. A failed call to /api/graphs/{graph_id}/run returns the run ID in the X-Run-ID header.',
+      parameters: [
+        {
+          name: 'run_id',
+          type: 'path',
+          dataType: 'integer',
+          required: true,
+          description: 'The ID of the failed run'
+        }
+      ],
+      responses: [
+        {
+          status: 200,
+          description: 'The result of the resumed run',
+          example: `{
+  "result": {"answer": "Paris"},
+  "execution_id": 43,
+  "execution_time": "2023-06-16T14:25:00",
+  "run_id": 17
+}`
+        },
+        {
+          status: 409,
+          description: 'Checkpointing is disabled, or the run did not fail, has no checkpoint, or its graph has changed since',
+          example: `{
+  "detail": "Only failed runs can be resumed, run 17 is success"
+}`
+        },
+        {
+          status: 500,
+          description: 'The run failed again; it can be resumed once more',
+          example: `{
+  "detail": "Failed to run graph: Request timed out"
 }`
         }
       ]
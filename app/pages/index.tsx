@@ -21,7 +21,7 @@ export default function Home() {
     const fetchGraphs = async () => {
       try {
         setLoading(true);
-        const response = await axios.get('/api/graphs');
+        const response = await axios.get('/api/graphs', { params: { summary: true } });
         setGraphs(response.data);
         setError(null);
       } catch (err) {
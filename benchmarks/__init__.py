@@ -0,0 +1 @@
+"""Benchmark harness for the graph build, run and API hot paths."""
@@ -0,0 +1,53 @@
+"""Summary statistics and baseline comparison for benchmark reports."""
+import json
+import statistics
+from typing import Any, Dict, List
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Summary statistics of durations in seconds."""
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "min": ordered[0],
+        "mean": statistics.fmean(ordered),
+        "p50": ordered[len(ordered) // 2],
+        "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "max": ordered[-1],
+    }
+
+def result_key(result: Dict[str, Any]) -> str:
+    """Identify a result by benchmark name and parameters."""
+    return result["benchmark"] + json.dumps(result["params"], sort_keys=True)
+
+def compare(results: List[Dict[str, Any]], baseline: List[Dict[str, Any]], tolerance: float) -> List[Dict[str, Any]]:
+    """
+    Find benchmarks that got slower than the baseline.
+
+    Latency benchmarks compare the median, throughput benchmarks compare
+    runs per second.
+
+    Args:
+        results: The current results
+        baseline: Results of a previous run
+        tolerance: Allowed relative slowdown, e.g. 0.25 for 25%
+
+    Returns:
+        One entry per regressed benchmark
+    """
+    previous = {result_key(result): result for result in baseline}
+    regressions = []
+    for result in results:
+        before = previous.get(result_key(result))
+        if before is None:
+            continue
+        if "runs_per_second" in result and "runs_per_second" in before:
+            change = before["runs_per_second"] / result["runs_per_second"] - 1
+        else:
+            change = result["seconds"]["p50"] / before["seconds"]["p50"] - 1
+        if change > tolerance:
+            regressions.append({
+                "benchmark": result["benchmark"],
+                "params": result["params"],
+                "slowdown": round(change, 4),
+            })
+    return regressions
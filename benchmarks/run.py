@@ -0,0 +1,338 @@
+"""
+Benchmark the graph build, run, API and database hot paths.
+
+LLM and search calls go to stubs with a configurable latency, and the API
+runs against a throwaway SQLite database, so results are reproducible and
+need no credentials. Results are written as JSON; with --baseline the run
+fails if any benchmark regressed beyond the tolerance.
+
+Usage:
+    python -m benchmarks.run --output bench.json
+    python -m benchmarks.run --quick --suites build,run
+    python -m benchmarks.run --baseline main.json --tolerance 0.25
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from unittest.mock import patch
+
+# The app reads its settings at import time, so point it at a scratch
+# database and keep logging quiet before anything from app.api is imported
+_scratch_dir = tempfile.mkdtemp(prefix="graphflow-bench-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_scratch_dir, 'bench.db')}")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("LOG_FILE", "")
+
+import httpx
+
+from app.api.config import settings
+from app.api.database import SessionLocal
+from app.api.graph_cache import graph_cache
+from app.api.graph_compiler import compile_definition
+from app.api.langgraph_builder import build_langgraph_from_definition, arun_graph
+from app.api.models import Graph, GraphExecution
+
+from .report import compare, summarize
+from .stubs import LatencyChatModel, LatencySearchTool, agent_definition, chain_definition
+
+SUITES = ("build", "run", "api", "db")
+
+PROFILES = {
+    "full": {
+        "build_sizes": [10, 100, 1000, 5000],
+        "concurrency_levels": [1, 8, 32, 128],
+        "runs": 256,
+        "api_requests": 200,
+        "table_sizes": [1000, 10000, 50000],
+    },
+    "quick": {
+        "build_sizes": [10, 50],
+        "concurrency_levels": [1, 4],
+        "runs": 16,
+        "api_requests": 10,
+        "table_sizes": [100],
+    },
+}
+
+def time_calls(function: Callable[[], Any], repeat: int) -> List[float]:
+    """Run a function repeatedly and return the duration of each call."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+@contextmanager
+def stub_clients(llm_latency: float, tool_latency: float) -> Iterator[None]:
+    """Route LLM and search nodes to the latency stubs."""
+    with patch(
+        "app.api.langgraph_builder.get_chat_model",
+        lambda model_name, temperature: LatencyChatModel(latency=llm_latency)
+    ), patch(
+        "app.api.langgraph_builder.get_search_tool",
+        lambda max_results: LatencySearchTool(latency=tool_latency, max_results=max_results)
+    ):
+        yield
+
+def bench_build(sizes: List[int]) -> List[Dict[str, Any]]:
+    """Time definition compilation and graph building for chains of each size."""
+    results = []
+    with stub_clients(0, 0):
+        for size in sizes:
+            definition = chain_definition(size, llm_every=10)
+            repeat = max(1, min(10, 2000 // size))
+            results.append({
+                "benchmark": "compile_definition",
+                "params": {"nodes": size},
+                "seconds": summarize(time_calls(lambda: compile_definition(definition), repeat)),
+            })
+            results.append({
+                "benchmark": "build_graph",
+                "params": {"nodes": size},
+                "seconds": summarize(time_calls(lambda: build_langgraph_from_definition(definition, use_async=True), repeat)),
+            })
+    return results
+
+async def _run_concurrently(graph, runs: int, concurrency: int) -> Dict[str, Any]:
+    semaphore = asyncio.Semaphore(concurrency)
+    samples: List[float] = []
+
+    async def one_run(index: int) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            await arun_graph(graph, {"input": f"question number {index}"})
+            samples.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[one_run(index) for index in range(runs)])
+    elapsed = time.perf_counter() - start
+    return {"seconds": summarize(samples), "runs_per_second": runs / elapsed}
+
+def bench_run(concurrency_levels: List[int], runs: int, llm_latency: float, tool_latency: float) -> List[Dict[str, Any]]:
+    """Measure run latency and throughput of the agent graph at each concurrency level."""
+    results = []
+    with stub_clients(llm_latency, tool_latency):
+        graph = build_langgraph_from_definition(agent_definition(), use_async=True)
+        for concurrency in concurrency_levels:
+            outcome = asyncio.run(_run_concurrently(graph, runs, concurrency))
+            results.append({
+                "benchmark": "run_graph",
+                "params": {"concurrency": concurrency, "runs": runs, "llm_latency": llm_latency},
+                **outcome,
+            })
+    return results
+
+async def _timed_requests(client: httpx.AsyncClient, method: str, url: str, count: int, **kwargs) -> List[float]:
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        samples.append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            raise RuntimeError(f"{method} {url} returned {response.status_code}: {response.text[:200]}")
+    return samples
+
+async def _bench_api(requests: int) -> List[Dict[str, Any]]:
+    from app.api.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        definition = agent_definition()
+        created = await client.post("/api/graphs", json={
+            "name": "bench agent", "definition": definition, "nodes": definition["nodes"], "edges": definition["edges"]
+        })
+        graph_id = created.json()["id"]
+
+        endpoints = [
+            ("create_graph", "POST", "/api/graphs", {"json": {
+                "name": "bench chain", "definition": chain_definition(20), "nodes": [], "edges": []
+            }}),
+            ("get_graph", "GET", f"/api/graphs/{graph_id}", {}),
+            ("list_graphs", "GET", "/api/graphs", {"params": {"summary": "true", "limit": 50}}),
+            ("run_graph", "POST", f"/api/graphs/{graph_id}/run", {"json": {"input": {"question": "benchmark"}}}),
+            ("list_executions", "GET", f"/api/graphs/{graph_id}/executions", {"params": {"limit": 50}}),
+            ("metrics", "GET", "/metrics", {}),
+        ]
+
+        results = []
+        for name, method, url, kwargs in endpoints:
+            samples = await _timed_requests(client, method, url, requests, **kwargs)
+            results.append({
+                "benchmark": f"api_{name}",
+                "params": {"requests": requests},
+                "seconds": summarize(samples),
+            })
+
+        # The same run with checkpointing on, to show what the run record
+        # and per-node checkpoints add over api_run_graph
+        with patch.object(settings, "CHECKPOINT_ENABLED", True):
+            samples = await _timed_requests(
+                client, "POST", f"/api/graphs/{graph_id}/run", requests, json={"input": {"question": "benchmark"}}
+            )
+        results.append({
+            "benchmark": "api_run_graph_checkpointed",
+            "params": {"requests": requests},
+            "seconds": summarize(samples),
+        })
+        return results
+
+def bench_api(requests: int, llm_latency: float, tool_latency: float) -> List[Dict[str, Any]]:
+    """Time API endpoints end to end through an in-process ASGI client."""
+    graph_cache.clear()
+    with stub_clients(llm_latency, tool_latency):
+        return asyncio.run(_bench_api(requests))
+
+def seed_tables(size: int) -> int:
+    """Replace graphs and executions with `size` rows each and return the graph holding the executions."""
+    db = SessionLocal()
+    try:
+        db.query(GraphExecution).delete()
+        db.query(Graph).delete()
+        db.commit()
+
+        now = datetime.now()
+        definition = chain_definition(5)
+        db.bulk_insert_mappings(Graph, [
+            {
+                "name": f"graph {index}",
+                "definition": definition,
+                "nodes": definition["nodes"],
+                "edges": definition["edges"],
+                "created_at": now,
+                "updated_at": now,
+            }
+            for index in range(size)
+        ])
+        db.commit()
+
+        graph_id = db.query(Graph.id).order_by(Graph.id).first()[0]
+        db.bulk_insert_mappings(GraphExecution, [
+            {
+                "graph_id": graph_id,
+                "input_data": {"question": f"question {index}"},
+                "output_data": {"answer": "x" * 2000},
+                "execution_time": now - timedelta(seconds=index),
+            }
+            for index in range(size)
+        ])
+        db.commit()
+        return graph_id
+    finally:
+        db.close()
+
+async def _bench_db(size: int, graph_id: int, repeat: int) -> List[Dict[str, Any]]:
+    from app.api.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        first_executions = await client.get(f"/api/graphs/{graph_id}/executions", params={"limit": 50})
+
+        queries = [
+            ("list_graphs_first_page", "/api/graphs", {"limit": 100, "summary": "true"}),
+            ("list_graphs_deep_page", "/api/graphs", {"limit": 100, "summary": "true", "cursor": graph_id + size // 2}),
+            ("list_graphs_full", "/api/graphs", {"limit": 100}),
+            ("history_first_page", f"/api/graphs/{graph_id}/executions", {"limit": 50}),
+            ("history_summary", f"/api/graphs/{graph_id}/executions", {"limit": 50, "summary": "true"}),
+        ]
+        cursor = first_executions.headers.get("x-next-cursor")
+        if cursor:
+            queries.append(("history_second_page", f"/api/graphs/{graph_id}/executions", {"limit": 50, "cursor": cursor}))
+
+        results = []
+        for name, url, params in queries:
+            samples = await _timed_requests(client, "GET", url, repeat, params=params)
+            results.append({
+                "benchmark": f"db_{name}",
+                "params": {"rows": size},
+                "seconds": summarize(samples),
+            })
+        return results
+
+def bench_db(table_sizes: List[int], repeat: int) -> List[Dict[str, Any]]:
+    """Time listing and history queries against tables of each size."""
+    results = []
+    for size in table_sizes:
+        graph_id = seed_tables(size)
+        results.extend(asyncio.run(_bench_db(size, graph_id, repeat)))
+    return results
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+def run_benchmarks(suites: List[str], profile: Dict[str, Any], llm_latency: float, tool_latency: float) -> Dict[str, Any]:
+    """Run the selected suites and return the JSON report."""
+    results: List[Dict[str, Any]] = []
+    if "build" in suites:
+        results += bench_build(profile["build_sizes"])
+    if "run" in suites:
+        results += bench_run(profile["concurrency_levels"], profile["runs"], llm_latency, tool_latency)
+    if "api" in suites:
+        results += bench_api(profile["api_requests"], llm_latency, tool_latency)
+    if "db" in suites:
+        results += bench_db(profile["table_sizes"], max(5, profile["api_requests"] // 4))
+
+    return {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(),
+            "git_revision": git_revision(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "suites": suites,
+            "llm_latency": llm_latency,
+            "tool_latency": tool_latency,
+        },
+        "results": results,
+    }
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark GraphFlow hot paths")
+    parser.add_argument("--suites", default=",".join(SUITES), help=f"Comma-separated suites from {', '.join(SUITES)}")
+    parser.add_argument("--quick", action="store_true", help="Use small sizes, for smoke testing the harness")
+    parser.add_argument("--llm-latency", type=float, default=0.01, help="Seconds each stub LLM call takes")
+    parser.add_argument("--tool-latency", type=float, default=0.005, help="Seconds each stub search call takes")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    parser.add_argument("--baseline", help="Compare against a previous JSON report")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown against the baseline")
+    args = parser.parse_args(argv)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    suites = [suite.strip() for suite in args.suites.split(",") if suite.strip()]
+    unknown = [suite for suite in suites if suite not in SUITES]
+    if unknown:
+        parser.error(f"Unknown suites: {', '.join(unknown)}")
+
+    report = run_benchmarks(suites, PROFILES["quick" if args.quick else "full"], args.llm_latency, args.tool_latency)
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        report["regressions"] = compare(report["results"], baseline.get("results", []), args.tolerance)
+        exit_code = 1 if report["regressions"] else 0
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            output_file.write(output + "\n")
+    else:
+        print(output)
+    return exit_code
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+import asyncio
+import time
+from typing import Any, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+class LatencyChatModel(BaseChatModel):
+    """
+    Chat model stub that answers after a fixed delay.
+
+    The reply echoes the length of the prompt, so outputs are deterministic
+    and differ between inputs. Token usage is reported like a real provider.
+    """
+    latency: float = 0.0
+    reply: str = "stub answer"
+
+    @property
+    def _llm_type(self) -> str:
+        return "latency-stub"
+
+    def _result(self, messages: List[BaseMessage]) -> ChatResult:
+        prompt_length = sum(len(str(message.content)) for message in messages)
+        message = AIMessage(
+            content=f"{self.reply} ({prompt_length} chars)",
+            usage_metadata={"input_tokens": prompt_length // 4, "output_tokens": 8, "total_tokens": prompt_length // 4 + 8}
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        if self.latency:
+            time.sleep(self.latency)
+        return self._result(messages)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._result(messages)
+
+class LatencySearchTool:
+    """Search tool stub with the invoke/ainvoke interface of TavilySearchResults."""
+    def __init__(self, latency: float = 0.0, max_results: int = 3):
+        self.latency = latency
+        self.max_results = max_results
+
+    def _results(self, query: Any) -> List[dict]:
+        return [
+            {"url": f"https://example.com/{index}", "content": f"Result {index} for {query}"}
+            for index in range(self.max_results)
+        ]
+
+    def invoke(self, query: Any) -> List[dict]:
+        if self.latency:
+            time.sleep(self.latency)
+        return self._results(query)
+
+    async def ainvoke(self, query: Any) -> List[dict]:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._results(query)
+
+def chain_definition(node_count: int, llm_every: int = 0) -> dict:
+    """
+    Build a linear graph definition of pass-through nodes.
+
+    Every node reads and writes the "input" key, so the chain runs
+    whatever the state type.
+
+    Args:
+        node_count: Number of nodes in the chain
+        llm_every: Make every n-th node an LLM node, 0 for none
+
+    Returns:
+        A graph definition accepted by compile_definition
+    """
+    nodes = []
+    for index in range(node_count):
+        node_id = f"n{index}"
+        if llm_every and index % llm_every == llm_every - 1:
+            nodes.append({
+                "id": node_id,
+                "type": "llm",
+                "config": {"prompt_template": "Answer: {input}", "input_keys": ["input"], "output_key": "input"}
+            })
+        else:
+            nodes.append({
+                "id": node_id,
+                "type": "human",
+                "config": {"input_key": "input", "output_key": "input"}
+            })
+
+    node_ids = [node["id"] for node in nodes]
+    edges = [{"source": "START", "target": node_ids[0]}]
+    edges += [{"source": source, "target": target} for source, target in zip(node_ids, node_ids[1:])]
+    edges.append({"source": node_ids[-1], "target": "END"})
+    return {"nodes": nodes, "edges": edges}
+
+def agent_definition() -> dict:
+    """A small routed graph: LLM, conditional search, LLM answer."""
+    return {
+        "nodes": [
+            {"id": "plan", "type": "llm", "config": {"prompt_template": "Plan: {input}", "input_keys": ["input"], "output_key": "input"}},
+            {"id": "search", "type": "tool", "config": {"tool_type": "search", "input_key": "input", "output_key": "results"}},
+            {"id": "answer", "type": "llm", "config": {"prompt_template": "Answer using {results}", "input_keys": ["results"], "output_key": "answer"}}
+        ],
+        "edges": [
+            {"source": "START", "target": "plan"},
+            {
+                "source": "plan",
+                "type": "conditional",
+                "condition": {"type": "function", "function": "'search' if len(state['input']) > 3 else 'answer'"},
+                "destinations": ["search", "answer"]
+            },
+            {"source": "search", "target": "answer"},
+            {"source": "answer", "target": "END"}
+        ]
+    }
@@ -0,0 +1,180 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.api import main
+from app.api.cache import graph_definition_cache, run_status_cache
+from app.api.database import Base, get_db
+from app.api.graph_cache import graph_cache
+from app.api.config import settings
+from app.api.models import Graph, GraphExecution, GraphRun
+
+@pytest.fixture
+def session_factory(monkeypatch):
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def override_get_db():
+        db = factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    # Handlers use the dependency, run bookkeeping opens its own sessions
+    main.app.dependency_overrides[get_db] = override_get_db
+    monkeypatch.setattr(main, "SessionLocal", factory)
+    for cache in (graph_definition_cache, run_status_cache, graph_cache):
+        cache.clear()
+    yield factory
+    main.app.dependency_overrides.pop(get_db, None)
+    Base.metadata.drop_all(bind=engine)
+
+@pytest.fixture
+def client(session_factory):
+    return TestClient(main.app)
+
+@pytest.fixture
+def history(session_factory):
+    """A graph with five executions, one minute apart, newest with the highest ID."""
+    start = datetime(2024, 6, 1, 12, 0, 0)
+    db = session_factory()
+    db.add(Graph(id=1, name="graph", nodes=[], edges=[]))
+    for index in range(5):
+        db.add(GraphExecution(
+            graph_id=1,
+            input_data={"index": index},
+            output_data={"result": index},
+            execution_time=start + timedelta(minutes=index)
+        ))
+    db.commit()
+    db.close()
+    return 1
+
+# Test that graphs are only paginated when a limit or cursor is given
+def test_list_graphs_pagination(client, session_factory, monkeypatch):
+    monkeypatch.setattr(settings, "GRAPH_LIST_DEFAULT_LIMIT", 2)
+    db = session_factory()
+    try:
+        db.add_all([Graph(name=f"graph {index}", definition={}, nodes=[], edges=[]) for index in range(5)])
+        db.commit()
+    finally:
+        db.close()
+
+    response = client.get("/api/graphs", params={"summary": "true"})
+    assert len(response.json()) == 5
+    assert "x-next-cursor" not in response.headers
+
+    response = client.get("/api/graphs", params={"limit": 3})
+    assert len(response.json()) == 3
+    cursor = response.headers["x-next-cursor"]
+
+    response = client.get("/api/graphs", params={"cursor": cursor})
+    assert [graph["name"] for graph in response.json()] == ["graph 3", "graph 4"]
+    assert "x-next-cursor" not in response.headers
+
+# Test the first page of the execution history and its next cursor
+def test_execution_history_first_page(client, history):
+    response = client.get(f"/api/graphs/{history}/executions", params={"limit": 2})
+
+    assert response.status_code == 200
+    assert [row["input_data"]["index"] for row in response.json()] == [4, 3]
+    assert response.json()[0]["output_data"] == {"result": 4}
+    assert response.headers["X-Next-Cursor"]
+
+# Test following the cursor to the last page
+def test_execution_history_follows_cursor(client, history):
+    seen = []
+    params = {"limit": 2}
+    while True:
+        response = client.get(f"/api/graphs/{history}/executions", params=params)
+        assert response.status_code == 200
+        seen.extend(row["input_data"]["index"] for row in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+        params = {"limit": 2, "cursor": cursor}
+
+    assert seen == [4, 3, 2, 1, 0]
+
+# Test that a malformed cursor is rejected
+def test_execution_history_bad_cursor(client, history):
+    response = client.get(f"/api/graphs/{history}/executions", params={"cursor": "not-a-cursor"})
+
+    assert response.status_code == 400
+
+# Test that the summary projection leaves out the output
+def test_execution_history_summary(client, history):
+    response = client.get(f"/api/graphs/{history}/executions", params={"summary": True})
+
+    assert response.status_code == 200
+    rows = response.json()
+    assert len(rows) == 5
+    assert all("output_data" not in row for row in rows)
+    assert set(rows[0]) == {"id", "graph_id", "input_data", "execution_time"}
+
+# Test fetching the trace recorded by a run
+def test_run_then_fetch_trace(client):
+    definition = {
+        "nodes": [{"id": "echo", "type": "human", "config": {"input_key": "input", "output_key": "out"}}],
+        "edges": [{"source": "START", "target": "echo"}, {"source": "echo", "target": "END"}]
+    }
+    graph = client.post("/api/graphs", json={"name": "traced", "definition": definition, "nodes": [], "edges": []})
+    assert graph.status_code == 200
+
+    run = client.post(f"/api/graphs/{graph.json()['id']}/run", json={"input": {"text": "hi"}})
+    assert run.status_code == 200
+
+    response = client.get(f"/api/executions/{run.json()['execution_id']}/trace")
+    assert response.status_code == 200
+    trace = response.json()
+    assert trace["status"] == "success"
+    assert trace["nodes_visited"] == ["echo"]
+    assert trace["spans"][0]["node_type"] == "human"
+
+# Test that runs are only recorded for resuming when checkpointing is enabled
+def test_run_records_checkpoints_only_when_enabled(client, session_factory, monkeypatch):
+    definition = {
+        "nodes": [{"id": "echo", "type": "human", "config": {"input_key": "input", "output_key": "out"}}],
+        "edges": [{"source": "START", "target": "echo"}, {"source": "echo", "target": "END"}]
+    }
+    graph_id = client.post("/api/graphs", json={"name": "echo", "definition": definition, "nodes": [], "edges": []}).json()["id"]
+
+    run = client.post(f"/api/graphs/{graph_id}/run", json={"input": {"text": "plain"}})
+    assert run.status_code == 200
+    assert "run_id" not in run.json()
+
+    monkeypatch.setattr(settings, "CHECKPOINT_ENABLED", True)
+    run = client.post(f"/api/graphs/{graph_id}/run", json={"input": {"text": "checkpointed"}})
+    assert run.status_code == 200
+    assert "run_id" in run.json()
+
+    db = session_factory()
+    try:
+        assert db.query(GraphRun).count() == 1
+    finally:
+        db.close()
+
+# Test that traces of unknown executions and runs are not found
+def test_unknown_trace(client):
+    assert client.get("/api/executions/999/trace").status_code == 404
+    assert client.get("/api/runs/999/trace").status_code == 404
+
+# Test that definitions with non-string names are rejected as invalid
+def test_create_graph_with_non_string_type(client):
+    definition = {
+        "nodes": [{"id": "n1", "type": ["llm"]}],
+        "edges": [{"source": "START", "target": "n1"}, {"source": "n1", "target": "END"}]
+    }
+    response = client.post("/api/graphs", json={"name": "bad", "definition": definition, "nodes": [], "edges": []})
+
+    assert response.status_code == 422
@@ -0,0 +1,58 @@
+import asyncio
+from unittest.mock import patch
+
+from app.api.client_registry import client_registry
+from app.api.langgraph_builder import build_langgraph_from_definition, arun_graph
+from benchmarks.report import compare, summarize
+from benchmarks.stubs import LatencyChatModel, LatencySearchTool, agent_definition, chain_definition
+
+# Test summary statistics of benchmark samples
+def test_summarize():
+    stats = summarize([0.4, 0.1, 0.3, 0.2, 0.5])
+
+    assert stats["count"] == 5
+    assert stats["min"] == 0.1
+    assert stats["max"] == 0.5
+    assert stats["p50"] == 0.3
+    assert abs(stats["mean"] - 0.3) < 1e-9
+
+# Test that only benchmarks slower than the tolerance are reported
+def test_compare_reports_regressions():
+    baseline = [
+        {"benchmark": "build_graph", "params": {"nodes": 10}, "seconds": {"p50": 1.0}},
+        {"benchmark": "build_graph", "params": {"nodes": 100}, "seconds": {"p50": 1.0}},
+        {"benchmark": "run_graph", "params": {"concurrency": 8}, "seconds": {"p50": 1.0}, "runs_per_second": 100.0},
+    ]
+    results = [
+        {"benchmark": "build_graph", "params": {"nodes": 10}, "seconds": {"p50": 1.1}},
+        {"benchmark": "build_graph", "params": {"nodes": 100}, "seconds": {"p50": 2.0}},
+        {"benchmark": "run_graph", "params": {"concurrency": 8}, "seconds": {"p50": 1.0}, "runs_per_second": 50.0},
+        {"benchmark": "api_metrics", "params": {"requests": 10}, "seconds": {"p50": 9.0}},
+    ]
+
+    regressions = compare(results, baseline, tolerance=0.25)
+
+    assert [(entry["benchmark"], entry["params"]) for entry in regressions] == [
+        ("build_graph", {"nodes": 100}),
+        ("run_graph", {"concurrency": 8}),
+    ]
+    assert regressions[0]["slowdown"] == 1.0
+
+# Test that the benchmark graphs run against the stub clients
+def test_benchmark_graphs_run_with_stubs():
+    client_registry.clear()
+    with patch(
+        "app.api.langgraph_builder.get_chat_model",
+        lambda model_name, temperature: LatencyChatModel()
+    ), patch(
+        "app.api.langgraph_builder.get_search_tool",
+        lambda max_results: LatencySearchTool(max_results=max_results)
+    ):
+        chain = build_langgraph_from_definition(chain_definition(12, llm_every=5), use_async=True)
+        agent = build_langgraph_from_definition(agent_definition(), use_async=True)
+
+        chain_result = asyncio.run(arun_graph(chain, {"input": "hello"}))
+        agent_result = asyncio.run(arun_graph(agent, {"input": "hello"}))
+
+    assert chain_result["input"].startswith("stub answer")
+    assert agent_result["answer"].startswith("stub answer")
@@ -0,0 +1,257 @@
+import os
+import socket
+import stat
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from app.api.cache import MemoryCache, RedisCache, SQLiteCache, create_cache
+from app.api.llm_cache import LLMResponseCache
+from app.api import server
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class FakeRedisServer:
+    """Just enough of a Redis server for the cache: PING, AUTH, SELECT, GET, SET PX, DEL and SCAN."""
+    def __init__(self, password=None):
+        self.password = password
+        self.data = {}
+        self.expires = {}
+        self.commands = []
+        self.listener = socket.socket()
+        self.listener.bind(("127.0.0.1", 0))
+        self.listener.listen()
+        self.port = self.listener.getsockname()[1]
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while True:
+            try:
+                conn, _ = self.listener.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _read_command(self, reader):
+        line = reader.readline()
+        if not line:
+            return None
+        args = []
+        for _ in range(int(line[1:-2])):
+            length = int(reader.readline()[1:-2])
+            args.append(reader.read(length + 2)[:-2])
+        return args
+
+    def _bulk(self, value):
+        if value is None:
+            return b"$-1\r\n"
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+
+    def _serve(self, conn):
+        reader = conn.makefile("rb")
+        while True:
+            args = self._read_command(reader)
+            if args is None:
+                conn.close()
+                return
+            name = args[0].decode().upper()
+            self.commands.append(name)
+            if name == "AUTH":
+                reply = b"+OK\r\n" if args[1].decode() == self.password else b"-WRONGPASS invalid password\r\n"
+            elif name in ("PING", "SELECT"):
+                reply = b"+OK\r\n"
+            elif name == "GET":
+                key = args[1]
+                if key in self.expires and time.time() >= self.expires[key]:
+                    self.data.pop(key, None)
+                reply = self._bulk(self.data.get(key))
+            elif name == "SET":
+                self.data[args[1]] = args[2]
+                self.expires.pop(args[1], None)
+                if len(args) == 5:
+                    self.expires[args[1]] = time.time() + int(args[4]) / 1000
+                reply = b"+OK\r\n"
+            elif name == "DEL":
+                removed = sum(self.data.pop(key, None) is not None for key in args[1:])
+                reply = b":%d\r\n" % removed
+            elif name == "SCAN":
+                prefix = args[3][:-1]
+                keys = [key for key in self.data if key.startswith(prefix)]
+                reply = b"*2\r\n" + self._bulk(b"0") + b"*%d\r\n" % len(keys) + b"".join(self._bulk(key) for key in keys)
+            else:
+                reply = b"-ERR unknown command\r\n"
+            conn.sendall(reply)
+
+    def close(self):
+        self.listener.close()
+
+@pytest.fixture
+def redis_server():
+    fake = FakeRedisServer(password="secret")
+    yield fake
+    fake.close()
+
+# Test the in-process LRU and expiry
+def test_memory_cache():
+    clock = FakeClock()
+    cache = MemoryCache(max_size=2, clock=clock)
+    cache.set("a", {"value": 1}, ttl=10)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    # b was the least recently used
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+
+    clock.now += 11
+    assert cache.get("a") is None
+
+# Test that two SQLite caches on one file see each other's entries
+def test_sqlite_cache_is_shared(tmp_path):
+    clock = FakeClock()
+    path = str(tmp_path / "cache.db")
+    first = SQLiteCache(path, namespace="graph", clock=clock)
+    second = SQLiteCache(path, namespace="graph", clock=clock)
+    other = SQLiteCache(path, namespace="run", clock=clock)
+    try:
+        first.set("1", {"nodes": []}, ttl=30)
+        other.set("1", "run entry")
+        assert second.get("1") == {"nodes": []}
+
+        second.delete("1")
+        assert first.get("1") is None
+
+        first.set("2", [1, 2], ttl=30)
+        clock.now += 31
+        assert second.get("2") is None
+
+        # Clearing a namespace leaves the others alone
+        first.set("3", "x")
+        second.clear()
+        assert first.get("3") is None
+        assert other.get("1") == "run entry"
+    finally:
+        for cache in (first, second, other):
+            cache.close()
+
+# Test the Redis backend against a minimal server speaking the protocol
+def test_redis_cache(redis_server):
+    cache = RedisCache(port=redis_server.port, password="secret", db=2, namespace="graph")
+    try:
+        assert cache.get("1") is None
+        cache.set("1", {"nodes": ["a"]}, ttl=60)
+        cache.set("2", "two")
+        assert cache.get("1") == {"nodes": ["a"]}
+        assert redis_server.expires[b"graphflow:graph:1"] > time.time()
+        assert redis_server.commands[:2] == ["AUTH", "SELECT"]
+
+        cache.delete("1")
+        assert cache.get("1") is None
+
+        redis_server.data[b"graphflow:run:1"] = b'"kept"'
+        cache.clear()
+        assert cache.get("2") is None
+        assert b"graphflow:run:1" in redis_server.data
+    finally:
+        cache.close()
+
+# Test that a failing or unreachable backend is treated as a miss
+def test_backend_errors_are_misses(redis_server):
+    cache = RedisCache(port=redis_server.port, password="wrong")
+    try:
+        cache.set("a", 1)
+        assert cache.get("a") is None
+    finally:
+        cache.close()
+
+    # Nothing listens on a port that was bound and released
+    unused = socket.socket()
+    unused.bind(("127.0.0.1", 0))
+    port = unused.getsockname()[1]
+    unused.close()
+    cache = RedisCache(port=port, timeout=0.5)
+    cache.set("a", 1)
+    assert cache.get("a") is None
+
+# Test backend selection from a URL
+def test_create_cache(tmp_path):
+    memory = create_cache("memory://?max_size=5", namespace="llm")
+    assert isinstance(memory, MemoryCache) and memory.max_size == 5 and not memory.shared
+
+    sqlite = create_cache(f"sqlite:///{tmp_path / 'cache.db'}")
+    assert isinstance(sqlite, SQLiteCache) and sqlite.path == str(tmp_path / "cache.db")
+
+    redis = create_cache("redis://:pw@cache.internal:6380/3?prefix=app:")
+    assert (redis.host, redis.port, redis.db, redis.password) == ("cache.internal", 6380, 3, "pw")
+
+    with pytest.raises(ValueError):
+        create_cache("memcached://localhost")
+
+# Test that LLM responses stored by one worker are hits in another
+def test_llm_cache_with_shared_backend(tmp_path):
+    path = str(tmp_path / "cache.db")
+    first = LLMResponseCache(persistent=False, backend=SQLiteCache(path, namespace="llm"))
+    second = LLMResponseCache(persistent=False, backend=SQLiteCache(path, namespace="llm"))
+
+    first.set("key", "gpt-4", "cached response")
+
+    assert second.get("key") == "cached response"
+    assert second.stats()["memory_hits"] == 1
+    assert second.stats()["size"] is None
+
+# Test the server entry point and its fallback to a shared cache
+def test_server_main(monkeypatch):
+    # Set first so the variable main() exports is removed after the test
+    monkeypatch.setenv("CACHE_URL", "")
+    monkeypatch.delenv("CACHE_URL")
+    monkeypatch.setenv("RUN_RECONCILE_ON_STARTUP", "true")
+    monkeypatch.setattr(server.settings, "CACHE_URL", "memory://")
+    monkeypatch.setattr(server, "interrupt_runs", lambda: 0)
+    cache_dirs = []
+
+    def check_cache_dir(*args, **kwargs):
+        # The fallback cache lives in a private directory while the server runs
+        cache_dir = os.path.dirname(os.environ["CACHE_URL"][len("sqlite:///"):])
+        assert stat.S_IMODE(os.stat(cache_dir).st_mode) == 0o700
+        cache_dirs.append(cache_dir)
+
+    with patch("uvicorn.run", side_effect=check_cache_dir) as run:
+        server.main(["--workers", "4", "--port", "9000"])
+
+    args, kwargs = run.call_args
+    assert args == ("app.api.main:app",)
+    assert kwargs["workers"] == 4
+    assert kwargs["port"] == 9000
+    assert not os.path.exists(cache_dirs[0])
+    # Workers leave reconciling stale runs to the parent process
+    assert os.environ["RUN_RECONCILE_ON_STARTUP"] == "false"
+
+    with pytest.raises(SystemExit):
+        server.main(["--workers", "2", "--reload"])
+
+# Test that an explicit in-process cache is replaced when several workers start
+def test_server_main_replaces_memory_cache(monkeypatch):
+    monkeypatch.setenv("CACHE_URL", "memory://")
+    monkeypatch.setenv("RUN_RECONCILE_ON_STARTUP", "true")
+    monkeypatch.setattr(server.settings, "CACHE_URL", "memory://")
+    monkeypatch.setattr(server, "interrupt_runs", lambda: 0)
+    cache_urls = []
+
+    with patch("uvicorn.run", side_effect=lambda *args, **kwargs: cache_urls.append(os.environ["CACHE_URL"])):
+        server.main(["--workers", "2"])
+    assert cache_urls[0].startswith("sqlite:///")
+
+    # A single worker keeps the in-process cache
+    monkeypatch.setenv("CACHE_URL", "memory://")
+    with patch("uvicorn.run", side_effect=lambda *args, **kwargs: cache_urls.append(os.environ["CACHE_URL"])):
+        server.main(["--workers", "1"])
+    assert cache_urls[1] == "memory://"
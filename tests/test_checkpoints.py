@@ -0,0 +1,89 @@
+import asyncio
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.api.checkpoints import DatabaseCheckpointSaver, run_thread_id
+from app.api.database import Base
+from app.api.langgraph_builder import arun_graph
+from app.api.models import GraphCheckpoint, GraphCheckpointWrite
+from langgraph.graph import StateGraph, START, END
+
+@pytest.fixture
+def session_factory(tmp_path):
+    # Steps are saved from worker threads, so each session needs its own connection
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'checkpoints.db'}",
+        connect_args={"check_same_thread": False},
+    )
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
+
+def build_chain(checkpointer, calls, failing):
+    """A three-node chain whose nodes record their calls and fail while named in `failing`."""
+    def make_node(name):
+        async def node(state):
+            calls.append(name)
+            if name in failing:
+                raise RuntimeError(f"{name} failed")
+            return {"path": state.get("path", []) + [name]}
+        return node
+
+    graph = StateGraph(dict)
+    for name in ("a", "b", "c"):
+        graph.add_node(name, make_node(name))
+    graph.add_edge(START, "a")
+    graph.add_edge("a", "b")
+    graph.add_edge("b", "c")
+    graph.add_edge("c", END)
+    return graph.compile(checkpointer=checkpointer)
+
+# Test that a failed run resumes from the failed node without re-running earlier ones
+def test_resume_after_failure(session_factory):
+    saver = DatabaseCheckpointSaver(session_factory=session_factory)
+    calls = []
+    failing = {"b"}
+    graph = build_chain(saver, calls, failing)
+    thread_id = run_thread_id(7)
+
+    with pytest.raises(ValueError):
+        asyncio.run(arun_graph(graph, {"path": []}, thread_id=thread_id))
+    assert calls == ["a", "b"]
+
+    snapshot = asyncio.run(graph.aget_state({"configurable": {"thread_id": thread_id}}))
+    assert snapshot.next == ("b",)
+
+    failing.clear()
+    calls.clear()
+    result = asyncio.run(arun_graph(graph, None, thread_id=thread_id))
+
+    assert calls == ["b", "c"]
+    assert result == {"path": ["a", "b", "c"]}
+
+# Test listing checkpoints and deleting a thread
+def test_list_and_delete_thread(session_factory):
+    saver = DatabaseCheckpointSaver(session_factory=session_factory)
+    graph = build_chain(saver, [], set())
+    config = {"configurable": {"thread_id": "run-1"}}
+
+    asyncio.run(arun_graph(graph, {"path": []}, thread_id="run-1"))
+    asyncio.run(arun_graph(graph, {"path": []}, thread_id="run-2"))
+
+    checkpoints = list(saver.list(config))
+    checkpoint_ids = [checkpoint.config["configurable"]["checkpoint_id"] for checkpoint in checkpoints]
+    assert checkpoint_ids == sorted(checkpoint_ids, reverse=True)
+    assert saver.get_tuple(config).config == checkpoints[0].config
+    assert len(list(saver.list(config, limit=2))) == 2
+    assert len(list(saver.list(config, before=checkpoints[0].config))) == len(checkpoints) - 1
+
+    saver.delete_thread("run-1")
+
+    assert saver.get_tuple(config) is None
+    assert saver.get_tuple({"configurable": {"thread_id": "run-2"}}) is not None
+    db = session_factory()
+    try:
+        assert db.query(GraphCheckpoint).filter(GraphCheckpoint.thread_id == "run-1").count() == 0
+        assert db.query(GraphCheckpointWrite).filter(GraphCheckpointWrite.thread_id == "run-1").count() == 0
+    finally:
+        db.close()
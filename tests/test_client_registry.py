@@ -0,0 +1,54 @@
+import pytest
+from unittest.mock import patch
+
+from app.api.client_registry import ClientRegistry
+
+@pytest.fixture
+def registry():
+    registry = ClientRegistry(max_connections=10, max_keepalive_connections=5, keepalive_expiry=15)
+    yield registry
+    registry.close()
+
+# Test that chat models are created once per configuration
+def test_chat_model_reused_per_config(registry):
+    with patch("app.api.client_registry.ChatOpenAI") as mock_chat_openai:
+        mock_chat_openai.side_effect = lambda **kwargs: object()
+
+        first = registry.get_chat_model("gpt-3.5-turbo", 0)
+        second = registry.get_chat_model("gpt-3.5-turbo", 0)
+        other = registry.get_chat_model("gpt-4", 0)
+
+        assert first is second
+        assert first is not other
+        assert mock_chat_openai.call_count == 2
+
+# Test that every chat model shares the same HTTP clients
+def test_chat_models_share_http_pool(registry):
+    with patch("app.api.client_registry.ChatOpenAI") as mock_chat_openai:
+        registry.get_chat_model("gpt-3.5-turbo", 0)
+        registry.get_chat_model("gpt-4", 0.5)
+
+        first_call, second_call = mock_chat_openai.call_args_list
+        assert first_call.kwargs["http_client"] is second_call.kwargs["http_client"]
+        assert first_call.kwargs["http_async_client"] is second_call.kwargs["http_async_client"]
+        assert first_call.kwargs["http_client"] is registry.http_client
+
+# Test that pool limits come from the registry configuration
+def test_pool_limits(registry):
+    assert registry.limits.max_connections == 10
+    assert registry.limits.max_keepalive_connections == 5
+    assert registry.limits.keepalive_expiry == 15
+
+# Test that search tools are created once per configuration
+def test_search_tool_reused_per_config(registry):
+    with patch("app.api.client_registry.TavilySearchResults") as mock_tavily:
+        mock_tavily.side_effect = lambda **kwargs: object()
+
+        first = registry.get_search_tool(3)
+        second = registry.get_search_tool(3)
+        registry.get_search_tool(5)
+
+        assert first is second
+        assert mock_tavily.call_count == 2
+        mock_tavily.assert_any_call(max_results=3)
+        mock_tavily.assert_any_call(max_results=5)
@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+
+from app.api.cache import MemoryCache
+from app.api.coalescing import RunCoalescer, run_key
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def counting_run(results, delay=0.02):
+    """A run returning `results` in order after a delay, counting its executions."""
+    calls = []
+
+    async def execute():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return results[len(calls) - 1]
+    return execute, calls
+
+# Test that the key ignores input key order but not the graph version
+def test_run_key():
+    assert run_key(1, "abc", {"a": 1, "b": [1, 2]}) == run_key(1, "abc", {"b": [1, 2], "a": 1})
+    assert run_key(1, "abc", {"a": 1}) != run_key(1, "def", {"a": 1})
+    assert run_key(1, "abc", {"a": 1}) != run_key(2, "abc", {"a": 1})
+    assert run_key(1, "abc", {"a": 1}) != run_key(1, "abc", {"a": 2})
+
+# Test that identical concurrent runs execute once and share the response
+def test_concurrent_runs_execute_once():
+    coalescer = RunCoalescer()
+    execute, calls = counting_run([{"result": "first"}, {"result": "second"}])
+
+    async def scenario():
+        return await asyncio.gather(*[coalescer.run("key", execute) for _ in range(5)])
+
+    outcomes = asyncio.run(scenario())
+
+    assert len(calls) == 1
+    assert [response for response, _ in outcomes] == [{"result": "first"}] * 5
+    assert [coalesced for _, coalesced in outcomes] == [False, True, True, True, True]
+    assert coalescer.in_flight == 0
+
+    # Without a result cache the next request runs again
+    response, coalesced = asyncio.run(coalescer.run("key", execute))
+    assert response == {"result": "second"} and not coalesced
+
+# Test that a failure is shared by every waiter and not remembered
+def test_failures_are_shared():
+    coalescer = RunCoalescer(result_ttl=60, result_cache=MemoryCache())
+    calls = []
+
+    async def failing():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise RuntimeError("node failed")
+
+    async def scenario():
+        return await asyncio.gather(*[coalescer.run("key", failing) for _ in range(3)], return_exceptions=True)
+
+    outcomes = asyncio.run(scenario())
+
+    assert len(calls) == 1
+    assert all(isinstance(outcome, RuntimeError) for outcome in outcomes)
+    with pytest.raises(RuntimeError):
+        asyncio.run(coalescer.run("key", failing))
+    assert len(calls) == 2
+
+# Test that a waiter going away does not cancel the run for the others
+def test_cancelled_waiter_does_not_cancel_run():
+    coalescer = RunCoalescer()
+    execute, calls = counting_run([{"result": "done"}], delay=0.05)
+
+    async def scenario():
+        leader = asyncio.create_task(coalescer.run("key", execute))
+        await asyncio.sleep(0.01)
+        follower = asyncio.create_task(coalescer.run("key", execute))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        return await follower
+
+    response, coalesced = asyncio.run(scenario())
+
+    assert response == {"result": "done"} and coalesced
+    assert len(calls) == 1
+
+# Test reusing completed responses until the result cache entry expires
+def test_result_cache():
+    clock = FakeClock()
+    coalescer = RunCoalescer(result_ttl=5, result_cache=MemoryCache(clock=clock))
+    execute, calls = counting_run([{"result": "first"}, {"result": "second"}], delay=0)
+
+    assert asyncio.run(coalescer.run("key", execute)) == ({"result": "first"}, False)
+    assert asyncio.run(coalescer.run("key", execute)) == ({"result": "first"}, True)
+
+    clock.now += 6
+    assert asyncio.run(coalescer.run("key", execute)) == ({"result": "second"}, False)
+    assert len(calls) == 2
@@ -0,0 +1,40 @@
+import asyncio
+import pytest
+
+from app.api import database
+from app.api.config import settings
+from app.api.database import engine_options, async_database_url, get_async_db
+
+# Test that pool settings are applied to file and server databases
+def test_engine_options_pool_settings():
+    options = engine_options("postgresql://user:secret@db:5432/graphflow")
+
+    assert options["pool_size"] == settings.DATABASE_POOL_SIZE
+    assert options["max_overflow"] == settings.DATABASE_MAX_OVERFLOW
+    assert options["pool_timeout"] == settings.DATABASE_POOL_TIMEOUT
+    assert options["pool_recycle"] == settings.DATABASE_POOL_RECYCLE
+    assert options["pool_pre_ping"] == settings.DATABASE_POOL_PRE_PING
+    assert "pool_size" in engine_options("sqlite:///./graphflow.db")
+
+# Test that in-memory SQLite does not get queue pool settings
+def test_engine_options_memory_sqlite():
+    assert "pool_size" not in engine_options("sqlite:///:memory:")
+    assert "max_overflow" not in engine_options("sqlite://")
+
+# Test deriving the async URL from the sync URL
+def test_async_database_url():
+    assert async_database_url("sqlite:///./graphflow.db") == "sqlite+aiosqlite:///./graphflow.db"
+    assert async_database_url("postgresql+psycopg2://user@db/graphflow") == "postgresql+asyncpg://user@db/graphflow"
+
+    with pytest.raises(ValueError):
+        async_database_url("oracle://user@db/graphflow")
+
+# Test that the async dependency fails clearly when not configured
+def test_get_async_db_not_configured(monkeypatch):
+    monkeypatch.setattr(database, "AsyncSessionLocal", None)
+
+    async def first_session():
+        return await get_async_db().__anext__()
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(first_session())
@@ -134,7 +134,7 @@ def test_delete_nonexistent_graph(test_db):
     
     assert response.status_code == 404  # Not Found
 
-@patch("app.api.langgraph_builder.ChatOpenAI")
+@patch("app.api.client_registry.ChatOpenAI")
 def test_run_graph_missing_input(mock_chat_openai, test_db, sample_graph_definition):
     # Create a test graph
     response = client.post(
@@ -157,7 +157,7 @@ def test_run_graph_missing_input(mock_chat_openai, test_db, sample_graph_definit
     
     assert response.status_code == 422  # Unprocessable Entity
 
-@patch("app.api.langgraph_builder.ChatOpenAI")
+@patch("app.api.client_registry.ChatOpenAI")
 def test_run_graph_llm_error(mock_chat_openai, test_db, sample_graph_definition):
     # Mock the ChatOpenAI class to raise an exception
     mock_llm_instance = MagicMock()
@@ -221,20 +221,8 @@ def test_invalid_node_type(test_db):
         }
     )
     
-    assert response.status_code == 200  # Should still create the graph
-    
-    graph_id = response.json()["id"]
-    
-    # Test running the graph with an invalid node type
-    response = client.post(
-        f"/graphs/{graph_id}/run",
-        json={
-            "input": "Test input"
-        }
-    )
-    
-    assert response.status_code == 500  # Internal Server Error
-    assert "error" in response.json()
+    # Definitions are validated when they are saved
+    assert response.status_code == 422  # Unprocessable Entity
 
 def test_invalid_edge_configuration(test_db):
     # Test creating a graph with invalid edge configuration
@@ -286,20 +274,8 @@ def test_invalid_edge_configuration(test_db):
         }
     )
     
-    assert response.status_code == 200  # Should still create the graph
-    
-    graph_id = response.json()["id"]
-    
-    # Test running the graph with invalid edge configuration
-    response = client.post(
-        f"/graphs/{graph_id}/run",
-        json={
-            "input": "Test input"
-        }
-    )
-    
-    assert response.status_code == 500  # Internal Server Error
-    assert "error" in response.json()
+    # Definitions are validated when they are saved
+    assert response.status_code == 422  # Unprocessable Entity
 
 def test_run_nonexistent_graph(test_db):
     # Test running a graph that doesn't exist
@@ -0,0 +1,82 @@
+import pytest
+
+from app.api.expressions import (
+    compile_expression,
+    ExpressionError
+)
+from app.api.langgraph_builder import create_router_function
+
+@pytest.fixture
+def state():
+    return {
+        "query": "Search HTTP docs",
+        "score": 0.9,
+        "tags": ["urgent", "billing"],
+        "decision": {"action": "search"},
+        "count": 3
+    }
+
+# Test supported expressions
+@pytest.mark.parametrize("source,expected", [
+    ('state["score"] >= 0.8', True),
+    ('state["decision"]["action"] == "search"', True),
+    ('"urgent" in state["tags"]', True),
+    ('"refund" not in state["tags"]', True),
+    ('state["query"].lower().startswith("search")', True),
+    ('state.get("missing", "fallback")', "fallback"),
+    ('state.get("missing") is None', True),
+    ('state["count"] > 1 and not state["score"] < 0.5', True),
+    ('state["count"] > 5 or state["score"] > 0.5', True),
+    ('0 < state["count"] <= 3', True),
+    ('state["count"] * 2 - 1', 5),
+    ('len(state["tags"])', 2),
+    ('state["decision"]["action"] in ("search", "browse")', True),
+    ('"node_a" if state["score"] > 0.5 else "node_b"', "node_a"),
+])
+def test_supported_expressions(state, source, expected):
+    assert compile_expression(source)(state) == expected
+
+# Test that unsafe or unsupported syntax is rejected at compile time
+@pytest.mark.parametrize("source", [
+    '__import__("os").system("ls")',
+    'state.__class__',
+    'open("/etc/passwd")',
+    'lambda: 1',
+    '[x for x in state]',
+    'state["query"].format(1)',
+    'other["key"]',
+    'state["key"',
+    '',
+    '"a" * 300000000',
+    '300000000 * "a"',
+    '["a"] * 300000000',
+    '"x".replace("", "y")',
+])
+def test_rejected_expressions(source):
+    with pytest.raises(ExpressionError):
+        compile_expression(source)
+
+# Test that sequences read from the state cannot be repeated either
+def test_sequence_repetition_rejected_at_runtime(state):
+    evaluator = compile_expression('state["query"] * state["count"]')
+    
+    with pytest.raises(ExpressionError):
+        evaluator(state)
+    with pytest.raises(ExpressionError):
+        compile_expression('state["count"] * state["tags"]')(state)
+
+# Test that compiled expressions are cached by source
+def test_compile_is_cached():
+    assert compile_expression('state["count"] > 1') is compile_expression('state["count"] > 1')
+
+# Test routing with a function condition
+def test_function_router():
+    router = create_router_function(
+        {"type": "function", "function": '"node2" if state["score"] > 0.5 else "node3"', "default": "node3"},
+        ["node2", "node3"]
+    )
+    
+    assert router({"score": 0.9}) == "node2"
+    assert router({"score": 0.1}) == "node3"
+    # Missing keys fall back to the default route
+    assert router({}) == "node3"
@@ -0,0 +1,137 @@
+import pytest
+from unittest.mock import MagicMock
+
+from app.api.graph_cache import CompiledGraphCache, NodeFunctionCache, hash_definition
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def sample_definition():
+    return {
+        "nodes": [{"id": "node1", "type": "human", "config": {}}],
+        "edges": [
+            {"source": "START", "target": "node1"},
+            {"source": "node1", "target": "END"}
+        ],
+        "state_type": "dict"
+    }
+
+# Test that the hash ignores key order but tracks content
+def test_hash_definition_is_stable(sample_definition):
+    reordered = {
+        "state_type": "dict",
+        "edges": sample_definition["edges"],
+        "nodes": sample_definition["nodes"]
+    }
+    assert hash_definition(sample_definition) == hash_definition(reordered)
+
+    changed = dict(sample_definition, state_type="other")
+    assert hash_definition(sample_definition) != hash_definition(changed)
+
+# Test that a second lookup reuses the compiled graph
+def test_get_or_build_reuses_compiled_graph(sample_definition):
+    cache = CompiledGraphCache(max_size=4, ttl_seconds=60)
+    builder = MagicMock(side_effect=lambda definition: object())
+
+    first = cache.get_or_build(1, sample_definition, builder)
+    second = cache.get_or_build(1, sample_definition, builder)
+
+    assert first is second
+    builder.assert_called_once_with(sample_definition)
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+# Test that a changed definition is rebuilt
+def test_changed_definition_is_rebuilt(sample_definition):
+    cache = CompiledGraphCache(max_size=4, ttl_seconds=60)
+    builder = MagicMock(side_effect=lambda definition: object())
+
+    cache.get_or_build(1, sample_definition, builder)
+    cache.get_or_build(1, dict(sample_definition, state_type="other"), builder)
+
+    assert builder.call_count == 2
+
+# Test least recently used eviction
+def test_lru_eviction():
+    cache = CompiledGraphCache(max_size=2, ttl_seconds=60)
+    cache.put(1, "a", "graph1")
+    cache.put(2, "b", "graph2")
+
+    # Touch graph 1 so graph 2 becomes the eviction candidate
+    assert cache.get(1, "a") == "graph1"
+    cache.put(3, "c", "graph3")
+
+    assert cache.get(2, "b") is None
+    assert cache.get(1, "a") == "graph1"
+    assert cache.get(3, "c") == "graph3"
+    assert cache.stats()["evictions"] == 1
+
+# Test TTL expiry
+def test_ttl_expiry():
+    clock = FakeClock()
+    cache = CompiledGraphCache(max_size=2, ttl_seconds=10, clock=clock)
+    cache.put(1, "a", "graph1")
+
+    clock.now = 5
+    assert cache.get(1, "a") == "graph1"
+
+    clock.now = 11
+    assert cache.get(1, "a") is None
+    assert len(cache) == 0
+
+# Test invalidating every version of a graph
+def test_invalidate_graph():
+    cache = CompiledGraphCache(max_size=4, ttl_seconds=60)
+    cache.put(1, "a", "graph1-v1")
+    cache.put(1, "b", "graph1-v2")
+    cache.put(2, "c", "graph2")
+
+    assert cache.invalidate(1) == 2
+    assert cache.get(1, "a") is None
+    assert cache.get(1, "b") is None
+    assert cache.get(2, "c") == "graph2"
+
+# Test that node functions are reused by content and dropped after two builds without use
+def test_node_function_cache_reuse_and_pruning():
+    cache = NodeFunctionCache()
+    factory = MagicMock(side_effect=lambda: object())
+
+    generation = cache.start_build()
+    first = cache.get_or_create({"node": "a", "config": {"x": 1}}, factory, generation)
+    cache.get_or_create({"node": "b", "config": {"x": 1}}, factory, generation)
+    cache.finish_build(generation)
+
+    generation = cache.start_build()
+    assert cache.get_or_create({"config": {"x": 1}, "node": "a"}, factory, generation) is first
+    cache.finish_build(generation)
+    assert factory.call_count == 2
+    assert len(cache) == 2
+
+    # Node b was last used two builds ago
+    generation = cache.start_build()
+    cache.get_or_create({"node": "a", "config": {"x": 1}}, factory, generation)
+    cache.finish_build(generation)
+    assert len(cache) == 1
+    assert (cache.reused, cache.created) == (2, 2)
+
+# Test that node functions survive invalidation but not deletion or eviction
+def test_node_functions_lifetime():
+    cache = CompiledGraphCache(max_size=1, ttl_seconds=60)
+    node_functions = cache.node_functions(1)
+    cache.put(1, "a", "graph1")
+
+    cache.invalidate(1)
+    assert cache.node_functions(1) is node_functions
+
+    cache.invalidate(1, node_functions=True)
+    assert cache.node_functions(1) is not node_functions
+
+    node_functions = cache.node_functions(1)
+    cache.put(1, "b", "graph1")
+    cache.put(2, "c", "graph2")
+    assert cache.node_functions(1) is not node_functions
@@ -0,0 +1,251 @@
+import pytest
+from unittest.mock import patch
+
+from app.api.client_registry import client_registry
+from app.api.graph_compiler import compile_definition, GraphValidationError
+from app.api.langgraph_builder import build_langgraph_from_definition
+
+@pytest.fixture
+def sample_graph_definition():
+    return {
+        "nodes": [
+            {
+                "id": "node1",
+                "type": "llm",
+                "config": {"input_key": "input", "output_key": "output"}
+            },
+            {
+                "id": "node2",
+                "type": "transform"
+            },
+            {
+                "id": "node3",
+                "type": "human",
+                "config": {}
+            }
+        ],
+        "edges": [
+            {"source": "START", "target": "node1"},
+            {"source": "node1", "target": "node2"},
+            {
+                "source": "node2",
+                "target": "node3",
+                "type": "conditional",
+                "condition": {"type": "function", "function": '"node1" if state.get("retry") else "node3"'},
+                "destinations": ["node1", "node3"]
+            },
+            {"source": "node3", "target": "END"}
+        ],
+        "state_type": "dict"
+    }
+
+def compile_errors(definition):
+    with pytest.raises(GraphValidationError) as exc_info:
+        compile_definition(definition)
+    return exc_info.value.errors
+
+# Test compiling a valid definition
+def test_compile_valid_definition(sample_graph_definition):
+    compiled = compile_definition(sample_graph_definition)
+    
+    # Defaults are filled in so the builder does not need to
+    assert compiled["nodes"][1] == {"id": "node2", "type": "transform", "config": {}}
+    assert compiled["edges"][0]["type"] == "default"
+    assert compiled["entry_points"] == ["node1"]
+    assert compiled["state_type"] == "dict"
+    
+    # node1 -> node2 -> node1 is a loop with an exit through node3
+    assert compiled["cycles"] == [["node1", "node2"]]
+    assert compiled["order"].index("node3") > compiled["order"].index("node2")
+
+# Test that a linear graph is topologically ordered
+def test_linear_order():
+    definition = {
+        "nodes": [{"id": node_id, "type": "human"} for node_id in ["c", "a", "b"]],
+        "edges": [
+            {"source": "START", "target": "a"},
+            {"source": "a", "target": "b"},
+            {"source": "b", "target": "c"},
+            {"source": "c", "target": "END"}
+        ]
+    }
+    
+    compiled = compile_definition(definition)
+    
+    assert compiled["order"] == ["a", "b", "c"]
+    assert compiled["cycles"] == []
+
+# Test rejecting unknown node types
+def test_unknown_node_type(sample_graph_definition):
+    sample_graph_definition["nodes"][0]["type"] = "invalid_type"
+    
+    errors = compile_errors(sample_graph_definition)
+    
+    assert errors == ["Node 'node1' has unknown type 'invalid_type'"]
+
+# Test rejecting missing edge targets
+def test_missing_edge_target(sample_graph_definition):
+    sample_graph_definition["edges"].append({"source": "node3", "target": "node9"})
+    
+    errors = compile_errors(sample_graph_definition)
+    
+    assert "unknown target 'node9'" in errors[0]
+
+# Test rejecting conditional edges without destinations
+def test_conditional_edge_without_destinations(sample_graph_definition):
+    del sample_graph_definition["edges"][2]["destinations"]
+    
+    errors = compile_errors(sample_graph_definition)
+    
+    assert "missing 'destinations'" in errors[0]
+
+# Test rejecting invalid routing expressions
+def test_invalid_routing_expression(sample_graph_definition):
+    sample_graph_definition["edges"][2]["condition"]["function"] = '__import__("os")'
+    
+    errors = compile_errors(sample_graph_definition)
+    
+    assert "Edge 2" in errors[0]
+
+# Test rejecting unreachable nodes
+def test_unreachable_node(sample_graph_definition):
+    sample_graph_definition["nodes"].append({"id": "orphan", "type": "human"})
+    
+    errors = compile_errors(sample_graph_definition)
+    
+    assert errors == ["Nodes are unreachable from START: ['orphan']"]
+
+# Test rejecting cycles with no exit
+def test_cycle_without_exit():
+    definition = {
+        "nodes": [{"id": "a", "type": "human"}, {"id": "b", "type": "human"}],
+        "edges": [
+            {"source": "START", "target": "a"},
+            {"source": "a", "target": "b"},
+            {"source": "b", "target": "a"}
+        ]
+    }
+    
+    errors = compile_errors(definition)
+    
+    assert errors == ["Nodes are in a cycle with no exit: ['a', 'b']"]
+
+# Test rejecting definitions without nodes
+def test_missing_nodes():
+    errors = compile_errors({"edges": []})
+    
+    assert errors == ["Definition must contain a non-empty 'nodes' list"]
+
+# Test that the compiled definition can be built directly
+def test_compiled_definition_builds(sample_graph_definition):
+    client_registry.clear()
+    with patch("app.api.client_registry.ChatOpenAI"):
+        compiled_graph = build_langgraph_from_definition(compile_definition(sample_graph_definition))
+    client_registry.clear()
+    
+    assert set(compiled_graph.nodes) >= {"node1", "node2", "node3"}
+
+# Test compiling parallel edges and join nodes
+def test_parallel_edges_and_join():
+    definition = {
+        "nodes": [
+            {"id": "split", "type": "human"},
+            {"id": "a", "type": "human"},
+            {"id": "b", "type": "human"},
+            {"id": "join", "type": "join", "config": {"reducers": {"out": {"type": "list", "input_keys": ["x"]}}}}
+        ],
+        "edges": [
+            {"source": "START", "target": "split"},
+            {"source": "split", "type": "parallel", "targets": ["a", "b"]},
+            {"source": "a", "target": "join"},
+            {"source": "b", "target": "join"},
+            {"source": "join", "target": "END"}
+        ]
+    }
+    
+    compiled = compile_definition(definition)
+    
+    assert compiled["edges"][1] == {"source": "split", "type": "parallel", "targets": ["a", "b"]}
+    assert compiled["order"][0] == "split"
+    assert compiled["order"][-1] == "join"
+
+# Test rejecting unknown join reducers and parallel targets
+def test_invalid_parallel_configuration():
+    definition = {
+        "nodes": [
+            {"id": "split", "type": "human"},
+            {"id": "join", "type": "join", "config": {"reducers": {"out": {"type": "average"}}}}
+        ],
+        "edges": [
+            {"source": "START", "target": "split"},
+            {"source": "split", "type": "parallel", "targets": ["missing"]},
+            {"source": "split", "target": "join"},
+            {"source": "join", "target": "END"}
+        ]
+    }
+    
+    errors = compile_errors(definition)
+    
+    assert "Join node 'join' reducer 'out' has unknown type 'average'" in errors
+    assert any("unknown targets ['missing']" in error for error in errors)
+
+# Test rejecting invalid timeout, retry and circuit breaker settings
+def test_invalid_node_policy():
+    definition = {
+        "nodes": [
+            {"id": "llm", "type": "llm", "config": {"timeout": -1, "retries": 1.5, "circuit_breaker": "yes"}}
+        ],
+        "edges": [
+            {"source": "START", "target": "llm"},
+            {"source": "llm", "target": "END"}
+        ]
+    }
+    
+    errors = compile_errors(definition)
+    
+    assert "Node 'llm' 'timeout' must be a non-negative number" in errors
+    assert "Node 'llm' 'retries' must be a non-negative integer" in errors
+    assert "Node 'llm' 'circuit_breaker' must be true or false" in errors
+
+# Test that non-string names are reported instead of failing on lookups
+def test_non_string_values(sample_graph_definition):
+    sample_graph_definition["nodes"][0]["type"] = ["llm"]
+    sample_graph_definition["edges"][1]["source"] = ["node1"]
+    sample_graph_definition["edges"][3]["target"] = {"id": "END"}
+    sample_graph_definition["edges"][2]["destinations"] = [["node1"], "node3"]
+    
+    errors = compile_errors(sample_graph_definition)
+    
+    assert "Node 'node1' has unknown type '['llm']'" in errors
+    assert any("unknown source '['node1']'" in error for error in errors)
+    assert any("unknown target '{'id': 'END'}'" in error for error in errors)
+    assert any("unknown destinations [['node1']]" in error for error in errors)
+    
+    # Routing functions and join settings too
+    definition = {
+        "nodes": [
+            {"id": "split", "type": "human"},
+            {"id": "join", "type": "join", "config": {"wait_for": [["split"]], "reducers": {"out": {"type": ["list"]}}}}
+        ],
+        "edges": [
+            {"source": "START", "target": "split"},
+            {"source": "split", "type": "parallel", "targets": [{"id": "join"}]},
+            {
+                "source": "split",
+                "type": "conditional",
+                "condition": {"type": "function", "function": ["join"]},
+                "destinations": ["join"]
+            },
+            {"source": "join", "target": "END"}
+        ]
+    }
+    
+    errors = compile_errors(definition)
+    
+    assert "Join node 'join' reducer 'out' has unknown type '['list']'" in errors
+    assert any("unknown targets [{'id': 'join'}]" in error for error in errors)
+    assert any("condition 'function' must be a string" in error for error in errors)
+    
+    del definition["edges"][1:3]
+    definition["nodes"][1]["config"]["reducers"] = {}
+    assert compile_errors(definition) == ["Join node 'join' waits for unknown nodes [['split']]"]
@@ -145,7 +145,7 @@ def test_list_graphs(test_db, sample_graph_definition):
     assert data[1]["name"] == "Test Graph 1"
     assert data[2]["name"] == "Test Graph 2"
 
-@patch("app.api.langgraph_builder.ChatOpenAI")
+@patch("app.api.client_registry.ChatOpenAI")
 def test_run_graph(mock_chat_openai, test_db, sample_graph_definition):
     # Mock the ChatOpenAI class
     mock_llm_instance = MagicMock()
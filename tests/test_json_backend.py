@@ -0,0 +1,40 @@
+import json
+import pytest
+from datetime import datetime
+
+from app.api.json_backend import JSONBackend, FastJSONResponse
+
+# Test that both backends produce equivalent JSON
+@pytest.mark.parametrize("backend", ["orjson", "stdlib"])
+def test_round_trip(backend):
+    encoder = JSONBackend(backend)
+    value = {"text": "héllo", "items": [1, 2.5, None, True], "nested": {"a": {"b": []}}}
+
+    assert encoder.name == backend
+    assert encoder.loads(encoder.dumps(value)) == value
+    assert json.loads(encoder.dumps_bytes(value)) == value
+
+# Test values the standard encoder does not know
+@pytest.mark.parametrize("backend", ["orjson", "stdlib"])
+def test_fallback_values(backend):
+    encoder = JSONBackend(backend)
+    value = {"when": datetime(2024, 1, 2, 3, 4, 5), "obj": object(), 1: "int key", "big": 2 ** 70}
+
+    result = encoder.loads(encoder.dumps(value))
+
+    assert result["when"] == "2024-01-02T03:04:05"
+    assert result["obj"].startswith("<object object")
+    assert result["1"] == "int key"
+    assert result["big"] == 2 ** 70
+
+# Test that unknown backends are rejected
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        JSONBackend("simplejson")
+
+# Test that responses render compact JSON
+def test_fast_json_response():
+    response = FastJSONResponse({"id": 1, "created_at": datetime(2024, 1, 2)})
+
+    assert json.loads(response.body) == {"id": 1, "created_at": "2024-01-02T00:00:00"}
+    assert response.media_type == "application/json"
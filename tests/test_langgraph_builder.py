@@ -1,13 +1,29 @@
 import pytest
 import json
-from unittest.mock import patch, MagicMock
+import asyncio
+import inspect
+import time
+from unittest.mock import patch, MagicMock, AsyncMock, ANY
+from app.api.client_registry import client_registry
 from app.api.langgraph_builder import (
     build_langgraph_from_definition,
     create_node_function,
     create_router_function,
-    run_graph
+    run_graph,
+    arun_graph,
+    arun_graph_batch,
+    astream_graph
 )
+from app.api.graph_cache import NodeFunctionCache
 from langgraph.graph import StateGraph, START, END
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+@pytest.fixture(autouse=True)
+def clear_client_registry():
+    # Clients are cached per configuration, so start every test empty
+    client_registry.clear()
+    yield
+    client_registry.clear()
 
 # Test building a simple graph with two nodes
 def test_build_simple_graph():
@@ -52,7 +68,7 @@ def test_build_simple_graph():
     }
     
     # Mock the ChatOpenAI class
-    with patch("app.api.langgraph_builder.ChatOpenAI") as mock_chat_openai:
+    with patch("app.api.client_registry.ChatOpenAI") as mock_chat_openai:
         # Build the graph
         graph = build_langgraph_from_definition(definition)
         
@@ -62,7 +78,9 @@ def test_build_simple_graph():
         # Assert that ChatOpenAI was called with the correct parameters
         mock_chat_openai.assert_called_once_with(
             model_name="gpt-3.5-turbo",
-            temperature=0
+            temperature=0,
+            http_client=ANY,
+            http_async_client=ANY
         )
 
 # Test building a graph with conditional edges
@@ -146,8 +164,8 @@ def test_build_graph_with_conditional_edges():
     }
     
     # Mock the necessary classes
-    with patch("app.api.langgraph_builder.ChatOpenAI") as mock_chat_openai, \
-         patch("app.api.langgraph_builder.TavilySearchResults") as mock_tavily:
+    with patch("app.api.client_registry.ChatOpenAI") as mock_chat_openai, \
+         patch("app.api.client_registry.TavilySearchResults") as mock_tavily:
         # Build the graph
         graph = build_langgraph_from_definition(definition)
         
@@ -156,8 +174,8 @@ def test_build_graph_with_conditional_edges():
         
         # Assert that ChatOpenAI was called twice with different parameters
         assert mock_chat_openai.call_count == 2
-        mock_chat_openai.assert_any_call(model_name="gpt-3.5-turbo", temperature=0)
-        mock_chat_openai.assert_any_call(model_name="gpt-4", temperature=0.5)
+        mock_chat_openai.assert_any_call(model_name="gpt-3.5-turbo", temperature=0, http_client=ANY, http_async_client=ANY)
+        mock_chat_openai.assert_any_call(model_name="gpt-4", temperature=0.5, http_client=ANY, http_async_client=ANY)
         
         # Assert that TavilySearchResults was called
         mock_tavily.assert_called_once_with(max_results=3)
@@ -187,6 +205,36 @@ def test_build_graph_error_handling():
     with pytest.raises(ValueError):
         build_langgraph_from_definition(invalid_definition)
 
+# Test that a rebuild after an edit only recreates the changed node
+def test_rebuild_reuses_unchanged_nodes():
+    def definition(second_output):
+        return {
+            "nodes": [
+                {"id": "first", "type": "human", "config": {"input_key": "input", "output_key": "input"}},
+                {"id": "second", "type": "human", "config": {"input_key": "input", "output_key": second_output}}
+            ],
+            "edges": [
+                {"source": "START", "target": "first"},
+                {
+                    "source": "first",
+                    "type": "conditional",
+                    "condition": {"type": "function", "function": "'second'"},
+                    "destinations": ["second"]
+                },
+                {"source": "second", "target": "END"}
+            ]
+        }
+
+    node_functions = NodeFunctionCache()
+    with patch("app.api.langgraph_builder.create_node_function", wraps=create_node_function) as create_node, \
+         patch("app.api.langgraph_builder.create_router_function", wraps=create_router_function) as create_router:
+        build_langgraph_from_definition(definition("answer"), node_functions=node_functions)
+        graph = build_langgraph_from_definition(definition("reply"), node_functions=node_functions)
+
+    assert create_node.call_count == 3
+    assert create_router.call_count == 1
+    assert run_graph(graph, {"input": "hello"}) == {"reply": "hello"}
+
 # Test creating different types of node functions
 def test_create_node_functions():
     # Test LLM node
@@ -213,8 +261,8 @@ def test_create_node_functions():
     }
     
     # Mock the necessary classes
-    with patch("app.api.langgraph_builder.ChatOpenAI") as mock_chat_openai, \
-         patch("app.api.langgraph_builder.TavilySearchResults") as mock_tavily:
+    with patch("app.api.client_registry.ChatOpenAI") as mock_chat_openai, \
+         patch("app.api.client_registry.TavilySearchResults") as mock_tavily:
         # Create the node functions
         llm_node = create_node_function("llm", llm_config)
         tool_node = create_node_function("tool", tool_config)
@@ -228,7 +276,9 @@ def test_create_node_functions():
         # Assert that ChatOpenAI was called with the correct parameters
         mock_chat_openai.assert_called_once_with(
             model_name="gpt-3.5-turbo",
-            temperature=0
+            temperature=0,
+            http_client=ANY,
+            http_async_client=ANY
         )
         
         # Assert that TavilySearchResults was called with the correct parameters
@@ -257,4 +307,179 @@ def test_run_graph_error_handling():
     
     # Assert that running the graph raises a ValueError
     with pytest.raises(ValueError):
-        run_graph(mock_graph, {"input": "test input"}) 
\ No newline at end of file
+        run_graph(mock_graph, {"input": "test input"}) 
+
+# Test creating async node functions
+def test_create_async_node_functions():
+    llm_config = {
+        "model_name": "gpt-3.5-turbo",
+        "temperature": 0,
+        "input_key": "input",
+        "output_key": "output"
+    }
+    
+    with patch("app.api.client_registry.ChatOpenAI") as mock_chat_openai:
+        mock_llm_instance = MagicMock()
+        mock_llm_instance.ainvoke = AsyncMock(return_value=MagicMock(content="async result"))
+        mock_chat_openai.return_value = mock_llm_instance
+        
+        llm_node = create_node_function("llm", llm_config, use_async=True)
+        transform_node = create_node_function("transform", {"transform_type": "extract_json"}, use_async=True)
+        
+        # I/O-bound nodes become coroutines, CPU-only nodes stay synchronous
+        assert inspect.iscoroutinefunction(llm_node)
+        assert not inspect.iscoroutinefunction(transform_node)
+        
+        result = asyncio.run(llm_node({"input": "test input"}))
+        
+        assert result == {"output": "async result"}
+        mock_llm_instance.ainvoke.assert_awaited_once_with("test input")
+        mock_llm_instance.invoke.assert_not_called()
+
+# Test running a graph asynchronously
+def test_arun_graph():
+    mock_graph = MagicMock()
+    mock_graph.ainvoke = AsyncMock(return_value={"output": "test result"})
+    
+    result = asyncio.run(arun_graph(mock_graph, {"input": "test input"}))
+    
+    mock_graph.ainvoke.assert_awaited_once_with({"input": "test input"})
+    mock_graph.invoke.assert_not_called()
+    assert result == {"output": "test result"}
+
+# Test error handling when running a graph asynchronously
+def test_arun_graph_error_handling():
+    mock_graph = MagicMock()
+    mock_graph.ainvoke = AsyncMock(side_effect=Exception("Test error"))
+    
+    with pytest.raises(ValueError):
+        asyncio.run(arun_graph(mock_graph, {"input": "test input"}))
+
+# Test running a batch where some inputs fail
+def test_arun_graph_batch_collects_errors():
+    def check_node(state):
+        if state["input"] < 0:
+            raise ValueError("negative input")
+        return {"output": state["input"] * 2}
+    
+    graph = StateGraph(dict)
+    graph.add_node("check", check_node)
+    graph.add_edge(START, "check")
+    graph.add_edge("check", END)
+    compiled_graph = graph.compile()
+    
+    results = asyncio.run(arun_graph_batch(
+        compiled_graph,
+        [{"input": 1}, {"input": -1}, {"input": 3}],
+        max_concurrency=2
+    ))
+    
+    assert results[0] == {"output": 2}
+    assert isinstance(results[1], ValueError)
+    assert results[2] == {"output": 6}
+
+# Test streaming node updates and LLM tokens
+def test_astream_graph_emits_tokens_and_node_events():
+    definition = {
+        "nodes": [
+            {
+                "id": "node1",
+                "type": "llm",
+                "config": {
+                    "prompt_template": "Answer: {input}",
+                    "input_keys": ["input"],
+                    "output_key": "output"
+                }
+            },
+            {
+                "id": "node2",
+                "type": "transform",
+                "config": {
+                    "transform_type": "extract_json",
+                    "input_key": "output",
+                    "output_key": "final_output"
+                }
+            }
+        ],
+        "edges": [
+            {"source": "START", "target": "node1"},
+            {"source": "node1", "target": "node2"},
+            {"source": "node2", "target": "END"}
+        ],
+        "state_type": "dict"
+    }
+    
+    fake_llm = FakeListChatModel(responses=['{"key": "value"}'])
+    with patch("app.api.client_registry.ChatOpenAI", return_value=fake_llm):
+        graph = build_langgraph_from_definition(definition, use_async=True)
+        
+        async def collect():
+            return [event async for event in astream_graph(graph, {"input": "test input"})]
+        
+        events = asyncio.run(collect())
+    
+    tokens = [event for event in events if event["event"] == "token"]
+    assert "".join(event["content"] for event in tokens) == '{"key": "value"}'
+    assert all(event["node"] == "node1" for event in tokens)
+    
+    node_events = [event for event in events if event["event"] == "node"]
+    assert [event["node"] for event in node_events] == ["node1", "node2"]
+    
+    # Tokens arrive before the LLM node finishes and the end event comes last
+    assert events.index(tokens[-1]) < events.index(node_events[0])
+    assert events[-1] == {"event": "end", "result": {"final_output": {"key": "value"}}}
+
+# Test fan-out to parallel branches and fan-in through a join node
+def test_parallel_branches_with_join():
+    definition = {
+        "nodes": [
+            {"id": "split", "type": "human", "config": {"input_key": "input", "output_key": "question"}},
+            {"id": "branch_a", "type": "llm", "config": {"input_key": "question", "output_key": "answer_a"}},
+            {"id": "branch_b", "type": "llm", "config": {"model_name": "gpt-4", "input_key": "question", "output_key": "answer_b"}},
+            {
+                "id": "join",
+                "type": "join",
+                "config": {
+                    "reducers": {
+                        "answers": {"type": "list", "input_keys": ["answer_a", "answer_b"]},
+                        "summary": {"type": "concat", "input_keys": ["answer_a", "answer_b"], "separator": " | "}
+                    }
+                }
+            }
+        ],
+        "edges": [
+            {"source": "START", "target": "split"},
+            {"source": "split", "type": "parallel", "targets": ["branch_a", "branch_b"]},
+            {"source": "branch_a", "target": "join"},
+            {"source": "branch_b", "target": "join"},
+            {"source": "join", "target": "END"}
+        ],
+        "state_type": "dict"
+    }
+    
+    def make_llm(model_name, delay, content):
+        async def ainvoke(prompt):
+            await asyncio.sleep(delay)
+            return MagicMock(content=f"{content}: {prompt}")
+        llm = MagicMock()
+        llm.ainvoke = ainvoke
+        return llm
+    
+    # branch_a finishes last, so completion order differs from declaration order
+    llms = {
+        "gpt-3.5-turbo": make_llm("gpt-3.5-turbo", 0.3, "A"),
+        "gpt-4": make_llm("gpt-4", 0.1, "B")
+    }
+    
+    with patch("app.api.client_registry.ChatOpenAI", side_effect=lambda **kwargs: llms[kwargs["model_name"]]):
+        graph = build_langgraph_from_definition(definition, use_async=True)
+        
+        start_time = time.monotonic()
+        result = asyncio.run(arun_graph(graph, {"input": "q"}))
+        elapsed = time.monotonic() - start_time
+    
+    # Branches overlap, so the run takes about as long as the slowest one
+    assert elapsed < 0.35
+    assert result["answers"] == ["A: q", "B: q"]
+    assert result["summary"] == "A: q | B: q"
+    assert result["input"] == "q"
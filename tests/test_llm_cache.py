@@ -0,0 +1,142 @@
+import pytest
+import asyncio
+from unittest.mock import patch, MagicMock
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.api.database import Base
+from app.api.client_registry import client_registry
+from app.api.langgraph_builder import create_node_function
+from app.api.llm_cache import LLMResponseCache, make_cache_key, llm_cache
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    Base.metadata.drop_all(bind=engine)
+
+# Test that the key covers model, temperature and prompt
+def test_cache_key():
+    key = make_cache_key("gpt-4", 0, "Classify: hello")
+    
+    assert key == make_cache_key("gpt-4", 0, "Classify: hello")
+    assert key != make_cache_key("gpt-3.5-turbo", 0, "Classify: hello")
+    assert key != make_cache_key("gpt-4", 0.5, "Classify: hello")
+    assert key != make_cache_key("gpt-4", 0, "Classify: goodbye")
+
+# Test the in-process tier and its counters
+def test_memory_tier():
+    cache = LLMResponseCache(max_size=2, default_ttl=60, persistent=False)
+    
+    assert cache.get("a") is None
+    cache.set("a", "gpt-4", "response a")
+    assert cache.get("a") == "response a"
+    
+    assert cache.stats() == {"size": 1, "memory_hits": 1, "persistent_hits": 0, "misses": 1}
+
+# Test that entries expire after their TTL
+def test_ttl_expiry():
+    clock = FakeClock()
+    cache = LLMResponseCache(max_size=2, default_ttl=60, persistent=False, clock=clock)
+    cache.set("a", "gpt-4", "response a")
+    cache.set("b", "gpt-4", "response b", ttl=120)
+    
+    clock.now += 90
+    
+    assert cache.get("a") is None
+    assert cache.get("b") == "response b"
+
+# Test that the persistent tier survives a fresh in-process cache
+def test_persistent_tier(session_factory):
+    clock = FakeClock()
+    first = LLMResponseCache(max_size=2, default_ttl=60, session_factory=session_factory, clock=clock)
+    first.set("a", "gpt-4", "response a")
+    
+    second = LLMResponseCache(max_size=2, default_ttl=60, session_factory=session_factory, clock=clock)
+    assert second.get("a") == "response a"
+    # The persistent hit is promoted into memory
+    assert second.get("a") == "response a"
+    assert second.stats()["persistent_hits"] == 1
+    assert second.stats()["memory_hits"] == 1
+    
+    clock.now += 90
+    third = LLMResponseCache(max_size=2, default_ttl=60, session_factory=session_factory, clock=clock)
+    assert third.get("a") is None
+
+# Test that persistent tier failures are treated as misses
+def test_persistent_failure_is_a_miss():
+    failing_factory = MagicMock(side_effect=RuntimeError("database unavailable"))
+    cache = LLMResponseCache(max_size=2, default_ttl=60, session_factory=failing_factory)
+    
+    cache.set("a", "gpt-4", "response a")
+    assert cache.get("a") == "response a"
+    assert cache.get("b") is None
+
+# Test that a cached LLM node only calls the model once per prompt
+def test_cached_llm_node():
+    config = {
+        "model_name": "gpt-3.5-turbo",
+        "temperature": 0,
+        "prompt_template": "Classify: {input}",
+        "input_keys": ["input"],
+        "output_key": "label",
+        "cache": True
+    }
+    
+    client_registry.clear()
+    llm_cache.clear()
+    with patch("app.api.client_registry.ChatOpenAI") as mock_chat_openai, \
+         patch.object(llm_cache, "persistent", False):
+        mock_llm_instance = MagicMock()
+        mock_llm_instance.invoke.return_value.content = "positive"
+        mock_chat_openai.return_value = mock_llm_instance
+        
+        llm_node = create_node_function("llm", config)
+        
+        assert llm_node({"input": "great"}) == {"label": "positive"}
+        assert llm_node({"input": "great"}) == {"label": "positive"}
+        assert llm_node({"input": "awful"}) == {"label": "positive"}
+        
+        # Two distinct prompts, two model calls
+        assert mock_llm_instance.invoke.call_count == 2
+        assert llm_cache.stats()["memory_hits"] == 1
+    client_registry.clear()
+    llm_cache.clear()
+
+# Test the async cache path
+def test_cached_async_llm_node():
+    config = {"model_name": "gpt-4", "temperature": 0, "input_key": "input", "output_key": "output", "cache": True}
+    
+    client_registry.clear()
+    llm_cache.clear()
+    with patch("app.api.client_registry.ChatOpenAI") as mock_chat_openai, \
+         patch.object(llm_cache, "persistent", False):
+        calls = []
+        
+        async def ainvoke(prompt):
+            calls.append(prompt)
+            return MagicMock(content=f"answer to {prompt}")
+        
+        mock_chat_openai.return_value.ainvoke = ainvoke
+        llm_node = create_node_function("llm", config, use_async=True)
+        
+        async def run_twice():
+            return [await llm_node({"input": "question"}) for _ in range(2)]
+        
+        assert asyncio.run(run_twice()) == [{"output": "answer to question"}] * 2
+        assert calls == ["question"]
+    client_registry.clear()
+    llm_cache.clear()
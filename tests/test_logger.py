@@ -0,0 +1,64 @@
+import json
+import logging
+import queue
+
+from app.api import logger
+from app.api.logger import JsonFormatter, BackgroundQueueHandler, background_handler
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.lines = []
+
+    def emit(self, record):
+        self.lines.append(self.format(record))
+
+# Test that loggers are configured once and reused
+def test_get_logger_is_cached():
+    first = logger.get_logger("test-cached")
+    second = logger.get_logger("test-cached")
+
+    assert first is second
+    assert len(first.handlers) == 1
+
+# Test level checks, including for messages that are never built
+def test_is_enabled():
+    test_logger = logger.get_logger("test-levels")
+    test_logger.setLevel(logging.INFO)
+
+    assert logger.is_enabled("info", module="test-levels")
+    assert not logger.is_enabled("debug", module="test-levels")
+
+# Test that records reach the handlers on the listener thread as JSON
+def test_background_handler_formats_json():
+    target = ListHandler()
+    target.setFormatter(JsonFormatter())
+    handler = background_handler(target)
+
+    test_logger = logging.getLogger("test-background")
+    test_logger.propagate = False
+    test_logger.setLevel(logging.DEBUG)
+    test_logger.addHandler(handler)
+    try:
+        test_logger.info("Node %s finished", "n1", extra={"data": {"duration": 0.5}})
+    finally:
+        logger.stop_background_handler(handler)
+        test_logger.removeHandler(handler)
+
+    entry = json.loads(target.lines[0])
+    assert entry["message"] == "Node n1 finished"
+    assert entry["level"] == "INFO"
+    assert entry["data"] == {"duration": 0.5}
+
+# Test that enqueueing does not format the record
+def test_queue_handler_defers_formatting():
+    log_queue = queue.SimpleQueue()
+    handler = BackgroundQueueHandler(log_queue)
+    record = logging.LogRecord("test", logging.INFO, __file__, 1, "value %d", (42,), None)
+
+    handler.handle(record)
+    queued = log_queue.get_nowait()
+
+    assert queued.msg == "value 42"
+    assert queued.args is None
+    assert not hasattr(queued, "message")
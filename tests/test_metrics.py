@@ -0,0 +1,114 @@
+import asyncio
+import pytest
+from types import SimpleNamespace
+
+from app.api.langgraph_builder import build_langgraph_from_definition, run_graph
+from app.api.metrics import (
+    MetricsRegistry, NODE_DURATION, NODE_ERRORS, NODE_INVOCATIONS, ROUTE_DECISIONS, LLM_TOKENS,
+    instrument_node, instrument_router, record_llm_usage, registry
+)
+
+# Test the text exposition format for counters and histograms
+def test_render_format():
+    test_registry = MetricsRegistry()
+    requests = test_registry.counter("test_requests_total", "Requests", ("path",))
+    latency = test_registry.histogram("test_latency_seconds", "Latency", buckets=(0.1, 1.0))
+    test_registry.callback("test_queue_size", "Queue size", "gauge", lambda: 3)
+
+    requests.labels('/a"b').inc()
+    requests.labels('/a"b').inc(2)
+    latency.observe(0.05)
+    latency.observe(0.5)
+    latency.observe(5)
+
+    text = test_registry.render()
+
+    assert "# TYPE test_requests_total counter" in text
+    assert 'test_requests_total{path="/a\\"b"} 3.0' in text
+    assert 'test_latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{le="1.0"} 2' in text
+    assert 'test_latency_seconds_bucket{le="+Inf"} 3' in text
+    assert "test_latency_seconds_count 3" in text
+    assert "test_latency_seconds_sum 5.55" in text
+    assert "test_queue_size 3.0" in text
+
+# Test that label counts are checked
+def test_wrong_label_count():
+    with pytest.raises(ValueError):
+        NODE_INVOCATIONS.labels("only-node")
+
+# Test sync and async node instrumentation, including errors
+def test_instrument_node():
+    def failing(state):
+        raise RuntimeError("boom")
+
+    async def doubling(state):
+        return {"value": state["value"] * 2}
+
+    sync_node = instrument_node(failing, "test_fail", "transform")
+    async_node = instrument_node(doubling, "test_double", "llm", graph_id=7)
+
+    with pytest.raises(RuntimeError):
+        sync_node({})
+    assert asyncio.run(async_node({"value": 2})) == {"value": 4}
+    assert asyncio.iscoroutinefunction(async_node)
+
+    assert NODE_ERRORS.labels("", "test_fail", "transform").value == 1
+    assert NODE_INVOCATIONS.labels(7, "test_double", "llm").value == 1
+    assert NODE_DURATION.labels(7, "test_double", "llm").snapshot()[2] == 1
+
+# Test that router decisions are counted by destination
+def test_instrument_router():
+    router = instrument_router(lambda state: "yes" if state["ok"] else "no", "test_source", graph_id=7)
+
+    router({"ok": True})
+    router({"ok": True})
+    router({"ok": False})
+
+    assert ROUTE_DECISIONS.labels(7, "test_source", "yes").value == 2
+    assert ROUTE_DECISIONS.labels(7, "test_source", "no").value == 1
+
+# Test that user-defined label values are truncated and capped
+def test_bounded_labels():
+    test_registry = MetricsRegistry()
+    nodes = test_registry.counter("test_nodes_total", "Nodes", ("node", "node_type"), bounded=("node",))
+    nodes.max_series = 2
+
+    nodes.labels("x" * 100, "llm").inc()
+    nodes.labels("a", "llm").inc()
+    nodes.labels("b", "llm").inc()
+    nodes.labels("c", "tool").inc()
+    nodes.labels("a", "llm").inc()
+
+    text = test_registry.render()
+    assert f'test_nodes_total{{node="{"x" * 64}",node_type="llm"}} 1.0' in text
+    assert 'test_nodes_total{node="a",node_type="llm"} 2.0' in text
+    # Past the cap new values share one series per unbounded label set
+    assert 'test_nodes_total{node="other",node_type="llm"} 1.0' in text
+    assert 'test_nodes_total{node="other",node_type="tool"} 1.0' in text
+    assert 'node="b"' not in text
+
+# Test token usage reported on LLM responses
+def test_record_llm_usage():
+    record_llm_usage("test-model", SimpleNamespace(usage_metadata={"input_tokens": 12, "output_tokens": 5}))
+    record_llm_usage("test-model", SimpleNamespace(usage_metadata=None))
+
+    assert LLM_TOKENS.labels("test-model", "prompt").value == 12
+    assert LLM_TOKENS.labels("test-model", "completion").value == 5
+
+# Test that built graphs report per-node metrics
+def test_graph_nodes_are_instrumented():
+    definition = {
+        "nodes": [{"id": "test_metrics_node", "type": "human", "config": {"input_key": "input", "output_key": "out"}}],
+        "edges": [
+            {"source": "START", "target": "test_metrics_node"},
+            {"source": "test_metrics_node", "target": "END"}
+        ]
+    }
+
+    graph = build_langgraph_from_definition(definition, graph_id=42)
+    run_graph(graph, {"input": "hi"})
+
+    text = registry.render()
+    assert 'graphflow_node_invocations_total{graph="42",node="test_metrics_node",node_type="human"} 1.0' in text
+    assert "graphflow_graph_build_duration_seconds_count" in text
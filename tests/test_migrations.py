@@ -0,0 +1,63 @@
+import json
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.api.database import Base
+from app.api.migrations import add_missing_columns, convert_json_columns, run_migrations
+from app.api.models import Graph, GraphExecution
+
+@pytest.fixture
+def legacy_engine():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    # Schema from before definitions were compiled and payloads stored as JSON
+    with engine.begin() as connection:
+        connection.execute(text(
+            "CREATE TABLE graphs (id INTEGER PRIMARY KEY, name VARCHAR(255) NOT NULL, description TEXT, "
+            "definition JSON, nodes TEXT NOT NULL, edges TEXT NOT NULL, created_at DATETIME, updated_at DATETIME)"
+        ))
+        connection.execute(text(
+            "CREATE TABLE graph_executions (id INTEGER PRIMARY KEY, graph_id INTEGER NOT NULL, "
+            "input_data TEXT NOT NULL, output_data TEXT NOT NULL, execution_time DATETIME)"
+        ))
+        connection.execute(
+            text("INSERT INTO graphs (id, name, nodes, edges) VALUES (1, 'legacy', :nodes, :edges)"),
+            {"nodes": json.dumps([{"id": "a", "type": "transform"}]), "edges": json.dumps([])}
+        )
+        connection.execute(
+            text("INSERT INTO graph_executions (graph_id, input_data, output_data) VALUES (1, :input, :output)"),
+            {"input": json.dumps({"query": "hi"}), "output": json.dumps({"answer": "hello"})}
+        )
+    yield engine
+    Base.metadata.drop_all(bind=engine)
+
+# Test that nullable columns added to models are created on old tables
+def test_add_missing_columns(legacy_engine):
+    added = add_missing_columns(legacy_engine)
+
+    assert "graphs.compiled_definition" in added
+    assert add_missing_columns(legacy_engine) == []
+
+# Test that rows written as JSON text read back as native values
+def test_legacy_json_rows_are_readable(legacy_engine):
+    Base.metadata.create_all(bind=legacy_engine)
+    run_migrations(legacy_engine)
+    db = sessionmaker(bind=legacy_engine)()
+
+    graph = db.query(Graph).filter(Graph.id == 1).first()
+    execution = db.query(GraphExecution).first()
+
+    assert graph.nodes == [{"id": "a", "type": "transform"}]
+    assert graph.edges == []
+    assert execution.input_data == {"query": "hi"}
+    assert execution.output_data == {"answer": "hello"}
+    db.close()
+
+# Test that SQLite needs no column conversion
+def test_convert_json_columns_sqlite(legacy_engine):
+    assert convert_json_columns(legacy_engine) == []
@@ -0,0 +1,156 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.api.rate_limiter import LLMRateLimiter, ModelRateLimiter, TokenBucket, llm_lane, current_lane
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class RateLimitError(Exception):
+    status_code = 429
+
+# Test that the bucket allows a minute of burst and then refills continuously
+def test_token_bucket():
+    bucket = TokenBucket(60, now=0.0)
+
+    assert bucket.delay(60, 0.0) == 0
+    bucket.take(60)
+    assert bucket.delay(1, 0.0) == pytest.approx(1.0)
+    assert bucket.delay(1, 0.5) == pytest.approx(0.5)
+    # Requests above the capacity wait for a full bucket instead of forever
+    assert bucket.delay(1000, 30.0) == pytest.approx(30.0)
+
+# Test that queued calls start by lane, then in arrival order
+def test_interactive_lane_goes_first():
+    limiter = ModelRateLimiter("gpt-4", max_concurrency=1)
+    started = []
+
+    async def call(name, lane):
+        with llm_lane(lane):
+            async with limiter.alimit():
+                started.append(name)
+
+    async def scenario():
+        first = await limiter.aacquire()
+        tasks = [
+            asyncio.create_task(call("batch-1", "batch")),
+            asyncio.create_task(call("batch-2", "batch")),
+            asyncio.create_task(call("interactive", "interactive")),
+        ]
+        await asyncio.sleep(0.01)
+        assert limiter.queued == 3
+        limiter.release(first)
+        await asyncio.gather(*tasks)
+
+    asyncio.run(scenario())
+
+    assert started == ["interactive", "batch-1", "batch-2"]
+    assert limiter.active == 0
+    assert current_lane() == "interactive"
+
+# Test the concurrency cap across threads
+def test_sync_concurrency_limit():
+    limiter = ModelRateLimiter("gpt-4", max_concurrency=2)
+    running = []
+    peak = []
+    lock = threading.Lock()
+
+    def call():
+        with limiter.limit():
+            with lock:
+                running.append(1)
+                peak.append(len(running))
+            time.sleep(0.02)
+            with lock:
+                running.pop()
+
+    threads = [threading.Thread(target=call) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert max(peak) == 2
+    assert limiter.active == 0 and limiter.queued == 0
+
+# Test that calls wait for the request budget to refill
+def test_requests_per_minute():
+    # 600 per minute is one request every 0.1s once the burst is spent
+    limiter = ModelRateLimiter("gpt-4", requests_per_minute=600)
+    limiter._requests.tokens = 0
+
+    async def scenario():
+        start = time.monotonic()
+        for _ in range(3):
+            async with limiter.alimit():
+                pass
+        return time.monotonic() - start
+
+    elapsed = asyncio.run(scenario())
+    assert 0.25 <= elapsed < 1.0
+
+# Test that the token estimate is settled with the reported usage
+def test_token_budget_settles_usage():
+    clock = FakeClock()
+    limiter = ModelRateLimiter("gpt-4", tokens_per_minute=1000, clock=clock)
+
+    with limiter.limit(100) as permit:
+        permit.settle(700)
+
+    assert limiter._delay(300, clock()) == 0
+    assert limiter._delay(400, clock()) == pytest.approx(6.0)
+
+# Test that a 429 from the provider empties the request budget
+def test_rate_limit_error_backs_off():
+    clock = FakeClock()
+    limiter = ModelRateLimiter("gpt-4", requests_per_minute=60, clock=clock)
+
+    with pytest.raises(RateLimitError):
+        with limiter.limit():
+            raise RateLimitError("Too many requests")
+
+    assert limiter.active == 0
+    assert limiter._delay(0, clock()) == pytest.approx(1.0)
+
+# Test that a cancelled waiter leaves the queue and wakes the next one
+def test_cancelled_waiter_is_removed():
+    limiter = ModelRateLimiter("gpt-4", max_concurrency=1)
+
+    async def scenario():
+        held = await limiter.aacquire()
+        cancelled = asyncio.create_task(limiter.aacquire())
+        waiting = asyncio.create_task(limiter.aacquire())
+        await asyncio.sleep(0.01)
+        cancelled.cancel()
+        await asyncio.sleep(0.01)
+        assert limiter.queued == 1
+        limiter.release(held)
+        limiter.release(await asyncio.wait_for(waiting, 1))
+
+    asyncio.run(scenario())
+    assert limiter.active == 0 and limiter.queued == 0
+
+# Test per-model overrides and disabling the limiter
+def test_registry_limits():
+    registry = LLMRateLimiter(
+        max_concurrency=16,
+        overrides={"gpt-4": {"requests_per_minute": 500, "max_concurrency": 4}, "unlimited": {"max_concurrency": 0}}
+    )
+
+    gpt4 = registry.for_model("gpt-4")
+    assert registry.for_model("gpt-4") is gpt4
+    assert gpt4.max_concurrency == 4 and gpt4._requests.capacity == 500
+    assert registry.for_model("gpt-3.5-turbo").max_concurrency == 16
+    assert registry.for_model("unlimited") is None
+    assert LLMRateLimiter(enabled=False, max_concurrency=16).for_model("gpt-4") is None
+
+    with pytest.raises(ValueError):
+        with llm_lane("urgent"):
+            pass
@@ -0,0 +1,255 @@
+import asyncio
+import concurrent.futures
+import threading
+import time
+
+import pytest
+
+from app.api.rate_limiter import ModelRateLimiter
+from app.api import resilience
+from app.api.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    NodeTimeoutError,
+    apply_node_policy,
+    call_policy,
+    circuit_breakers,
+    is_transient,
+    node_policy,
+)
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class ServerError(Exception):
+    status_code = 503
+
+class RateLimitError(Exception):
+    status_code = 429
+
+@pytest.fixture(autouse=True)
+def clear_circuit_breakers():
+    circuit_breakers.clear()
+    yield
+    circuit_breakers.clear()
+
+def flaky(failures, error=ServerError("unavailable")):
+    """An async node failing with `error` for its first `failures` calls."""
+    calls = []
+
+    async def node(state):
+        calls.append(state)
+        if len(calls) <= failures:
+            raise error
+        return {"output": "ok"}
+    return node, calls
+
+# Test which errors are retried
+def test_is_transient():
+    assert is_transient(ServerError())
+    assert is_transient(TimeoutError())
+    assert is_transient(ConnectionResetError())
+    assert not is_transient(KeyError("missing"))
+    assert not is_transient(ValueError("bad request"))
+
+# Test policy defaults by node type and overrides from the node config
+def test_node_policy_defaults():
+    llm = node_policy("llm", {})
+    assert llm["timeout"] > 0 and llm["circuit_breaker"]
+
+    transform = node_policy("transform", {})
+    assert transform["timeout"] == 0 and transform["retries"] == 0 and not transform["circuit_breaker"]
+
+    custom = node_policy("llm", {"timeout": 5, "retries": 3, "circuit_breaker": False})
+    assert (custom["timeout"], custom["retries"], custom["circuit_breaker"]) == (5.0, 3, False)
+
+# Test that nodes without a policy are not wrapped
+def test_no_policy_returns_function():
+    def node(state):
+        return state
+
+    assert apply_node_policy(node, "n", "transform", {}) is node
+
+# Test retrying transient failures with backoff
+def test_retries_transient_errors():
+    node, calls = flaky(2)
+    wrapped = apply_node_policy(node, "n", "llm", {"retries": 2, "retry_backoff": 0.01, "circuit_breaker": False})
+
+    assert asyncio.run(wrapped({"input": "x"})) == {"output": "ok"}
+    assert len(calls) == 3
+
+    node, calls = flaky(1, KeyError("input"))
+    wrapped = apply_node_policy(node, "n", "llm", {"retries": 2, "circuit_breaker": False})
+    with pytest.raises(KeyError):
+        asyncio.run(wrapped({}))
+    assert len(calls) == 1
+
+# Test that async and sync attempts are stopped at the timeout
+def test_timeout():
+    async def slow_async(state):
+        await asyncio.sleep(5)
+
+    def slow_sync(state):
+        time.sleep(0.5)
+
+    start = time.monotonic()
+    with pytest.raises(NodeTimeoutError):
+        asyncio.run(apply_node_policy(slow_async, "n", "transform", {"timeout": 0.05})({}))
+    with pytest.raises(NodeTimeoutError):
+        apply_node_policy(slow_sync, "n", "transform", {"timeout": 0.05})({})
+    assert time.monotonic() - start < 0.4
+
+# Test that a timed out attempt is retried
+def test_timeout_is_retried():
+    calls = []
+
+    async def hangs_once(state):
+        calls.append(1)
+        if len(calls) == 1:
+            await asyncio.sleep(5)
+        return {"output": "ok"}
+
+    wrapped = apply_node_policy(hangs_once, "n", "transform", {"timeout": 0.05, "retries": 1, "retry_backoff": 0})
+    assert asyncio.run(wrapped({})) == {"output": "ok"}
+    assert len(calls) == 2
+
+# Test opening, half-opening and closing a circuit
+def test_circuit_breaker_states():
+    clock = FakeClock()
+    breaker = CircuitBreaker("openai", failure_threshold=2, reset_timeout=10, clock=clock)
+
+    breaker.before_call()
+    breaker.record_failure()
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    clock.now += 10
+    assert breaker.state == "half_open"
+    breaker.before_call()
+    # Only one trial call at a time
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    clock.now += 10
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+# Test that nodes of the same provider share a breaker and fail fast
+def test_nodes_share_provider_breaker(monkeypatch):
+    monkeypatch.setattr(circuit_breakers, "failure_threshold", 2)
+    first, first_calls = flaky(10)
+    second, second_calls = flaky(0)
+    first_policy = call_policy("llm", {"timeout": 0})
+    second_policy = call_policy("llm", {"timeout": 0})
+
+    for _ in range(2):
+        with pytest.raises(ServerError):
+            asyncio.run(first_policy.acall(first, {}))
+
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(second_policy.acall(second, {}))
+    assert second_calls == []
+
+    # Tool nodes use their own provider's breaker
+    search, _ = flaky(0)
+    assert asyncio.run(call_policy("tool", {"tool_type": "search"}).acall(search, {})) == {"output": "ok"}
+    # Other node types have no per-call policy
+    assert call_policy("transform", {"timeout": 5}) is None
+
+# Test that a timed out provider call opens the circuit but a 429 does not
+def test_breaker_failures(monkeypatch):
+    monkeypatch.setattr(circuit_breakers, "failure_threshold", 2)
+    policy = call_policy("llm", {"timeout": 0.05})
+
+    def hangs(state):
+        time.sleep(0.5)
+
+    def rate_limited(state):
+        raise RateLimitError("Too many requests")
+
+    for _ in range(3):
+        with pytest.raises(RateLimitError):
+            policy.call(rate_limited, {})
+    assert policy.breaker.state == "closed"
+
+    for _ in range(2):
+        with pytest.raises(NodeTimeoutError):
+            policy.call(hangs, {})
+    assert policy.breaker.state == "open"
+
+# Test that waiting on a saturated rate limiter is not part of the timeout
+def test_limiter_queue_wait_is_not_timed(monkeypatch):
+    monkeypatch.setattr(circuit_breakers, "failure_threshold", 1)
+    limiter = ModelRateLimiter("gpt-4", max_concurrency=1)
+    policy = call_policy("llm", {"timeout": 0.05})
+
+    async def provider(state):
+        await asyncio.sleep(0.01)
+        return {"output": "ok"}
+
+    async def call(state):
+        async with limiter.alimit():
+            return await policy.acall(provider, state)
+
+    async def scenario():
+        held = await limiter.aacquire()
+        calls = [asyncio.create_task(call({})) for _ in range(3)]
+        # Queue well past the call timeout before the limiter frees up
+        await asyncio.sleep(0.15)
+        limiter.release(held)
+        return await asyncio.gather(*calls)
+
+    assert asyncio.run(scenario()) == [{"output": "ok"}] * 3
+    assert policy.breaker.state == "closed"
+
+# Test that waiting for a free worker thread is not part of the timeout
+def test_saturated_timeout_pool(monkeypatch):
+    monkeypatch.setattr(resilience, "_timeout_executor", concurrent.futures.ThreadPoolExecutor(max_workers=2))
+    policy = call_policy("llm", {"timeout": 0.05, "circuit_breaker": False})
+    release = threading.Event()
+
+    def hangs(state):
+        release.wait(1)
+
+    def quick(state):
+        time.sleep(0.01)
+        return {"output": "ok"}
+
+    # Two hung calls time out but keep both workers busy
+    for _ in range(2):
+        with pytest.raises(NodeTimeoutError):
+            policy.call(hangs, {})
+
+    threading.Timer(0.2, release.set).start()
+    start = time.monotonic()
+    assert policy.call(quick, {}) == {"output": "ok"}
+    assert time.monotonic() - start >= 0.15
+
+# Test that a timed out sync call keeps its rate limiter permit until it returns
+def test_timed_out_call_holds_permit():
+    limiter = ModelRateLimiter("gpt-4", max_concurrency=1)
+    policy = call_policy("llm", {"timeout": 0.05, "circuit_breaker": False})
+    release = threading.Event()
+
+    with pytest.raises(NodeTimeoutError) as exc_info:
+        with limiter.limit():
+            policy.call(lambda state: release.wait(1), {})
+
+    assert limiter.active == 1
+    release.set()
+    exc_info.value.running.result(1)
+    # The permit is released by a callback on the worker thread
+    deadline = time.monotonic() + 1
+    while limiter.active and time.monotonic() < deadline:
+        time.sleep(0.005)
+    assert limiter.active == 0
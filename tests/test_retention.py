@@ -0,0 +1,98 @@
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.api.database import Base
+from app.api.models import Graph, GraphExecution, GraphExecutionArchive
+from app.api.retention import prune_executions, RetentionJob
+
+NOW = datetime(2024, 6, 1, 12, 0, 0)
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    db = factory()
+    for graph_id in (1, 2):
+        db.add(Graph(id=graph_id, name=f"graph {graph_id}", nodes=[], edges=[]))
+        for day in range(10):
+            db.add(GraphExecution(
+                graph_id=graph_id,
+                input_data={"day": day},
+                output_data={"result": day},
+                execution_time=NOW - timedelta(days=day)
+            ))
+    db.commit()
+    db.close()
+
+    yield factory
+    Base.metadata.drop_all(bind=engine)
+
+def remaining_days(factory, graph_id):
+    db = factory()
+    rows = db.query(GraphExecution).filter(GraphExecution.graph_id == graph_id).all()
+    db.close()
+    return sorted(row.input_data["day"] for row in rows)
+
+# Test that the history index exists
+def test_history_index(session_factory):
+    engine = session_factory.kw["bind"]
+    indexes = {index["name"]: index["column_names"] for index in inspect(engine).get_indexes("graph_executions")}
+
+    assert indexes["ix_graph_executions_graph_id_execution_time"] == ["graph_id", "execution_time"]
+
+# Test removing executions past the retention age, in several batches
+def test_prune_by_age(session_factory):
+    result = prune_executions(retention_days=5, batch_size=3, session_factory=session_factory, now=NOW)
+
+    assert result == {"expired": 8, "trimmed": 0}
+    assert remaining_days(session_factory, 1) == [0, 1, 2, 3, 4, 5]
+    assert remaining_days(session_factory, 2) == [0, 1, 2, 3, 4, 5]
+
+# Test keeping only the newest executions of each graph
+def test_prune_by_count(session_factory):
+    result = prune_executions(max_per_graph=3, batch_size=2, session_factory=session_factory, now=NOW)
+
+    assert result == {"expired": 0, "trimmed": 14}
+    assert remaining_days(session_factory, 1) == [0, 1, 2]
+    assert remaining_days(session_factory, 2) == [0, 1, 2]
+
+# Test that archived executions keep their payloads
+def test_prune_with_archive(session_factory):
+    prune_executions(retention_days=8, archive=True, session_factory=session_factory, now=NOW)
+
+    db = session_factory()
+    archived = db.query(GraphExecutionArchive).order_by(GraphExecutionArchive.graph_id).all()
+    assert [(row.graph_id, row.output_data) for row in archived] == [(1, {"result": 9}), (2, {"result": 9})]
+    db.close()
+    assert remaining_days(session_factory, 1) == list(range(9))
+
+# Test that archiving executions another worker already archived does not fail
+def test_archive_is_idempotent(session_factory):
+    db = session_factory()
+    oldest = db.query(GraphExecution).filter(GraphExecution.graph_id == 1).order_by(GraphExecution.execution_time).first()
+    db.add(GraphExecutionArchive(id=oldest.id, graph_id=1, input_data=oldest.input_data, output_data=oldest.output_data))
+    db.commit()
+    db.close()
+
+    result = prune_executions(retention_days=8, archive=True, session_factory=session_factory, now=NOW)
+
+    assert result["expired"] == 2
+    db = session_factory()
+    assert db.query(GraphExecutionArchive).count() == 2
+    db.close()
+    assert remaining_days(session_factory, 1) == list(range(9))
+
+# Test that nothing is removed without a policy
+def test_retention_disabled(session_factory):
+    assert prune_executions(session_factory=session_factory, now=NOW) == {"expired": 0, "trimmed": 0}
+    assert not RetentionJob().enabled
+    assert RetentionJob(max_per_graph=10).enabled
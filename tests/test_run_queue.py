@@ -0,0 +1,148 @@
+import pytest
+import asyncio
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.api.database import Base
+from app.api.models import Graph, GraphRun
+from app.api.run_queue import INTERRUPTED_MESSAGE, RunQueue, RunQueueFull, interrupt_runs
+
+# Test that submitted jobs run in the background
+def test_submitted_jobs_run():
+    async def scenario():
+        queue = RunQueue(concurrency=2, max_pending=10)
+        results = []
+        
+        async def job(value):
+            results.append(value)
+        
+        for value in range(5):
+            queue.submit(lambda value=value: job(value), run_id=value)
+        
+        await queue.join()
+        await queue.stop()
+        return results
+    
+    assert sorted(asyncio.run(scenario())) == [0, 1, 2, 3, 4]
+
+# Test that no more than `concurrency` jobs run at once
+def test_concurrency_limit():
+    async def scenario():
+        queue = RunQueue(concurrency=2, max_pending=10)
+        running = 0
+        peak = 0
+        
+        async def job():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+        
+        for run_id in range(6):
+            queue.submit(job, run_id=run_id)
+        
+        await queue.join()
+        await queue.stop()
+        return peak
+    
+    assert asyncio.run(scenario()) == 2
+
+# Test that a full queue rejects new submissions
+def test_backpressure_when_full():
+    async def scenario():
+        queue = RunQueue(concurrency=1, max_pending=2)
+        release = asyncio.Event()
+        
+        async def job():
+            await release.wait()
+        
+        # The first job occupies the only worker, the next two fill the queue
+        queue.submit(job, run_id=1)
+        await asyncio.sleep(0)
+        queue.submit(job, run_id=2)
+        queue.submit(job, run_id=3)
+        
+        assert queue.is_full()
+        with pytest.raises(RunQueueFull):
+            queue.submit(job, run_id=4)
+        
+        release.set()
+        await queue.join()
+        await queue.stop()
+    
+    asyncio.run(scenario())
+
+# Test that a failing job does not stop its worker
+def test_failing_job_keeps_worker_alive():
+    async def scenario():
+        queue = RunQueue(concurrency=1, max_pending=10)
+        results = []
+        
+        async def failing_job():
+            raise RuntimeError("boom")
+        
+        async def job():
+            results.append("done")
+        
+        queue.submit(failing_job, run_id=1)
+        queue.submit(job, run_id=2)
+        
+        await queue.join()
+        await queue.stop()
+        return results
+    
+    assert asyncio.run(scenario()) == ["done"]
+
+# Test that stopping reports the runs that were running or still queued
+def test_stop_returns_unfinished_runs():
+    async def scenario():
+        queue = RunQueue(concurrency=1, max_pending=10)
+        
+        async def job():
+            await asyncio.sleep(5)
+        
+        for run_id in (1, 2, 3):
+            queue.submit(job, run_id=run_id)
+        await asyncio.sleep(0.01)
+        
+        unfinished = await queue.stop()
+        assert queue.active == 0 and queue.pending == 0
+        return unfinished
+    
+    assert asyncio.run(scenario()) == [1, 2, 3]
+
+# Test marking unfinished runs as interrupted
+def test_interrupt_runs():
+    engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    
+    db = factory()
+    db.add(Graph(id=1, name="graph", nodes=[], edges=[]))
+    for run_id, run_status in enumerate(["queued", "running", "running", "success"], start=1):
+        db.add(GraphRun(id=run_id, graph_id=1, status=run_status))
+    db.commit()
+    db.close()
+    
+    def statuses():
+        db = factory()
+        try:
+            return {run.id: (run.status, run.error_message) for run in db.query(GraphRun)}
+        finally:
+            db.close()
+    
+    # Only the listed runs, as on shutdown
+    assert interrupt_runs([1, 4], session_factory=factory) == 1
+    assert statuses()[1] == ("error", INTERRUPTED_MESSAGE)
+    assert statuses()[2][0] == "running"
+    
+    # Every unfinished run, as on startup; finished runs are left alone
+    assert interrupt_runs(session_factory=factory) == 2
+    assert statuses() == {
+        1: ("error", INTERRUPTED_MESSAGE),
+        2: ("error", INTERRUPTED_MESSAGE),
+        3: ("error", INTERRUPTED_MESSAGE),
+        4: ("success", None),
+    }
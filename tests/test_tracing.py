@@ -0,0 +1,102 @@
+import asyncio
+import pytest
+
+from app.api.langgraph_builder import build_langgraph_from_definition, run_graph, arun_graph
+from app.api.config import settings
+from app.api.tracing import RunTrace, expand_trace, start_trace, trace_node, current_trace
+
+ROUTED_DEFINITION = {
+    "nodes": [
+        {"id": "classify", "type": "human", "config": {"input_key": "input", "output_key": "kind"}},
+        {"id": "question", "type": "human", "config": {"input_key": "input", "output_key": "answer"}},
+        {"id": "statement", "type": "human", "config": {"input_key": "input", "output_key": "note"}}
+    ],
+    "edges": [
+        {"source": "START", "target": "classify"},
+        {
+            "source": "classify",
+            "type": "conditional",
+            "condition": {"type": "function", "function": "'question' if state['kind'].endswith('?') else 'statement'"},
+            "destinations": ["question", "statement"]
+        },
+        {"source": "question", "target": "END"},
+        {"source": "statement", "target": "END"}
+    ]
+}
+
+# Test that the stored form is column-wise and expands back to spans
+def test_trace_record_round_trip():
+    trace = RunTrace()
+    trace.add_span("b", "llm", 0.2, 0.1, 10, 20, None)
+    trace.add_span("a", "tool", 0.1, 0.05, 5, None, "ValueError: bad")
+    trace.add_route("a", "b")
+    trace.finish()
+
+    record = trace.to_record()
+    assert record["spans"]["node"] == ["b", "a"]
+    assert record["spans"]["error"] == [None, "ValueError: bad"]
+
+    expanded = expand_trace(record)
+    assert expanded["nodes_visited"] == ["a", "b"]
+    assert expanded["spans"][0] == {
+        "node": "a", "node_type": "tool", "start": 0.1, "duration": 0.05,
+        "input_size": 5, "output_size": None, "error": "ValueError: bad"
+    }
+    assert expanded["routes"] == [{"source": "a", "destination": "b", "at": record["routes"]["at"][0]}]
+
+# Test that nodes only record spans inside a traced run
+def test_trace_node_outside_run():
+    node = trace_node(lambda state: {"out": 1}, "n1", "transform")
+
+    assert node({}) == {"out": 1}
+    assert current_trace() is None
+
+# Test that failing nodes record their error
+def test_trace_node_error(monkeypatch):
+    def failing(state):
+        raise KeyError("missing")
+
+    monkeypatch.setattr(settings, "EXECUTION_TRACE_PAYLOAD_SIZES", True)
+    node = trace_node(failing, "n1", "transform")
+    with start_trace() as trace:
+        with pytest.raises(KeyError):
+            node({"input": "x"})
+
+    assert trace.columns["node"] == ["n1"]
+    assert trace.columns["error"] == ["KeyError: 'missing'"]
+    assert trace.columns["input_size"] == [len('{"input":"x"}')]
+
+# Test that payload sizes are not measured unless enabled
+def test_trace_node_without_payload_sizes(monkeypatch):
+    monkeypatch.setattr(settings, "EXECUTION_TRACE_PAYLOAD_SIZES", False)
+    node = trace_node(lambda state: {"out": 1}, "n1", "transform")
+    with start_trace() as trace:
+        node({"input": "x"})
+
+    assert trace.columns["input_size"] == [None]
+    assert trace.columns["output_size"] == [None]
+
+# Test the nodes visited and routing decisions of a sync run
+def test_trace_sync_run():
+    graph = build_langgraph_from_definition(ROUTED_DEFINITION)
+
+    with start_trace() as trace:
+        run_graph(graph, {"input": "Is it raining?"})
+
+    expanded = expand_trace(trace.to_record())
+    assert expanded["nodes_visited"] == ["classify", "question"]
+    assert [(route["source"], route["destination"]) for route in expanded["routes"]] == [("classify", "question")]
+    assert expanded["duration"] >= sum(span["duration"] for span in expanded["spans"])
+
+# Test that async runs are traced, including sync nodes run in worker threads
+def test_trace_async_run():
+    graph = build_langgraph_from_definition(ROUTED_DEFINITION, use_async=True)
+
+    async def traced_run():
+        with start_trace() as trace:
+            await arun_graph(graph, {"input": "It is raining."})
+        return trace
+
+    trace = asyncio.run(traced_run())
+
+    assert expand_trace(trace.to_record())["nodes_visited"] == ["classify", "statement"]